@@ -1,35 +1,99 @@
 """Module for animations inside pygame games"""
 
 from PIL import Image, ImageSequence
+import os
+import weakref
 import pygame
-import itertools
+
+# Decoded frame sets by (file, size), shared by all animations of the same file and size. A frame set is dropped once no animation uses it anymore.
+_frame_sets = weakref.WeakValueDictionary()
+
+
+def get_frame_set(filename, size: (int, int) = None) -> "FrameSet":
+	"""Return the decoded frames of the given gif file, scaled to the given size. The file is only decoded if no animation uses these frames yet."""
+	key = (os.path.abspath(filename), tuple(size) if size else None)
+	frame_set = _frame_sets.get(key)
+	if frame_set is None:
+		frame_set = _frame_sets[key] = FrameSet.decode(filename, size)
+	return frame_set
+
+
+class FrameSet:
+	"""The decoded frames of an animation. The pixels of all frames lie in one contiguous RGBA buffer, and the pygame frames are views on this buffer."""
+
+	def __init__(self, buffer, frame_size: (int, int), num_frames: int, duration: int, transparency: int = None):
+		"""
+		Initialize the frame set.
+
+		:param buffer: Writable buffer (e.g. a bytearray) with the RGBA pixels of all frames, one frame after the other
+		:param frame_size: The size of each frame
+		:param num_frames: The number of frames
+		:param duration: The duration of each frame (in ms)
+		:param transparency: The palette index of the gif's transparent color (or None). Only kept as information, the frames use their alpha channel.
+		"""
+		self.buffer = buffer
+		self.frame_size = tuple(frame_size)
+		self.duration = duration
+		self.transparency = transparency
+		frame_len = self.frame_size[0] * self.frame_size[1] * 4
+		view = memoryview(self.buffer)
+		# The gif's transparent pixels already have alpha 0 after the RGBA conversion, so the frames need no colorkey
+		self.frames = [pygame.image.frombuffer(view[idx * frame_len:(idx + 1) * frame_len], self.frame_size, "RGBA") for idx in range(num_frames)]
+
+	@classmethod
+	def decode(cls, filename, size: (int, int) = None) -> "FrameSet":
+		"""Decode the given gif file into a new frame set, with the frames scaled to the given size."""
+		with Image.open(filename) as anim:
+			duration = anim.info["duration"]
+			transparency = anim.info["transparency"] if "transparency" in anim.info else None
+			frame_size = tuple(size) if size else anim.size
+			# The buffer is extended frame by frame, as counting the frames beforehand (n_frames) would decode the whole file an extra time
+			buffer = bytearray()
+			num_frames = 0
+			for frame in ImageSequence.Iterator(anim):
+				pil_frame = frame.convert("RGBA") if frame.mode != "RGBA" else frame
+				if size:
+					pil_frame = pil_frame.resize(size)
+				buffer += pil_frame.tobytes()
+				num_frames += 1
+		frame_set = cls(buffer, frame_size, num_frames, duration, transparency)
+		# # FS-35: There's a weird bug with the first frame being shown in white instead of colored. As a workaround I use the 2nd frame twice.
+		if len(frame_set.frames) >= 2:
+			frame_set.frames[0] = frame_set.frames[1]
+		return frame_set
 
 
 class Animation:
 	"""A class to play animated gif files in pygame."""
 
-	def __init__(self, filename, size: (int, int) = None):
+	def __init__(self, filename, size: (int, int) = None, frame_set: FrameSet = None):
+		"""
+		Initialize the animation. The decoded frames are shared with all other animations of the same file and size.
+
+		:param filename: The gif file
+		:param size: Size to scale the frames to (or None for the original size)
+		:param frame_set: Already decoded frames (e.g. from a cache). If given, the file isn't decoded, and the frames are shared with later animations of the same file and size.
+		"""
 		if not pygame.get_init():
 			pygame.init()
 		self.filename = filename
-		self.pil_frames = []
-		self.pygame_frames = []
 		self.clock = pygame.time.Clock()
 		self.cur_frame = 0
-		with Image.open(self.filename) as anim:
-			self.duration = anim.info["duration"]
-			self.transparency = anim.info["transparency"] if "transparency" in anim.info else None
-			for frame in ImageSequence.Iterator(anim):
-				pil_frame = frame.resize(size) if size else frame
-				pygame_frame = pygame.image.fromstring(pil_frame.tobytes(), pil_frame.size, pil_frame.mode)
-				pygame_frame.set_colorkey(self.transparency)
-				self.pygame_frames.append(pygame_frame)
-				self.pil_frames.append(pil_frame)
+		if frame_set is not None:
+			_frame_sets[(os.path.abspath(filename), tuple(size) if size else None)] = frame_set
+		else:
+			frame_set = get_frame_set(filename, size)
+		self.set_frame_set(frame_set)
+
+	def set_frame_set(self, frame_set: FrameSet) -> None:
+		"""Use the given frames for the animation."""
+		self.frame_set = frame_set
+		self.duration = frame_set.duration
+		self.transparency = frame_set.transparency
+		# The frames are shared with other animations and must not be modified
+		self.pygame_frames = frame_set.frames
 		self.num_frames = len(self.pygame_frames)
-		# # FS-35: There's a weird bug with the first frame being shown in white instead of colored. As a workaround I use the 2nd frame twice.
-		if self.num_frames >= 2:
-			self.pygame_frames[0] = self.pygame_frames[1]
-			self.pil_frames[0] = self.pil_frames[1]
+		self.cur_frame %= max(self.num_frames, 1)
 
 	def get_next_frame(self) -> pygame.Surface:
 		"""Return the next pygame frame of the animation."""
@@ -45,26 +109,15 @@ class Animation:
 		:param position: The top left position of the frames with respect to the surface
 		:param loops: The number of times that the animation is played
 		"""
-		with Image.open(self.filename) as anim:
-			duration = anim.info["duration"]
-			for i, frame in itertools.product(range(loops), ImageSequence.Iterator(anim)):
-				frame.tobytes()
-				pygame_image = pygame.image.fromstring(frame.tobytes(), frame.size, frame.mode)
-				surface.blit(pygame_image, position)
-				pygame.time.delay(duration)
+		for _ in range(loops):
+			for frame in self.pygame_frames:
+				surface.blit(frame, position)
+				pygame.time.delay(self.duration)
 
 	def get_frames_and_duration(self) -> (list, int):
 		"""Return all frames belonging to the animation as well as its duration."""
-		all_frames = []
-		with Image.open(self.filename) as anim:
-			for frame in ImageSequence.Iterator(anim):
-				pygame_image = pygame.image.fromstring(frame.tobytes(), frame.size, frame.mode)
-				all_frames.append(pygame_image)
-		return all_frames, anim.info["duration"]
+		return list(self.pygame_frames), self.duration
 
 	def resize_all_frames(self, new_size: (int, int)) -> None:
 		"""Resize all frames of the animation to the specified size."""
-		resized_frames = []
-		for frame in self.pil_frames:
-			resized_frames.append(frame.resize(new_size))
-			self.pil_frames = resized_frames
+		self.set_frame_set(get_frame_set(self.filename, new_size))
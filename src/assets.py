@@ -0,0 +1,211 @@
+"""Module for loading the assets (images, animations, sounds) of the friendly snakes package in the background, with an on-disk cache for preprocessed images"""
+
+# ----- Imports --------
+import hashlib
+import os
+import struct
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+import animations
+import pygame
+from constants import *
+
+# ----- Constants ------
+# Header of the cache files: magic, width, height, number of frames, frame duration (in ms), transparency (colorkey, -1 for none). The header is followed by the RGBA pixels of all frames.
+CACHE_HEADER = struct.Struct("<4sIIIIi")
+CACHE_MAGIC = b"FSC1"
+
+
+# ----- Methods ------
+def get_cache_dir() -> str:
+	"""Return the cache directory for the current display resolution, or None if caching is disabled."""
+	if not ASSET_CACHE_DIR or not pygame.display.get_surface():
+		return None
+	return os.path.join(ASSET_CACHE_DIR, "{}x{}".format(*pygame.display.get_surface().get_size()))
+
+
+def get_cache_filename(filename: str, size: (int, int)) -> str:
+	"""Return the cache file for the given asset file and size. The key includes the modification time and size of the asset file, so that changed files are processed again."""
+	if (cache_dir := get_cache_dir()) is None:
+		return None
+	stat = os.stat(filename)
+	key = f"{os.path.abspath(filename)}|{stat.st_mtime_ns}|{stat.st_size}|{size}"
+	return os.path.join(cache_dir, hashlib.sha1(key.encode()).hexdigest() + ".rgba")
+
+
+def read_cache(cache_filename: str) -> animations.FrameSet:
+	"""Return the frames stored in the given cache file (as views on the read data), or None if the file doesn't exist or is invalid."""
+	if not cache_filename or not os.path.isfile(cache_filename):
+		return None
+	with open(cache_filename, "rb") as cache_file:
+		data = bytearray(os.fstat(cache_file.fileno()).st_size)
+		cache_file.readinto(data)
+	if len(data) < CACHE_HEADER.size:
+		return None
+	magic, width, height, num_frames, duration, transparency = CACHE_HEADER.unpack_from(data)
+	if magic != CACHE_MAGIC or len(data) != CACHE_HEADER.size + num_frames * width * height * 4:
+		return None
+	return animations.FrameSet(memoryview(data)[CACHE_HEADER.size:], (width, height), num_frames, duration, None if transparency < 0 else transparency)
+
+
+def write_cache(cache_filename: str, frames: [pygame.Surface], duration: int = 0, transparency: int = None) -> None:
+	"""Store the RGBA pixels of the given frames (which must all have the same size) in the given cache file. Errors are ignored, as the cache is optional."""
+	if not cache_filename:
+		return
+	try:
+		os.makedirs(os.path.dirname(cache_filename), exist_ok=True)
+		# Write to a temporary file first, so that no half-written cache file is read by another process
+		tmp_filename = f"{cache_filename}.{os.getpid()}.tmp"
+		with open(tmp_filename, "wb") as cache_file:
+			cache_file.write(CACHE_HEADER.pack(CACHE_MAGIC, *frames[0].get_size(), len(frames), duration, -1 if transparency is None else transparency))
+			for frame in frames:
+				if frame.get_colorkey() is not None:
+					# With a colorkey, tobytes would derive the alpha values from it instead of returning the real ones
+					frame = frame.copy()
+					frame.set_colorkey(None)
+				cache_file.write(pygame.image.tobytes(frame, "RGBA"))
+		os.replace(tmp_filename, cache_filename)
+	except OSError:
+		pass
+
+
+def load_image(filename: str, size: (int, int) = None) -> pygame.Surface:
+	"""Load the image, convert it to the display format (with alpha) and scale it to the given size. Scaled images are read from and stored in the on-disk cache."""
+	if size is None:
+		return pygame.image.load(filename).convert_alpha()
+	cache_filename = get_cache_filename(filename, size)
+	if cached := read_cache(cache_filename):
+		return cached.frames[0].convert_alpha()
+	img = pygame.transform.scale(pygame.image.load(filename).convert_alpha(), size)
+	write_cache(cache_filename, [img])
+	return img
+
+
+def load_animation(filename: str, size: (int, int) = None) -> animations.Animation:
+	"""Load the animated gif, with its frames scaled to the given size. The decoded frames are read from and stored in the on-disk cache."""
+	cache_filename = get_cache_filename(filename, size)
+	# The frames are kept in the format they are decoded to (and not converted), so that they are blitted the same way whether they come from the cache or not
+	if cached := read_cache(cache_filename):
+		return animations.Animation(filename, size, cached)
+	anim = animations.Animation(filename, size)
+	write_cache(cache_filename, anim.pygame_frames, anim.duration, anim.transparency)
+	return anim
+
+
+def load_base_image(filename: str, size: (int, int) = None):
+	"""Load the image as a pygame_menu BaseImage (in fill mode) and resize it to the given size."""
+	import pygame_menu
+	img = pygame_menu.BaseImage(image_path=filename, drawing_mode=pygame_menu.baseimage.IMAGE_MODE_FILL)
+	return img.resize(*size) if size else img
+
+
+def load_sound(filename: str, _size=None) -> pygame.mixer.Sound:
+	"""Load the sound."""
+	return pygame.mixer.Sound(filename)
+
+
+LOAD_FUNCTIONS = {"image": load_image, "base_image": load_base_image, "animation": load_animation, "sound": load_sound}
+
+
+# ----- Classes --------
+class AssetRegistry:
+	"""
+	Class for sharing the loaded assets across the whole process. Each asset is identified by its kind ("image", "base_image", "animation" or "sound"), its file
+	and its size, and is loaded only once, no matter how many menus or graphics use it. The assets are reference counted: Every acquire has to be paired with a
+	release, and an asset is dropped once its last user released it. The shared assets must not be modified by their users.
+	"""
+
+	def __init__(self):
+		self._assets: {tuple: object} = {}
+		self._ref_counts: {tuple: int} = {}
+		self._lock = threading.Lock()
+
+	@staticmethod
+	def get_key(kind: str, filename: str, size: (int, int) = None) -> (str, str, (int, int)):
+		"""Return the key for the given asset."""
+		return kind, os.path.normpath(filename), tuple(size) if size else None
+
+	def acquire(self, kind: str, filename: str, size: (int, int) = None):
+		"""Return the given asset (loading it if no one else uses it yet) and increase its reference count."""
+		key = self.get_key(kind, filename, size)
+		with self._lock:
+			if key in self._assets:
+				self._ref_counts[key] += 1
+				return self._assets[key]
+		# Load outside the lock, so that other threads can meanwhile get assets that are already loaded
+		asset = LOAD_FUNCTIONS[kind](filename, size)
+		with self._lock:
+			# If another thread loaded the same asset in the meantime, share that one
+			asset = self._assets.setdefault(key, asset)
+			self._ref_counts[key] = self._ref_counts.get(key, 0) + 1
+			return asset
+
+	def release(self, kind: str, filename: str, size: (int, int) = None) -> None:
+		"""Decrease the reference count of the given asset and drop it if it isn't used anymore."""
+		key = self.get_key(kind, filename, size)
+		with self._lock:
+			self._ref_counts[key] -= 1
+			if self._ref_counts[key] <= 0:
+				del self._ref_counts[key]
+				del self._assets[key]
+
+	def get_ref_count(self, kind: str, filename: str, size: (int, int) = None) -> int:
+		"""Return the number of users of the given asset."""
+		with self._lock:
+			return self._ref_counts.get(self.get_key(kind, filename, size), 0)
+
+	def __len__(self) -> int:
+		with self._lock:
+			return len(self._assets)
+
+
+# The registry for the whole process
+REGISTRY = AssetRegistry()
+
+
+class AssetLoader:
+	"""
+	Class for loading assets in a background thread. Assets are requested (which starts loading them in the order of the requests) and fetched later, which only
+	waits if the asset isn't loaded yet. Without a background thread, requesting does nothing and assets are loaded when they are fetched.
+	The assets are taken from the asset registry, with the loader holding one reference per asset until it is shut down.
+	"""
+
+	def __init__(self, background: bool = True, registry: AssetRegistry = None):
+		self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="AssetLoader") if background else None
+		self._futures: {tuple: Future} = {}
+		self.registry = registry if registry else REGISTRY
+
+	def request(self, kind: str, filename: str, size: (int, int) = None) -> None:
+		"""Start loading the given asset in the background (kind is "image", "base_image", "animation" or "sound"), if it wasn't requested before."""
+		key = (kind, filename, size)
+		if self._executor and key not in self._futures:
+			self._futures[key] = self._executor.submit(self.registry.acquire, kind, filename, size)
+
+	def fetch(self, kind: str, filename: str, size: (int, int) = None):
+		"""Return the given asset. If it wasn't requested before (or there is no background thread), it is loaded right away."""
+		key = (kind, filename, size)
+		if key not in self._futures:
+			self._futures[key] = future = Future()
+			future.set_result(self.registry.acquire(kind, filename, size))
+		return self._futures[key].result()
+
+	def get_image(self, filename: str, size: (int, int) = None) -> pygame.Surface:
+		"""Return the image, scaled to the given size."""
+		return self.fetch("image", filename, size)
+
+	def get_animation(self, filename: str, size: (int, int) = None) -> animations.Animation:
+		"""Return the animation, with its frames scaled to the given size."""
+		return self.fetch("animation", filename, size)
+
+	def get_sound(self, filename: str) -> pygame.mixer.Sound:
+		"""Return the sound."""
+		return self.fetch("sound", filename)
+
+	def shutdown(self) -> None:
+		"""Stop the background thread after all requested assets are loaded and release the assets in the registry."""
+		if self._executor:
+			self._executor.shutdown()
+		for key, future in self._futures.items():
+			if future.exception() is None:
+				self.registry.release(*key)
+		self._futures = {}
@@ -0,0 +1,132 @@
+"""
+Batch simulation for balancing the levels: Runs many headless games per level with bot controllers, spread over all cores, and prints statistics about the
+survival time, the scores, the causes of the crashes and the picked up items. All times are in seconds of game time.
+Run from the src directory, e.g. "python batch.py 3 5 --games 200 --players 2 --controller random --output balance.json". To try out new item rates, drop
+rates or targets, edit a copy of the level json file and pass it with --levels-file.
+"""
+
+# ----- Imports --------
+import argparse
+import json
+import os
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+import utils
+from level import Level
+from profiler import get_percentile
+from bot import BotController
+from simulation import Simulation, load_levels, safe_controller, create_random_controller
+from constants import *
+
+# ----- Constants ------
+CONTROLLERS = ["safe", "random", "bot"]
+# Game time limit (in ms), so that games of well playing bots end as well
+DEFAULT_MAX_TIME = 10 * 60 * 1000
+PERCENTILES = [10, 50, 90]
+
+# Levels of the worker process, loaded once per process
+_levels: {int: Level} = {}
+
+
+# ----- Methods ------
+def init_worker(levels_filename: str) -> None:
+	"""Load the levels in the worker process."""
+	_levels.update({level.id: level for level in load_levels(levels_filename, False)})
+
+
+def run_game(level_id: int, seed: int, num_players: int, controller: str, max_time: float) -> {}:
+	"""Simulate a single game and return its results."""
+	level = _levels[level_id]
+	if controller == "random":
+		controllers = {idx: create_random_controller(seed * 4 + idx) for idx in range(num_players)}
+	elif controller == "bot":
+		controllers = {idx: BotController() for idx in range(num_players)}
+	else:
+		controllers = {idx: safe_controller for idx in range(num_players)}
+	sim = Simulation(level, num_players, seed, controllers)
+	game_time = sim.run(max_time)
+	scores = [snake.score for snake in sim.game.snakes]
+	if level.goal == utils.Goals.HIGHSCORE:
+		goal_reached = level.target is not None and sum(scores) >= level.target
+	else:
+		goal_reached = level.target is not None and game_time >= level.target * 1000
+	return {"time": game_time / 1000,
+			"crashed": bool(sim.game.crashes),
+			"scores": scores,
+			"goal_reached": goal_reached,
+			"crash_causes": [cause.name for _, cause in sim.game.crash_causes],
+			"pickups": Counter(obj.name for obj in sim.eaten_objects)}
+
+
+def get_distribution(values: [float]) -> {}:
+	"""Return mean, min, max and the percentiles of the given values."""
+	sorted_values = sorted(values)
+	distribution = {"mean": sum(sorted_values) / len(sorted_values), "min": sorted_values[0], "max": sorted_values[-1]}
+	distribution.update({f"p{percentile}": get_percentile(sorted_values, percentile) for percentile in PERCENTILES})
+	return distribution
+
+
+def aggregate(level: Level, results: [{}]) -> {}:
+	"""Aggregate the results of the games of one level."""
+	num_games = len(results)
+	crash_causes = Counter(cause for result in results for cause in result["crash_causes"])
+	pickups = sum((result["pickups"] for result in results), Counter())
+	return {"name": level.name,
+			"goal": level.goal.name,
+			"target": level.target,
+			"games": num_games,
+			"goal_reached": sum(result["goal_reached"] for result in results) / num_games,
+			"timed_out": sum(not result["crashed"] for result in results) / num_games,
+			"survival_time": get_distribution([result["time"] for result in results]),
+			"total_score": get_distribution([sum(result["scores"]) for result in results]),
+			"crash_causes": {cause.name: crash_causes[cause.name] / max(sum(crash_causes.values()), 1) for cause in utils.CrashCause},
+			"pickups_per_minute": {obj.name: pickups[obj.name] / max(sum(result["time"] for result in results) / 60, 1e-9) for obj in utils.Eatable}}
+
+
+def format_report(report: {}) -> str:
+	"""Return the aggregated results as a table."""
+	causes = [cause.name for cause in utils.CrashCause]
+	items = [obj.name for obj in utils.Eatable]
+	lines = [f"{'level':<22}{'goal':>10}{'reached':>8}{'time p10/p50/p90':>20}{'score p10/p50/p90':>20}  " + " ".join(f"{cause[:5]:>5}" for cause in causes) + "  "
+			 + " ".join(f"{item[:5]:>5}" for item in items)]
+	for stats in report.values():
+		time_stats, score_stats = stats["survival_time"], stats["total_score"]
+		lines.append(f"{stats['name'][:21]:<22}{stats['goal'][:10]:>10}{stats['goal_reached']:8.0%}{time_stats['p10']:7.0f}{time_stats['p50']:7.0f}{time_stats['p90']:6.0f}"
+					 f"{score_stats['p10']:7.0f}{score_stats['p50']:7.0f}{score_stats['p90']:6.0f}  " + " ".join(f"{stats['crash_causes'][cause]:5.0%}" for cause in causes) + "  "
+					 + " ".join(f"{stats['pickups_per_minute'][item]:5.1f}" for item in items))
+	lines.append("Crash causes as share of all crashes, pickups per minute of game time.")
+	return "\n".join(lines)
+
+
+def main():
+	parser = argparse.ArgumentParser(description="Simulate many games per level with bots and print statistics for balancing the levels.")
+	parser.add_argument("levels", nargs="*", type=int, help="The ids of the levels to simulate (default: all)")
+	parser.add_argument("--games", type=int, default=100, help="The number of games per level")
+	parser.add_argument("--players", type=int, default=2, choices=range(1, 5), help="The number of snakes")
+	parser.add_argument("--controller", default="random", choices=CONTROLLERS, help="The bot controlling the snakes")
+	parser.add_argument("--seed", type=int, default=0, help="The seed of the first game (the games use consecutive seeds)")
+	parser.add_argument("--max-time", type=float, default=DEFAULT_MAX_TIME / 1000, help="Time limit for each game (in seconds of game time)")
+	parser.add_argument("--workers", type=int, default=os.cpu_count(), help="The number of processes")
+	parser.add_argument("--levels-file", default=FILENAME_LEVEL_INFO, help="The level json file")
+	parser.add_argument("--output", help="Also write the aggregated results to this json file")
+	args = parser.parse_args()
+	levels = {level.id: level for level in load_levels(args.levels_file, False)}
+	for level_id in args.levels:
+		if level_id not in levels:
+			parser.error(f"unknown level {level_id}")
+	level_ids = args.levels or list(levels)
+	start = time.perf_counter()
+	with ProcessPoolExecutor(args.workers, initializer=init_worker, initargs=(args.levels_file,)) as executor:
+		futures = {level_id: [executor.submit(run_game, level_id, args.seed + game_idx, args.players, args.controller, args.max_time * 1000) for game_idx in range(args.games)]
+				   for level_id in level_ids}
+		report = {level_id: aggregate(levels[level_id], [future.result() for future in level_futures]) for level_id, level_futures in futures.items()}
+	print(format_report(report))
+	print(f"{args.games * len(level_ids)} games in {time.perf_counter() - start:.1f} s on {args.workers} processes")
+	if args.output:
+		with open(args.output, "w") as file_output:
+			json.dump({"args": vars(args), "levels": report}, file_output, indent=2)
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,258 @@
+"""
+Benchmarks for the hot paths of the friendly snakes package. They run offscreen (SDL dummy drivers) with fixed seeds and print their results as json, so that
+the results of different commits can be compared (see --output and --compare). All times are in microseconds.
+Run from the src directory, e.g. "python benchmark.py update_snakes display --output before.json".
+"""
+
+# ----- Imports --------
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import argparse
+import json
+import platform
+import time
+import timeit
+import pygame
+import utils
+from game import Game
+from level import Level
+from profiler import get_percentile
+from simulation import Simulation, load_levels, safe_controller
+from bot import BotController
+from constants import *
+
+# ----- Constants ------
+DEFAULT_NUMBER = 200000
+SCREEN_SIZE = (1920, 1080)
+SNAKE_LENGTHS = [4, 16, 64, 256]
+NUM_MOVES = 200
+NUM_BOMBS = 100
+NUM_FRAMES = 300
+# Game time (in ms) per level for the bot benchmark
+BOT_GAME_TIME = 60 * 1000
+# Size of the generated arena for the display benchmark (with and without the camera)
+ARENA_SIZE = 200
+
+
+# ----- Methods ------
+def time_per_call(stmt, number: int) -> float:
+	"""Return the best time (in microseconds) per call of the given statement out of three runs."""
+	return min(timeit.repeat(stmt, number=number, repeat=3)) / number * 1e6
+
+
+def get_time_stats(times: [float]) -> {}:
+	"""Return mean, p50 and p99 (in microseconds) of the given times (in seconds)."""
+	sorted_times = sorted(time_ * 1e6 for time_ in times)
+	return {"mean": sum(sorted_times) / len(sorted_times), "p50": get_percentile(sorted_times, 50), "p99": get_percentile(sorted_times, 99)}
+
+
+def create_empty_level(num_rows: int, num_cols: int, snake_lengths: [int]) -> Level:
+	"""Return a level without walls and items, with the snakes lying in every other row and their heads pointing to the right."""
+	level = Level({"name": "Benchmark", "map": [",".join(["n"] * num_cols)] * num_rows, "item_rates": {"a": 1}})
+	level.start_pos = [[(1 + 2 * player_idx, length - body_idx) for body_idx in range(length)] for player_idx, length in enumerate(snake_lengths)]
+	return level
+
+
+def create_game(level: Level, seed: int = 0) -> Game:
+	"""Return a new game with as many snakes as the level has start positions."""
+	num_players = len(level.start_pos)
+	level.reset()
+	return Game(DEFAULT_SNAKE_NAMES[:num_players], DEFAULT_SNAKE_COLORS[:num_players], [dict(controls) for controls in DEFAULT_SNAKE_CONTROLS[:num_players]], level, seed)
+
+
+def bench_vectors(number: int = DEFAULT_NUMBER) -> {}:
+	"""Compare the generic tuple helpers with the specialized 2D position helpers and lookup tables."""
+	pos, next_pos, direction = (10, 20), (10, 21), ORIENT_RIGHT
+	neighbors = utils.get_neighbor_table(32, 32, ORIENTATIONS)
+	return {
+		"add_tuples": time_per_call(lambda: utils.add_tuples([pos, direction]), number),
+		"add_two_tuples": time_per_call(lambda: utils.add_two_tuples(pos, direction), number),
+		"add_positions": time_per_call(lambda: utils.add_positions(pos, direction), number),
+		"neighbor_table": time_per_call(lambda: neighbors[direction][pos[0] * 32 + pos[1]], number),
+		"subtract_tuples_int": time_per_call(lambda: utils.subtract_tuples_int(next_pos, pos), number),
+		"subtract_positions": time_per_call(lambda: utils.subtract_positions(next_pos, pos), number),
+		"body_part_generic": time_per_call(lambda: ROTATIONS_CORNER.get((utils.subtract_tuples_int(next_pos, pos), utils.subtract_tuples_int(next_pos, pos))), number),
+		"body_part_table": time_per_call(lambda: BODY_PART_ROTATIONS[(utils.subtract_positions(next_pos, pos), utils.subtract_positions(next_pos, pos))], number)
+	}
+
+
+def bench_update_snakes(snake_lengths: [int] = None, num_moves: int = NUM_MOVES) -> {}:
+	"""Time Game.update_snakes for 1 - 4 snakes of growing lengths, moving straight ahead over an empty map."""
+	results = {}
+	for length in snake_lengths or SNAKE_LENGTHS:
+		for num_snakes in range(1, 5):
+			game = create_game(create_empty_level(2 * num_snakes + 1, length + num_moves + 2, [length] * num_snakes))
+			snake_ids = list(range(num_snakes))
+			times = []
+			for _ in range(num_moves):
+				start = time.perf_counter()
+				game.update_snakes(snake_ids)
+				times.append(time.perf_counter() - start)
+			assert not game.crashes, "The snakes crashed during the benchmark"
+			results[f"{num_snakes}_snakes_len_{length}"] = get_time_stats(times)
+	return results
+
+
+def bench_update_counting(num_bombs: int = NUM_BOMBS) -> {}:
+	"""Time Game.update_counting with many bombs, whose countdowns are spread, so that explosions start and cool down all the time."""
+	side = int(num_bombs ** 0.5 + 0.5)
+	game = create_game(create_empty_level(3 * side + 6, 3 * side + 6, [4]))
+	# No item drops, only bombs and explosions
+	game.counters = {}
+	max_cntdwn = BOMB_CNTDWN * REOCC_PER_SEC
+	for idx in range(num_bombs):
+		# Leave enough room between the bombs (and to the snake), so that no explosion hits another bomb
+		pos = (5 + 3 * (idx // side), 2 + 3 * (idx % side))
+		game.level.set_object(pos, utils.Objects.BOMB)
+		game.bombs[pos] = (1 + idx % max_cntdwn, NO_ORIENTATION)
+	times = []
+	for _ in range(max_cntdwn + EXPLOSION_CNTDWN * REOCC_PER_SEC):
+		start = time.perf_counter()
+		game.update_counting()
+		times.append(time.perf_counter() - start)
+	assert not game.bombs and not game.explosions, "Not all bombs exploded during the benchmark"
+	return {f"{num_bombs}_bombs": get_time_stats(times)}
+
+
+def bench_display(num_frames: int = NUM_FRAMES) -> {}:
+	"""
+	Time Graphics.update_display per level (in dirty rect and in full redraw mode), while the snakes are driven by a simple controller. A generated arena of
+	ARENA_SIZE x ARENA_SIZE squares is timed with and without the camera.
+	"""
+	from graphics import Graphics
+	from generator import generate_level
+	main_surface = pygame.display.set_mode(SCREEN_SIZE)
+	results = {}
+	arena = generate_level(ARENA_SIZE, ARENA_SIZE, seed=0, name=f"arena_{ARENA_SIZE}x{ARENA_SIZE}", level_id=-1)
+	for level, camera in [(level, None) for level in load_levels()] + [(arena, True), (arena, False)]:
+		name = level.name + ("_camera" if camera else "_whole_map" if camera is not None else "")
+		results[name] = {}
+		for mode, dirty_rects in [("dirty", True), ("full", False)]:
+			graphics = Graphics(main_surface, level.num_rows, level.num_cols, dirty_rects, camera=camera)
+			sim = Simulation(level, seed=level.id, controllers={idx: safe_controller for idx in range(4)})
+			times = []
+			for frame in range(num_frames):
+				while sim.clock.get_next_event_time() <= frame * 1000 / FPS and sim.step():
+					pass
+				start = time.perf_counter()
+				graphics.update_display(*sim.game.get_infos_for_updating_display(), paused_time=0)
+				times.append(time.perf_counter() - start)
+			results[name][mode] = get_time_stats(times)
+	return results
+
+
+def bench_bots(max_time: float = BOT_GAME_TIME) -> {}:
+	"""Time the decisions of the bots per level, with four bots playing against each other."""
+	results = {}
+	for level in load_levels():
+		times = []
+
+		def create_timed_bot() -> callable:
+			bot = BotController()
+
+			def timed_bot(game: Game, snake) -> (int, int):
+				start = time.perf_counter()
+				orientation = bot(game, snake)
+				times.append(time.perf_counter() - start)
+				return orientation
+			return timed_bot
+
+		Simulation(level, seed=level.id, controllers={idx: create_timed_bot() for idx in range(4)}).run(max_time)
+		results[level.name] = get_time_stats(times)
+		results[level.name]["max"] = max(times) * 1e6
+	return results
+
+
+def bench_level() -> {}:
+	"""Time the construction and the reset of each level, and the loading of all levels from the level json file and from the level pack (without decoding the maps)."""
+	import tempfile
+	import levelpack
+	with open(FILENAME_LEVEL_INFO) as file_level_info:
+		levels_info = json.load(file_level_info)
+	results = {}
+	for level_info in levels_info:
+		level = Level(level_info)
+		results[level.name] = {"construct": time_per_call(lambda: Level(level_info), 50), "reset": time_per_call(level.reset, 1000)}
+	with tempfile.TemporaryDirectory() as tmp_dir:
+		pack_filename = os.path.join(tmp_dir, "levels.pack")
+		levelpack.compile_level_pack(FILENAME_LEVEL_INFO, pack_filename)
+		results["all_levels"] = {"json": time_per_call(lambda: levelpack.load_levels(FILENAME_LEVEL_INFO, None), 20),
+								 "pack": time_per_call(lambda: levelpack.load_levels(FILENAME_LEVEL_INFO, pack_filename), 20)}
+	return results
+
+
+def bench_menu() -> {}:
+	"""Time the construction of the start menu alone and of all three menus of the game (start, pause and game over menu), which share their images."""
+	try:
+		from menu import Menu
+	except ImportError as error:
+		return {"skipped": str(error)}
+	main_surface = pygame.display.set_mode(SCREEN_SIZE)
+	scaling_factor = main_surface.get_height() / BENCHMARK_HEIGHT
+	level_names = [level.name for level in load_levels()]
+	rect = pygame.Rect(utils.mult_tuple_to_int(MENU_TOPLEFT, scaling_factor), utils.mult_tuple_to_int(MENU_SIZE, scaling_factor))
+	bg_img = pygame.transform.scale(pygame.image.load(FILENAME_START_BG).convert_alpha(), main_surface.get_size())
+	lang = utils.Language.ENGLISH
+	highscores = [[] for _ in level_names]
+
+	def create_menus(all_menus: bool) -> None:
+		menus = [Menu(main_surface, rect, bg_img, scaling_factor, lang, TEXTS_BUTTON_START_MENU[lang], level_names, highscores, True, True)]
+		if all_menus:
+			menus.extend(Menu(main_surface, rect, None, scaling_factor, lang, texts[lang], level_names, highscores, False, False) for texts in [TEXTS_BUTTON_PAUSE_MENU, TEXTS_BUTTON_GAME_OVER_MENU])
+		# Release the images, so that every run loads them again
+		for menu in menus:
+			menu.release_assets()
+
+	return {"start_menu": time_per_call(lambda: create_menus(False), 5), "all_menus": time_per_call(lambda: create_menus(True), 5)}
+
+
+BENCHMARKS = {"vectors": bench_vectors, "update_snakes": bench_update_snakes, "update_counting": bench_update_counting, "display": bench_display, "bots": bench_bots, "level": bench_level, "menu": bench_menu}
+
+
+def flatten(results: {}, prefix: str = "") -> {str: float}:
+	"""Flatten the nested results to a dict with keys like "display/A Day In The Park/dirty/mean"."""
+	flat = {}
+	for k, v in results.items():
+		if isinstance(v, dict):
+			flat.update(flatten(v, f"{prefix}{k}/"))
+		elif isinstance(v, (int, float)):
+			flat[f"{prefix}{k}"] = v
+	return flat
+
+
+def compare(baseline: {}, results: {}) -> str:
+	"""Return a table comparing the results with the baseline results (a ratio below 1 means faster than the baseline)."""
+	flat_baseline = flatten(baseline["results"])
+	lines = [f"{'benchmark':<70}{'baseline':>12}{'current':>12}{'ratio':>8}"]
+	for key, value in flatten(results["results"]).items():
+		if flat_baseline.get(key):
+			lines.append(f"{key:<70}{flat_baseline[key]:12.2f}{value:12.2f}{value / flat_baseline[key]:8.2f}")
+	return "\n".join(lines)
+
+
+def main():
+	parser = argparse.ArgumentParser(description="Run benchmarks and print the results (in microseconds) as json.")
+	parser.add_argument("benchmarks", nargs="*", help=f"The benchmarks to run, out of {', '.join(BENCHMARKS)} (default: all)")
+	parser.add_argument("--output", help="Also write the results to this json file")
+	parser.add_argument("--compare", help="Compare the results with the results in this json file (as written with --output)")
+	args = parser.parse_args()
+	for name in args.benchmarks:
+		if name not in BENCHMARKS:
+			parser.error(f"unknown benchmark {name}")
+	pygame.init()
+	results = {"meta": {"python": platform.python_version(), "pygame": pygame.version.ver, "platform": platform.platform(), "time": time.strftime("%Y-%m-%d %H:%M:%S")},
+			   "results": {name: BENCHMARKS[name]() for name in args.benchmarks or BENCHMARKS}}
+	print(json.dumps(results, indent=2))
+	if args.output:
+		with open(args.output, "w") as file_output:
+			json.dump(results, file_output, indent=2)
+	if args.compare:
+		with open(args.compare) as file_baseline:
+			print(compare(json.load(file_baseline), results))
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,160 @@
+"""Module for computer controlled snakes in the friendly snakes package"""
+
+# ----- Imports --------
+import time
+from collections import deque
+from game import Game
+from snake import Snake
+from constants import *
+
+# ----- Constants ------
+# Objects a bot never moves onto
+IMPASSABLE = utils.Hurting | utils.MoveStopper
+
+
+# ----- Classes --------
+class BotController:
+	"""
+	Controller that drives a snake to the nearest eatable item. It finds its way with a breadth-first search over the squares that are free and safe, i.e. not
+	occupied by a snake, not hurting, not in the reach of a spitting fire and not in the blast radius of an explosion or of a bomb that is about to explode.
+	The path is kept and followed as long as it stays valid, and only searched again if it was blocked, its item is gone or after a number of moves.
+	Before each move, a bounded flood fill checks that the snake doesn't run into a dead end. Both searches stop when the time budget of the move is used up.
+	Like the controllers of the simulation, the bot is called with the game and its snake before each move of the snake and returns the orientation to take.
+	"""
+
+	def __init__(self, time_budget: float = BOT_TIME_BUDGET, replan_interval: int = BOT_REPLAN_INTERVAL):
+		"""
+		Initialize the bot.
+
+		:param time_budget: The maximum time (in ms) the bot may take for one move
+		:param replan_interval: The number of moves after which the path is searched again (to find items that dropped closer in the meantime)
+		"""
+		self.time_budget = time_budget / 1000
+		self.replan_interval = replan_interval
+		# The squares still to go on the planned path (the next one first) and the square of the targeted item
+		self.path: deque[(int, int)] = deque()
+		self.target = None
+		# Start with searching a path
+		self.moves_since_planning = replan_interval
+		self.deadline = 0.0
+		# The view of the current move: the squares occupied by snakes are looked up in the game's occupancy, except for the own tail if it moves away
+		# together with the head. The dangerous squares are kept in a small set of their own, so that no copy of the occupancy is needed.
+		self.occupancy: {(int, int): (int, int)} = {}
+		self.vacated_tail = None
+		self.dangers: {(int, int)} = set()
+
+	def __call__(self, game: Game, snake: Snake) -> (int, int):
+		"""Return the orientation the snake should take for its next move (or None to keep the current one)."""
+		start = time.perf_counter()
+		self.deadline = start + self.time_budget
+		self.occupancy = game.occupancy
+		self.vacated_tail = snake.pos[-1] if snake.is_growing == 0 else None
+		self.dangers = self.get_danger_squares(game, snake)
+		# If the last search didn't find an item, the next search only starts after the replan interval, so that the bot doesn't search the whole map on every move
+		if self.moves_since_planning >= self.replan_interval or (self.target is not None and not self.is_path_valid(game, snake)):
+			# The search may only use a share of the budget, the rest is kept for the dead end checks
+			self.deadline = start + self.time_budget * BOT_PLAN_SHARE
+			self.plan(game, snake)
+			self.deadline = start + self.time_budget
+		self.moves_since_planning += 1
+		if self.path and self.count_room(game, self.path[0], len(snake.pos), snake.head) >= len(snake.pos):
+			return utils.subtract_positions(self.path.popleft(), snake.head)
+		# No item reachable (in time) or the way to it is a dead end
+		self.path.clear()
+		if (orientation := self.get_roomiest_orientation(game, snake)) is None:
+			# All squares around the head are unsafe - take one that at least doesn't mean a certain crash
+			self.dangers = set()
+			orientation = self.get_roomiest_orientation(game, snake)
+		return orientation
+
+	@staticmethod
+	def get_danger_squares(game: Game, snake: Snake) -> {(int, int)}:
+		"""Return the squares that aren't occupied, but dangerous to move onto: fire, blast radii and possible head-on crashes."""
+		dangers = set()
+		for other in game.snakes:
+			dangers.update(other.spit_fire_posis)
+			if other is not snake:
+				# Avoid head-on crashes
+				dangers.add(game.level.get_neighbor(other.head, other.orientation))
+		for pos in game.explosions:
+			dangers.update(utils.get_area_squares(pos))
+		for pos, (cntdwn, _) in game.bombs.items():
+			if cntdwn <= BOT_BOMB_DANGER:
+				dangers.update(utils.get_area_squares(pos))
+		return dangers
+
+	def is_passable(self, game: Game, square: (int, int), excluded: (int, int) = None) -> bool:
+		"""
+		Return True if the snake may move onto the given square.
+
+		:param excluded: An additional square that counts as blocked (e.g. the current head)
+		"""
+		if square == excluded or square in self.dangers or (square in self.occupancy and square != self.vacated_tail):
+			return False
+		return game.level.is_on_map(square) and game.level.get_object(square) not in IMPASSABLE
+
+	def is_path_valid(self, game: Game, snake: Snake) -> bool:
+		"""Return True if the planned path still starts next to the head, is still free and still leads to an item."""
+		if not self.path or self.path[0] not in game.level.get_neighbors(snake.head):
+			return False
+		if game.level.get_object(self.target) not in utils.Eatable:
+			return False
+		return all(self.is_passable(game, square) for square in self.path)
+
+	def plan(self, game: Game, snake: Snake) -> None:
+		"""Search the path to the nearest item (breadth-first, within the time budget). If there is none, the path is left empty and the target is None."""
+		self.path.clear()
+		self.target = None
+		self.moves_since_planning = 0
+		parents = {snake.head: None}
+		queue = deque([snake.head])
+		num_visited = 0
+		while queue:
+			square = queue.popleft()
+			num_visited += 1
+			if num_visited % BOT_CHECK_INTERVAL == 0 and time.perf_counter() > self.deadline:
+				return
+			for neighbor in game.level.get_neighbors(square):
+				if neighbor in parents or not self.is_passable(game, neighbor):
+					continue
+				parents[neighbor] = square
+				if game.level.get_object(neighbor) in utils.Eatable:
+					self.target = neighbor
+					while neighbor != snake.head:
+						self.path.appendleft(neighbor)
+						neighbor = parents[neighbor]
+					return
+				queue.append(neighbor)
+
+	def count_room(self, game: Game, start: (int, int), limit: int, excluded: (int, int) = None) -> int:
+		"""
+		Return the number of squares reachable from the given square (incl. itself), counting only up to the given limit (or until the time budget is used up).
+
+		:param excluded: An additional square that counts as blocked (e.g. the current head, which stays blocked even if the snake's tail is on it)
+		"""
+		if not self.is_passable(game, start, excluded):
+			return 0
+		if time.perf_counter() > self.deadline:
+			# Out of time - only tell that the square is free
+			return 1
+		visited = {start}
+		queue = deque([start])
+		num_expanded = 0
+		while queue and len(visited) < limit:
+			num_expanded += 1
+			if num_expanded % BOT_CHECK_INTERVAL == 0 and time.perf_counter() > self.deadline:
+				break
+			for neighbor in game.level.get_neighbors(queue.popleft()):
+				if neighbor not in visited and self.is_passable(game, neighbor, excluded):
+					visited.add(neighbor)
+					queue.append(neighbor)
+		return len(visited)
+
+	def get_roomiest_orientation(self, game: Game, snake: Snake) -> (int, int):
+		"""Return the orientation leading to the most room (preferring the current orientation), or None if all squares around the head are blocked."""
+		best_orientation, best_room = None, 0
+		for orientation in [snake.orientation] + [orientation for orientation in ORIENTATIONS if orientation != snake.orientation]:
+			room = self.count_room(game, game.level.get_neighbor(snake.head, orientation), max(len(snake.pos), BOT_MIN_ROOM), snake.head)
+			if room > best_room:
+				best_orientation, best_room = orientation, room
+		return best_orientation
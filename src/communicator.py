@@ -1,19 +1,26 @@
 """Module for the communicator class in the friendly snakes package"""
 
 # ----- Imports --------
-import json
+import math
 from menu import Menu
 from game import Game
-from level import Level
 from graphics import Graphics
+from profiler import Profiler
+from replay import ReplayRecorder
+from scores import ScoreStore
+from bot import BotController
+from simulation import GameClock
 from constants import *
+import assets
+import levelpack
 import pygame
 
 pygame.init()
 
 # ----- Constants ------
-UPDATE_SNAKES = [pygame.event.custom_type() for _ in range(4)]
-REOCC_TIMER = pygame.event.custom_type()
+# Maximum time (in ms) the game catches up on in one frame. If the game fell further behind (e.g. after a stall of the window), the rest of the delay is
+# treated like a pause, so that the game slows down for a moment instead of making a long burst of moves.
+MAX_CATCH_UP_TIME = 100
 
 
 # ----- Classes --------
@@ -21,95 +28,136 @@ class Communicator:
     """Class for interacting between different parts of the game, e.g. start menu and game engine"""
 
     def __init__(self):
-        self.snake_names = ["Player 1", "Player 2", "Player 3", "Player 4"]
-        self.snake_colors = [GREEN, BLUE, CYAN, PINK]
-        self.snake_controls = [
-            {pygame.K_UP: ORIENT_UP, pygame.K_LEFT: ORIENT_LEFT, pygame.K_DOWN: ORIENT_DOWN, pygame.K_RIGHT: ORIENT_RIGHT},
-            {pygame.K_w: ORIENT_UP, pygame.K_a: ORIENT_LEFT, pygame.K_s: ORIENT_DOWN, pygame.K_d: ORIENT_RIGHT},
-            {pygame.K_KP8: ORIENT_UP, pygame.K_KP4: ORIENT_LEFT, pygame.K_KP5: ORIENT_DOWN, pygame.K_KP6: ORIENT_RIGHT},
-            {pygame.K_i: ORIENT_UP, pygame.K_j: ORIENT_LEFT, pygame.K_k: ORIENT_DOWN, pygame.K_l: ORIENT_RIGHT}]
+        self.snake_names = list(DEFAULT_SNAKE_NAMES)
+        self.snake_colors = list(DEFAULT_SNAKE_COLORS)
+        self.snake_controls = [dict(controls) for controls in DEFAULT_SNAKE_CONTROLS]
         self.snake_controls_all = []
         for controls in self.snake_controls:
             self.snake_controls_all.extend(controls.keys())
         self.num_players = 2
+        # Bots for the snakes not controlled by players (by snake index)
+        self.bots: {int: BotController} = {}
         self.main_surface = pygame.display.set_mode((0, 0))
         self.lang = utils.Language.ENGLISH
         self.level_idx = 0
         self.levels = []
-        self.levels_as_json = self.read_level_infos()
-        self.highscores = [level.highscore for level in self.levels]
+        self.read_level_infos()
+        # The level json file is only read. The scores of all games are kept in the score store, and highscores holds the top three of each level.
+        self.scores = ScoreStore()
+        self.scores.import_highscores(self.levels)
+        self.highscores = [self.scores.get_top_scores(level.id) for level in self.levels]
         self.level = self.levels[self.level_idx]
         self.bg_name = ""
         self.music_track_name = list(FILENAMES_MUSIC_TRACKS.keys())[0]
         utils.play_music_track(FILENAMES_MUSIC_TRACKS[self.music_track_name], 0.1)
         self.sound_volume = 1.0
         self.scaling_factor = self.main_surface.get_height() / BENCHMARK_HEIGHT
-        self.start_bg_img = pygame.transform.scale(pygame.image.load(FILENAME_START_BG).convert_alpha(), self.main_surface.get_size())
-        self.start_menu = Menu(self.main_surface,
-                               pygame.Rect(utils.mult_tuple_to_int(MENU_TOPLEFT, self.scaling_factor), utils.mult_tuple_to_int(MENU_SIZE, self.scaling_factor)),
-                               self.start_bg_img,
-                               self.scaling_factor,
-                               self.lang,
-                               TEXTS_BUTTON_START_MENU[self.lang],
-                               [level.name for level in self.levels],
-                               self.get_highscores_for_display(),
-                               True,
-                               True)
-        self.pause_menu = Menu(self.main_surface,
-                               pygame.Rect(utils.mult_tuple_to_int(MENU_TOPLEFT, self.scaling_factor), utils.mult_tuple_to_int(MENU_SIZE, self.scaling_factor)),
-                               None,
-                               self.scaling_factor,
-                               self.lang,
-                               TEXTS_BUTTON_PAUSE_MENU[self.lang],
-                               [level.name for level in self.levels],
-                               self.get_highscores_for_display(),
-                               False,
-                               False)
-        self.game_over_menu = Menu(self.main_surface,
-                                   pygame.Rect(utils.mult_tuple_to_int(MENU_TOPLEFT, self.scaling_factor), utils.mult_tuple_to_int(MENU_SIZE, self.scaling_factor)),
-                                   None,
-                                   self.scaling_factor,
-                                   self.lang,
-                                   TEXTS_BUTTON_GAME_OVER_MENU[self.lang],
-                                   [level.name for level in self.levels],
-                                   self.get_highscores_for_display(),
-                                   False,
-                                   False)
+        # Startup: Show the start screen as soon as possible. Everything needed for a game (images, animations, sounds) is loaded in the background while the
+        # start menu is built and used, and the pause and game over menus are only built when they are needed for the first time.
+        self.loader = assets.AssetLoader()
+        self.start_bg_img = self.loader.get_image(FILENAME_START_BG, self.main_surface.get_size())
         self.set_start_screen()
+        self.profiler = Profiler()
+        self.recorder = ReplayRecorder()
+        self.graphics = Graphics(self.main_surface, self.level.num_rows, self.level.num_cols, profiler=self.profiler, loader=self.loader)
+        for filename in list(FILENAMES_ITEM_SOUNDS.values()) + [FILENAME_CRASH_SOUND]:
+            self.loader.request("sound", filename)
+        self.item_sounds = {}
+        self.crash_sound = None
+        self.sounds_all = []
+        self.start_menu = self.create_menu(TEXTS_BUTTON_START_MENU[self.lang], self.start_bg_img, True, True)
+        self._pause_menu = None
+        self._game_over_menu = None
         self.init_start_menu()
         self.game: Game
-        self.graphics = Graphics(self.main_surface, self.level.num_rows, self.level.num_cols)
-        self.upd_snake_events = [pygame.event.Event(event_id, {"snake_idx": idx}) for idx, event_id in enumerate(UPDATE_SNAKES)]
-        self.reocc_event = pygame.event.Event(REOCC_TIMER, {"duration": REOCC_DUR})
-        self.item_sounds = {k: pygame.mixer.Sound(v) for k, v in FILENAMES_ITEM_SOUNDS.items()}
-        self.crash_sound = pygame.mixer.Sound(FILENAME_CRASH_SOUND)
-        self.sounds_all = list(self.item_sounds.values()) + [self.crash_sound]
+        # Schedules the snake moves and the reoccurring updates in game time, like in the simulation
+        self.game_clock: GameClock
         self.paused = False
         self.back_to_main_menu = False
         self.paused_time = 0
         self.clock = pygame.time.Clock()
 
+    @property
+    def pause_menu(self) -> Menu:
+        """The pause menu, built on first use."""
+        if self._pause_menu is None:
+            self._pause_menu = self.create_menu(TEXTS_BUTTON_PAUSE_MENU[self.lang])
+        return self._pause_menu
+
+    @property
+    def game_over_menu(self) -> Menu:
+        """The game over menu, built on first use."""
+        if self._game_over_menu is None:
+            self._game_over_menu = self.create_menu(TEXTS_BUTTON_GAME_OVER_MENU[self.lang])
+        return self._game_over_menu
+
+    def get_built_menus(self) -> [Menu]:
+        """Return all menus that have been built so far."""
+        return [menu for menu in [self.start_menu, self._pause_menu, self._game_over_menu] if menu is not None]
+
+    def release_menus(self) -> None:
+        """Release the assets of all built menus (see Menu.release_assets). The menus can't be used afterwards."""
+        for menu in self.get_built_menus():
+            menu.release_assets()
+        self._pause_menu = None
+        self._game_over_menu = None
+
+    def create_menu(self, button_texts: [str], bg_img: pygame.Surface = None, has_submenu_levels: bool = False, enable_controls_change: bool = False) -> Menu:
+        """Build a menu with the given buttons and bring it up to date with the current parameters."""
+        menu = Menu(self.main_surface,
+                    pygame.Rect(utils.mult_tuple_to_int(MENU_TOPLEFT, self.scaling_factor), utils.mult_tuple_to_int(MENU_SIZE, self.scaling_factor)),
+                    bg_img,
+                    self.scaling_factor,
+                    self.lang,
+                    button_texts,
+                    [level.name for level in self.levels],
+                    self.get_highscores_for_display(),
+                    has_submenu_levels,
+                    enable_controls_change)
+        # Menus built later have to reflect the changes made in the other menus so far
+        menu.set_level_in_submenu_highscore(self.level_idx)
+        menu.change_num_players(None, self.num_players)
+        menu.set_sound_volume(self.sound_volume)
+        menu.set_controls([list(controls.keys()) for controls in self.snake_controls])
+        menu.set_colors(self.snake_colors)
+        if self.bg_name:
+            menu.set_bg_value(self.bg_name)
+        menu.set_music_track_value(self.music_track_name)
+        return menu
+
+    def load_sounds(self) -> None:
+        """Fetch the sounds from the asset loader (if not done yet)."""
+        if self.crash_sound is None:
+            self.item_sounds = {k: self.loader.get_sound(v) for k, v in FILENAMES_ITEM_SOUNDS.items()}
+            self.crash_sound = self.loader.get_sound(FILENAME_CRASH_SOUND)
+            self.sounds_all = list(self.item_sounds.values()) + [self.crash_sound]
+            for sound in self.sounds_all:
+                sound.set_volume(self.sound_volume)
+
     def update_param_from_menu(self, menu: Menu) -> None:
         """Get the relevant infos from the given menu and update the internal parameters."""
         level_idx, num_players, new_sound_volume, new_controls, new_colors, new_bg_name, new_music_track_name = menu.get_infos()
         if level_idx is not None:
-            for menu in [self.start_menu, self.pause_menu, self.game_over_menu]:
+            for menu in self.get_built_menus():
                 menu.set_level_in_submenu_highscore(level_idx)
             self.level_idx = level_idx
             self.level = self.levels[self.level_idx]
+            if (self.level.num_rows, self.level.num_cols) != (self.graphics.num_rows, self.graphics.num_cols):
+                # The layout (square size, view and status surfaces) depends on the size of the map
+                self.graphics = Graphics(self.main_surface, self.level.num_rows, self.level.num_cols, profiler=self.profiler, loader=self.loader)
+                self.graphics.change_background(self.bg_name)
         if num_players:
-            for menu in [self.start_menu, self.pause_menu, self.game_over_menu]:
+            for menu in self.get_built_menus():
                 menu.change_num_players(None, num_players)
             self.num_players = num_players
-            self.upd_snake_events = [pygame.event.Event(event_id, {"snake_idx": idx}) for idx, event_id in enumerate(UPDATE_SNAKES[:self.num_players])]
         if new_sound_volume != self.sound_volume:
             for sound in self.sounds_all:
                 sound.set_volume(new_sound_volume)
-            for menu in [self.start_menu, self.pause_menu, self.game_over_menu]:
+            for menu in self.get_built_menus():
                 menu.set_sound_volume(new_sound_volume)
             self.sound_volume = new_sound_volume
         if new_controls != self.snake_controls:
-            for menu in [self.start_menu, self.pause_menu, self.game_over_menu]:
+            for menu in self.get_built_menus():
                 menu.set_controls(new_controls)
             orientations = [ORIENT_UP, ORIENT_LEFT, ORIENT_DOWN, ORIENT_RIGHT]
             self.snake_controls = [{key: ori for key, ori in zip(controls, orientations)} for controls in new_controls]
@@ -117,16 +165,16 @@ class Communicator:
             for controls in self.snake_controls:
                 self.snake_controls_all.extend(controls.keys())
         if new_colors != self.snake_colors:
-            for menu in [self.start_menu, self.pause_menu, self.game_over_menu]:
+            for menu in self.get_built_menus():
                 menu.set_colors(new_colors)
             self.snake_colors = new_colors
         if self.bg_name != new_bg_name:
-            for menu in [self.start_menu, self.pause_menu, self.game_over_menu]:
+            for menu in self.get_built_menus():
                 menu.set_bg_value(new_bg_name)
                 self.bg_name = new_bg_name
             self.graphics.change_background(new_bg_name)
         if self.music_track_name != new_music_track_name:
-            for menu in [self.start_menu, self.pause_menu, self.game_over_menu]:
+            for menu in self.get_built_menus():
                 menu.set_music_track_value(new_music_track_name)
             self.music_track_name = new_music_track_name
 
@@ -138,20 +186,16 @@ class Communicator:
         self.main_surface.blit(msg_rendered, msg_rendered.get_rect(center=(self.main_surface.get_rect().centerx, 0.95 * self.main_surface.get_height())))
         pygame.display.update()
 
-    def read_level_infos(self) -> {}:
-        """Return the level infos from the json file."""
-        with (open(FILENAME_LEVEL_INFO)) as file_level_info:
-            level_infos = json.load(file_level_info)
-        for level_info in level_infos:
-            self.levels.append(Level(level_info))
-        return level_infos
+    def read_level_infos(self) -> None:
+        """Read the levels from the level pack (compiled from the level json file if needed). The map of a level is only decoded when it's played."""
+        self.levels = levelpack.load_levels()
 
     def init_start_menu(self) -> None:
         """Initialize the start menu after the user pressed a key."""
         # Wait for user pressing key
         key_pressed = False
         while not key_pressed:
-            for event in pygame.event.get():
+            for event in utils.wait_for_events():
                 if event.type == pygame.KEYUP or event.type == pygame.MOUSEBUTTONUP:
                     key_pressed = True
         self.start_menu.slide_in()
@@ -160,29 +204,36 @@ class Communicator:
         """Start the execution"""
         cnt = 0
         while self.start_menu.handle_events():
+            self.load_sounds()
             self.update_param_from_menu(self.start_menu)
             # # Show Map - only relevant for taking screenshots of a map to use it for the preview images in the level selection screen
             # return self.show_map()
-            self.game = Game(self.snake_names[:self.num_players], self.snake_colors[:self.num_players], self.snake_controls[:self.num_players], self.level)
+            num_snakes = self.get_num_snakes()
+            self.game = Game(self.snake_names[:num_snakes], self.snake_colors[:num_snakes], self.snake_controls[:num_snakes], self.level)
+            self.bots = {idx: BotController() for idx in range(self.num_players, num_snakes)}
             if cnt > 0:
                 self.reset()
+            else:
+                self.recorder.start(self.game)
+                self.game_clock = GameClock([snake.speed for snake in self.game.snakes])
             self.start_game()
+            self.recorder.stop()
             self.start_menu.reset()
             cnt += 1
-        # User ended game - save highscores to json file
-        self.save_highscores_to_file()
+        # User ended game - write the remaining scores and give back the shared assets
+        self.scores.close()
+        self.loader.shutdown()
+        self.release_menus()
 
     def start_game(self):
         """Start or resume the game"""
         self.paused_time = pygame.time.get_ticks()
         while not self.back_to_main_menu:
             self.game_loop()
-        self.reset_timer(True)
 
     def pause_game(self) -> bool:
         """Pause the game. Return True if user wants to resume and False for exit."""
         pause_start_time = pygame.time.get_ticks()
-        self.reset_timer(True)
         self.pause_menu.reset()
         # Use current state as the background for the pause menu
         self.pause_menu.bg_img = self.main_surface.copy()
@@ -202,6 +253,7 @@ class Communicator:
         self.game_over_menu.bg_img = self.main_surface.copy()
         score = sum([snake.score for snake in self.game.snakes]) if self.level.goal == utils.Goals.HIGHSCORE else int((pygame.time.get_ticks() - self.paused_time) / 1000)
         cur_high = self.highscores[self.level_idx]
+        team_name = None
         if len(cur_high) < 3 or score > cur_high[2][1]:
             # New highscore
             self.game_over_menu.mini_menu_new_highscore.enable()
@@ -211,9 +263,11 @@ class Communicator:
             while len(cur_high) > place and score <= cur_high[place][1]:
                 place += 1
             self.highscores[self.level_idx] = cur_high[:place] + [(team_name, score)] + cur_high[place:2]
-            for menu in [self.start_menu, self.pause_menu, self.game_over_menu]:
+            for menu in self.get_built_menus():
                 menu.set_highscore(self.level_idx, self.get_highscore_for_display_for_single_level(self.level_idx))
             self.game_over_menu.mini_menu_new_highscore.disable()
+        # Every game is stored (the team name only for highscores). The score is written in the background, so this doesn't wait for the disk.
+        self.scores.add_score(self.level.id, score, team_name, self.num_players)
         if play_again := self.game_over_menu.handle_events():
             self.reset()
         else:
@@ -224,23 +278,70 @@ class Communicator:
     def reset(self) -> None:
         """Reset the game so that it can be played again"""
         self.game.reset()
+        self.recorder.start(self.game)
+        self.game_clock = GameClock([snake.speed for snake in self.game.snakes])
         self.paused = False
         self.back_to_main_menu = False
         self.paused_time = pygame.time.get_ticks()
 
-    def reset_timer(self, deactivate=False):
+    def get_num_snakes(self) -> int:
+        """Return the number of snakes in the game, i.e. the number of players plus the bots (if the free snakes are filled up with bots)."""
+        return 4 if BOT_FILL_UP else self.num_players
+
+    def get_game_time(self) -> int:
+        """Return the time (in ms) since the game started, without the pauses."""
+        return pygame.time.get_ticks() - self.paused_time
+
+    def get_time_until_next_change(self) -> int:
         """
-        Reset the timer for the reoccurring events.
+        Return the time (in ms) until the screen changes next without any input, i.e. until the next scheduled event (so the frame rate follows the fastest
+        snake) or the next second of the displayed game time. The profiler overlay is updated every frame.
+        """
+        if self.profiler.enabled:
+            return 0
+        game_time = self.get_game_time()
+        next_change = min(self.game_clock.get_next_event_time(), (game_time // 1000 + 1) * 1000)
+        return max(math.ceil(next_change - game_time), 0)
 
-        :param deactivate: If set to True, all reoccurring events will be deactivated.
+    def update_game(self) -> None:
+        """
+        Process all scheduled events (snake moves and reoccurring updates) that are due by the current game time, in the order of their scheduled times. The
+        events are scheduled in exact game time (without rounding the intervals to whole ms), so the speed of the snakes doesn't depend on the frame rate,
+        and snakes due at the same time are moved together.
         """
-        for snake in self.game.snakes:
-            pygame.time.set_timer(self.upd_snake_events[snake.idx], 0 if deactivate else int(1000 / snake.speed))
-        pygame.time.set_timer(self.reocc_event, 0 if deactivate else REOCC_DUR)
+        game_time = self.get_game_time()
+        if (delay := game_time - self.game_clock.get_next_event_time()) > MAX_CATCH_UP_TIME:
+            # Too far behind - skip the delay beyond the catch-up limit
+            self.paused_time += int(delay - MAX_CATCH_UP_TIME)
+            game_time = self.get_game_time()
+        while self.game_clock.get_next_event_time() <= game_time and not self.game.crashes:
+            reocc_due, snake_ids = self.game_clock.pop_next_events()
+            if reocc_due:
+                # Update all counting elements
+                self.recorder.record_count(self.game_clock.time)
+                with self.profiler.measure("update_counting"):
+                    new_objs = self.game.update_counting()
+                self.play_sounds(new_objs)
+            if snake_ids:
+                # Let the bots decide on the orientation of their snakes before they move
+                if bot_ids := [_id for _id in snake_ids if _id in self.bots]:
+                    with self.profiler.measure("bots"):
+                        for _id in bot_ids:
+                            snake = self.game.snakes[_id]
+                            if (orientation := self.bots[_id](self.game, snake)) is not None and (key := snake.get_key_for_orientation(orientation)) is not None:
+                                self.recorder.record_key(self.game_clock.time, key)
+                                self.game.update_snake_orientation(key)
+                # Update position of snakes
+                self.recorder.record_move(self.game_clock.time, snake_ids)
+                with self.profiler.measure("update_snakes"):
+                    items = self.game.update_snakes(snake_ids)
+                self.play_sounds(items)
+                for _id in snake_ids:
+                    self.game_clock.schedule_move(_id, self.game.snakes[_id].speed)
 
     def game_loop(self) -> None:
         """Main game loop"""
-        self.reset_timer()
+        self.graphics.invalidate()
         self.graphics.update_display(*self.game.get_infos_for_updating_display(), paused_time=self.paused_time)
         # Let user press a key to decide when to start
         cur_time = pygame.time.get_ticks()
@@ -250,42 +351,42 @@ class Communicator:
         pygame.display.update()
         key_pressed = False
         while not key_pressed:
-            for event in pygame.event.get():
+            for event in utils.wait_for_events():
                 if event.type == pygame.KEYUP:
                     key_pressed = True
         self.paused_time += (pygame.time.get_ticks() - cur_time)
+        # The start message was drawn onto the map, so the next frame has to be drawn completely
+        self.graphics.invalidate()
         # Start game loop
         crashed = False
         while not self.paused and not self.back_to_main_menu and not crashed:
-            snake_ids_to_update = []
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    # Quit
-                    self.back_to_main_menu = True
-                elif event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
-                    # Pause the game
-                    self.paused = True
-                elif event.type == pygame.KEYDOWN and event.key in self.snake_controls_all and not crashed:
-                    # Update orientation of snake
-                    self.game.update_snake_orientation(event.key)
-                elif event.type in UPDATE_SNAKES and not crashed:
-                    # Update position of snake (only add to list here, real updating is done later)
-                    snake_ids_to_update.append(event.snake_idx)
-                elif event.type == REOCC_TIMER and not crashed:
-                    # Update all counting elements
-                    new_objs = self.game.update_counting()
-                    self.play_sounds(new_objs)
-            # Update position of snakes
-            if snake_ids_to_update:
-                items = self.game.update_snakes(snake_ids_to_update)
-                self.play_sounds(items)
-                for _id in snake_ids_to_update:
-                    pygame.time.set_timer(self.upd_snake_events[_id], int(1000 / self.game.snakes[_id].speed))
+            # Sleep until the screen changes next or there is input (not measured by the profiler, as it isn't part of the frame)
+            timeout = self.get_time_until_next_change()
+            events = utils.wait_for_events(timeout) if timeout > 0 else pygame.event.get()
+            self.profiler.begin_frame()
+            with self.profiler.measure("events"):
+                for event in events:
+                    if event.type == pygame.QUIT:
+                        # Quit
+                        self.back_to_main_menu = True
+                    elif event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
+                        # Pause the game
+                        self.paused = True
+                    elif event.type == pygame.KEYDOWN and event.key == PROFILER_KEY:
+                        # Switch the profiler (and its overlay) on or off
+                        self.profiler.toggle()
+                    elif event.type == pygame.KEYDOWN and event.key in self.snake_controls_all and not crashed:
+                        # Update orientation of snake (recorded with the time of the last processed event, so that the replay keeps the order of the calls)
+                        self.recorder.record_key(self.game_clock.time, event.key)
+                        self.game.update_snake_orientation(event.key)
+            # Run the game up to the current game time. Drawing is independent of it, so a slow frame delays the moves but doesn't change the speed of the game.
+            self.update_game()
             # Update display
             self.graphics.update_display(*self.game.get_infos_for_updating_display(), paused_time=self.paused_time)
             if self.game.crashes and not crashed:
                 self.crash_sound.play()
                 crashed = True
+            self.profiler.end_frame()
             self.clock.tick(FPS)
         if crashed:
             self.stop_item_sounds()
@@ -312,14 +413,6 @@ class Communicator:
         """Return the highscore for a single level in displayable format, i.e. for time-levels, change the score to a time format"""
         return [(name, str(score) if self.levels[level_idx].goal == utils.Goals.HIGHSCORE else utils.get_time_string_for_ms(score * 1000)) for (name, score) in self.highscores[level_idx]]
 
-    def save_highscores_to_file(self) -> None:
-        """Save the current highscores to the levels.json file"""
-        for level_json, highscore in zip(self.levels_as_json, self.highscores):
-            assert "highscore" in level_json, "Missing 'highscore' tag in level json dict."
-            level_json["highscore"] = highscore
-        with (open(FILENAME_LEVEL_INFO, "w")) as file_level_info:
-            json.dump(self.levels_as_json, file_level_info)
-
     def show_map(self) -> None:
         """Show the map without any snakes."""
         is_running = True
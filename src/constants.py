@@ -1,6 +1,7 @@
 """A module for global constants used across the friendly snakes package"""
 
 import utils
+import pygame
 from enum import Enum
 
 
@@ -36,10 +37,22 @@ ROTATIONS_CORNER = {(ORIENT_DOWN, ORIENT_LEFT): 90, (ORIENT_LEFT, ORIENT_DOWN):
 					(ORIENT_DOWN, ORIENT_RIGHT): 0, (ORIENT_RIGHT, ORIENT_DOWN): 180,
 					(ORIENT_UP, ORIENT_LEFT): 180, (ORIENT_LEFT, ORIENT_UP): 0,
 					(ORIENT_UP, ORIENT_RIGHT): 270, (ORIENT_RIGHT, ORIENT_UP): 90}
+ORIENTATIONS = (ORIENT_UP, ORIENT_DOWN, ORIENT_LEFT, ORIENT_RIGHT)
+# (orientation to the front part, orientation to the back part) -> (snake part idx, rotation) for all body parts
+BODY_PART_ROTATIONS = {(front, back): (utils.SnakeParts.BODY_STRAIGHT.value, ROTATIONS_STRAIGHT[front]) if front == back else (utils.SnakeParts.BODY_CORNER.value, ROTATIONS_CORNER[(front, back)])
+					   for front in ORIENTATIONS for back in ORIENTATIONS if front == back or (front, back) in ROTATIONS_CORNER}
+DEFAULT_SNAKE_NAMES = ["Player 1", "Player 2", "Player 3", "Player 4"]
+DEFAULT_SNAKE_COLORS = [GREEN, BLUE, CYAN, PINK]
+DEFAULT_SNAKE_CONTROLS = [{pygame.K_UP: ORIENT_UP, pygame.K_LEFT: ORIENT_LEFT, pygame.K_DOWN: ORIENT_DOWN, pygame.K_RIGHT: ORIENT_RIGHT},
+						  {pygame.K_w: ORIENT_UP, pygame.K_a: ORIENT_LEFT, pygame.K_s: ORIENT_DOWN, pygame.K_d: ORIENT_RIGHT},
+						  {pygame.K_KP8: ORIENT_UP, pygame.K_KP4: ORIENT_LEFT, pygame.K_KP5: ORIENT_DOWN, pygame.K_KP6: ORIENT_RIGHT},
+						  {pygame.K_i: ORIENT_UP, pygame.K_j: ORIENT_LEFT, pygame.K_k: ORIENT_DOWN, pygame.K_l: ORIENT_RIGHT}]
 # MIN_SNAKE_SIZE = 4
 MIN_SNAKE_SPEED = 1
 MAX_SNAKE_SPEED = 1000
 FPS = 60
+# Menus without input are redrawn at least this often (in ms), e.g. for the blinking cursor of text inputs
+MENU_IDLE_REDRAW_INTERVAL = 250
 DROP_ITEM_RATE = 5
 BOMB_CNTDWN = 9
 EXPLOSION_CNTDWN = 2
@@ -71,6 +84,45 @@ FILENAME_SPEEDO = "../res/speedo.png"
 FILENAMES_GAME_BGS_WITH_SCORE_COLORS = {"Desert": ("../res/bg_desert.png", BG_COLOR), "Forest": ("../res/forest.png", BG_COLOR), "Underwater": ("../res/underwater.jpg", BLUE),
 										"Space": ("../res/space.png", BG_COLOR), "Sky": ("../res/sunny.png", BLUE), "Night": ("../res/full_moon.png", BG_COLOR)}
 FILENAME_LEVEL_INFO = "../res/levels.json"
+# Compiled level pack (built from the level json file, see levelpack.py)
+FILENAME_LEVEL_PACK = "../cache/levels.pack"
+# SQLite database with the scores of all played games
+FILENAME_SCORES_DB = "../scores.db"
+# Directory for the preprocessed (decoded and scaled) images, one subdirectory per screen resolution. Set to None to disable the cache.
+ASSET_CACHE_DIR = "../cache"
+# Directory for the replays of the played games (one file per game, see replay.py). Set to None to disable recording.
+REPLAY_DIR = "../replays"
+DIRTY_RECT_RENDERING = True
+TEXT_CACHE_SIZE = 256
+USE_ARRAY_GRID = False
+
+# --- Profiling ---
+PROFILER_KEY = pygame.K_F3
+PROFILER_WINDOW = 300
+PROFILER_OVERLAY_INTERVAL = 30
+FILENAME_PROFILER_CSV = "../profiler.csv"
+
+# --- Bots ---
+# If True, the snakes not taken by players are controlled by bots, so that there are always four snakes
+BOT_FILL_UP = False
+# Maximum time (in ms) a bot may take for deciding on one move
+BOT_TIME_BUDGET = 1.0
+# Share of the time budget a bot may use for searching its path (the rest is kept for checking for dead ends)
+BOT_PLAN_SHARE = 0.6
+# Number of moves after which a bot searches its path again
+BOT_REPLAN_INTERVAL = 8
+# Bots avoid the blast radius of bombs with at most this countdown (in REOCC_DUR steps)
+BOT_BOMB_DANGER = 2 * REOCC_PER_SEC
+# Minimum number of free squares a bot wants to have in front of it when it has no item to go for
+BOT_MIN_ROOM = 16
+# Number of searched squares after which the time budget is checked
+BOT_CHECK_INTERVAL = 32
+
+# --- Network ---
+NETWORK_HOST = "127.0.0.1"
+NETWORK_PORT = 50117
+# Clients with more unsent data (in bytes) are dropped by the server, so that a slow client doesn't hold up the game
+NETWORK_MAX_BUFFER = 256 * 1024
 
 # --- Graphics Menu ---
 FILENAME_START_BG = "../res/menu_bg.png"
@@ -105,7 +157,13 @@ BENCHMARK_HEIGHT = 1440
 SNAKE_NAME_FONT_SIZE = 40
 SNAKE_INFO_FONT_SIZE = 40
 SCORE_FONT_SIZE = 40
+PROFILER_FONT_SIZE = 28
 MAP_TO_SCREEN_RATIO = 0.9
+# Maps whose squares would be smaller than CAMERA_MIN_EDGE_SIZE are shown with squares of CAMERA_EDGE_SIZE in a view that follows the snakes. The view moves
+# when the snakes come closer than CAMERA_MARGIN squares to its edge.
+CAMERA_MIN_EDGE_SIZE = 24
+CAMERA_EDGE_SIZE = 48
+CAMERA_MARGIN = 5
 MENU_TOPLEFT = (0, 300)
 MENU_SIZE = (670, 705)
 BUTTON_AREA_START = (36, 267)
@@ -2,14 +2,10 @@
 
 # ----- Imports --------
 import copy
-import itertools
 import random
 from snake import Snake
 from level import Level
 from constants import *
-import pygame
-
-pygame.init()
 
 # ----- Constants ------
 
@@ -18,13 +14,23 @@ pygame.init()
 class Game:
 	"""The main game class"""
 
-	def __init__(self, player_names: [str], player_colors: [(int, int, int)], player_controls: [{}], level: Level):
+	def __init__(self, player_names: [str], player_colors: [(int, int, int)], player_controls: [{}], level: Level, seed: int = None):
 		self.level = level
+		# All random decisions of the game are taken by its own random generator, so that a game is reproducible from its seed and inputs
+		self.seed = seed if seed is not None else random.randrange(2 ** 32)
+		self.rng = random.Random(self.seed)
 		self.snakes = [Snake(name, idx, color, controls) for idx, (name, color, controls) in enumerate(zip(player_names, player_colors, player_controls))]
 		self.init_snake_pos()
+		# occupancy maps every square occupied by a snake to a tuple (snake idx, segment sequence number). A snake's head gets a new sequence number with every move, so the
+		# other segments don't have to be updated when the snake moves. The segment index is the difference between the head's and the segment's sequence number (see get_occupant).
+		self.head_seqs = [0] * len(self.snakes)
+		self.occupancy: {(int, int): (int, int)} = {pos: (snake.idx, -segment_idx) for snake in self.snakes for segment_idx, pos in enumerate(snake.pos)}
 		# crashes is a list of tuples of positions. For each crash that occurred, it holds the coordinates of the two squares between which the crash happened
 		self.crashes: [((int, int), (int, int))] = []
-		self.free_squares = set([(i, j) for i, row in enumerate(level.map) for j, obj in enumerate(row) if obj == utils.Objects.NONE]) - set([pos for snake in self.snakes for pos in snake.pos])
+		# crash_causes holds a tuple (snake idx, cause) for each entry in crashes
+		self.crash_causes: [(int, utils.CrashCause)] = []
+		# free_squares holds all empty squares that are not occupied by a snake, i.e. the squares where new items can be dropped
+		self.free_squares = utils.SquarePool(level.get_free_squares([pos for snake in self.snakes for pos in snake.pos]))
 		self.passed_reoccs = 0
 		# counters is a dict tracking the game elements that needs to be updated every second. Its keys are tuples of type (utils.Cntable, int), where the former shows the kind of element and the latter the additional index
 		# corresponding to that kind of element (e.g. (utils.Cntable.BOMB, 0) would refer to bomb #0 in the bombs list. If no additional index is needed, None is used for the latter.
@@ -35,7 +41,7 @@ class Game:
 		self.explosions: {(int, int): int} = {}
 
 	def reset(self) -> None:
-		"""Reset the game to its initial state"""
+		"""Reset the game to its initial state (with a new seed)"""
 		names, colors, controls = [], [], []
 		for snake in self.snakes:
 			snake.reset()
@@ -70,62 +76,77 @@ class Game:
 		:return: List of objects that have been eaten
 		"""
 		snakes_to_upd = [self.snakes[idx] for idx in snake_ids_to_upd]
-		new_posis = []
-		remaining_posis = [snake.pos for snake in self.snakes if snake not in snakes_to_upd]
+		new_heads = []
 		new_spit_fire_posis = []
 		rem_spit_fire_posis = [snake.spit_fire_posis for snake in self.snakes if snake not in snakes_to_upd]
 		objects = []
-		# Update snake positions locally and check for collisions with obstacles
+		# Determine the new heads and check for collisions with obstacles
 		for snake in snakes_to_upd:
-			new_square = utils.add_tuples([snake.head, snake.orientation])
-			obj_at_new_pos = self.level.map[new_square[0]][new_square[1]]
+			new_square = self.level.get_neighbor(snake.head, snake.orientation)
+			obj_at_new_pos = self.level.get_object(new_square)
 			match obj_at_new_pos:
 				case obj if obj in utils.Hurting:
-					self.crashes.append((snake.head, new_square))
+					self.add_crash((snake.head, new_square), snake.idx, utils.CrashCause.WALL if obj == utils.Objects.WALL else utils.CrashCause.EXPLOSION)
 				case item if item in utils.Speeding:
 					snake.adjust_speed(SPEEDING_SUMMANDS[item])
-					self.level.map[new_square[0]][new_square[1]] = utils.Objects.NONE
+					self.level.set_object(new_square, utils.Objects.NONE)
 				case item if item in utils.Growing:
 					snake.grow(GROWING_SIZES[item])
-					self.level.map[new_square[0]][new_square[1]] = utils.Objects.NONE
+					self.level.set_object(new_square, utils.Objects.NONE)
 				case utils.Objects.BOMB:
 					self.bombs[new_square] = (self.bombs[new_square][0], snake.orientation)
 					hit_stopper = self.move_bomb(new_square)
 					if hit_stopper:
-						self.crashes.append((snake.head, new_square))
+						self.add_crash((snake.head, new_square), snake.idx, utils.CrashCause.BOMB)
 				case utils.Objects.BEER:
 					snake.get_drunk()
-					self.level.map[new_square[0]][new_square[1]] = utils.Objects.NONE
+					self.level.set_object(new_square, utils.Objects.NONE)
 				case utils.Objects.CHILI:
 					snake.get_piquant()
-					self.level.map[new_square[0]][new_square[1]] = utils.Objects.NONE
+					self.level.set_object(new_square, utils.Objects.NONE)
 				case _:
 					pass
 			objects.append(obj_at_new_pos)
-			new_snake_pos = [new_square] + (snake.pos if snake.is_growing > 0 else snake.pos[:-1])
-			new_posis.append(new_snake_pos)
+			new_heads.append(new_square)
 			if snake.spits_fire:
-				new_spit_fire_posis.append(utils.get_spit_fire_squares(new_snake_pos[0], utils.subtract_tuples(new_snake_pos[0], new_snake_pos[1]), SPIT_FIRE_RANGE, self.level.map))
+				new_spit_fire_posis.append(self.level.get_spit_fire_squares(new_square, snake.orientation, SPIT_FIRE_RANGE))
 			else:
 				new_spit_fire_posis.append([])
-		# Check for crashes with same snake
-		self.crashes.extend([(new_pos[1], new_pos[0]) for new_pos in new_posis if new_pos[0] in new_pos[1:]])
-		# Check for crashes with other snakes
-		self.crashes.extend([(new_pos[1], new_pos[0]) for new_pos, other_pos in itertools.product(new_posis, new_posis + remaining_posis) if new_pos != other_pos and new_pos[0] in other_pos])
+		# Check for crashes with the same or other snakes. A head may only move onto an occupied square if that square is the tail of a snake that moves (and doesn't grow) in this update.
+		vacated_tails = {snake.pos[-1] for snake in snakes_to_upd if snake.is_growing == 0}
+		for snake, new_head in zip(snakes_to_upd, new_heads):
+			if new_head in self.occupancy and new_head not in vacated_tails:
+				self.add_crash((snake.head, new_head), snake.idx, utils.CrashCause.SELF if self.occupancy[new_head][0] == snake.idx else utils.CrashCause.OTHER)
+			elif new_heads.count(new_head) > 1:
+				self.add_crash((snake.head, new_head), snake.idx, utils.CrashCause.OTHER)
 		# Check for crashes by snakes running into explosions
-		exploding_squares = [(row - 1 + i, col - 1 + j) for (row, col) in self.explosions for i in range(3) for j in range(3)]
-		self.crashes.extend([(new_pos[1], new_pos[0]) for new_pos in new_posis if new_pos[0] in exploding_squares])
+		exploding_squares = {square for pos in self.explosions for square in utils.get_area_squares(pos)}
+		for snake, new_head in zip(snakes_to_upd, new_heads):
+			if new_head in exploding_squares:
+				self.add_crash((snake.head, new_head), snake.idx, utils.CrashCause.EXPLOSION)
 		# Update real snake positions if no crash happened
 		if not self.crashes:
-			for snake, new_pos, new_spit_fire_pos, obj in zip(snakes_to_upd, new_posis, new_spit_fire_posis, objects):
-				self.free_squares |= {snake.pos[-1]} if snake.pos[-1] != new_pos[-1] else set()
-				self.free_squares -= {new_pos[0]}
-				snake.pos = new_pos
+			for snake in snakes_to_upd:
+				if snake.is_growing == 0:
+					self.free_squares.add(snake.pos[-1])
+					del self.occupancy[snake.pos[-1]]
+			for snake, new_head, new_spit_fire_pos, obj in zip(snakes_to_upd, new_heads, new_spit_fire_posis, objects):
+				self.free_squares.discard(new_head)
+				self.head_seqs[snake.idx] += 1
+				self.occupancy[new_head] = (snake.idx, self.head_seqs[snake.idx])
+				snake.move(new_head)
 				snake.spit_fire_posis = new_spit_fire_pos
 				snake.score += ITEM_SCORES.get(obj, 0)
+			# The new heads are part of the occupancy now
+			new_heads = []
 		# Check for crashes by snakes getting burned (only after the snake posis got updated, so that the new posis incl. the new fire spit gets drawn on the screen)
 		fire_posis = new_spit_fire_posis + rem_spit_fire_posis
-		self.crashes.extend([(pos, pos) for snake_pos, fire_pos in itertools.product(new_posis + remaining_posis, fire_posis) for pos in snake_pos if pos in fire_pos])
+		for fire_pos in fire_posis:
+			for pos in fire_pos:
+				if pos in self.occupancy:
+					self.add_crash((pos, pos), self.occupancy[pos][0], utils.CrashCause.FIRE)
+				elif pos in new_heads:
+					self.add_crash((pos, pos), snakes_to_upd[new_heads.index(pos)].idx, utils.CrashCause.FIRE)
 		return objects
 
 	def update_counting(self) -> [utils.Objects]:
@@ -158,14 +179,15 @@ class Game:
 				# Countdown reaches zero, handle it depending on the element
 				match elem:
 					case utils.Cntble.DROP_ITEM:
-						# Drop a new item on the map
-						i, j = random.choice(list(self.free_squares))
-						new_object = random.choice(self.level.items)
-						self.level.map[i][j] = new_object
-						self.free_squares -= {(i, j)}
+						# Drop a new item on the map (if there is a free square left)
 						self.counters[k] = self.level.drop_rate * REOCC_PER_SEC
+						if (square := self.free_squares.sample(self.rng)) is None:
+							continue
+						new_object = self.rng.choice(self.level.items)
+						self.level.set_object(square, new_object)
+						self.free_squares.discard(square)
 						if new_object == utils.Objects.BOMB:
-							self.bombs[(i, j)] = (BOMB_CNTDWN * REOCC_PER_SEC, NO_ORIENTATION)
+							self.bombs[square] = (BOMB_CNTDWN * REOCC_PER_SEC, NO_ORIENTATION)
 							new_obj.append(utils.Objects.BOMB)
 					case _:
 						pass
@@ -188,16 +210,17 @@ class Game:
 		:param bomb_pos: The position of the bomb.
 		:return: A list of bombs that were on the exploding squares (incl the original one)
 		"""
-		row, col = bomb_pos
-		exploded_squares = [(row - 1 + i, col - 1 + j) for i in range(3) for j in range(3)]
-		for i, j in exploded_squares:
-			if self.level.map[i][j] not in utils.Indestructible:
-				self.level.map[i][j] = utils.Objects.EXPLOSION
-			# If a bomb is hit, we additionally have to clear it from the bombs dictionary
-			if (i, j) in self.bombs:
-				del self.bombs[(i, j)]
+		exploded_squares = utils.get_area_squares(bomb_pos)
+		self.level.fill_area(bomb_pos, utils.Objects.EXPLOSION)
+		self.update_free_squares(exploded_squares)
+		# If a bomb is hit, we additionally have to clear it from the bombs dictionary
+		for square in exploded_squares:
+			if square in self.bombs:
+				del self.bombs[square]
 		# Check for exploded snakes and update explosion dict
-		self.crashes.extend([(pos, pos) for snake in self.snakes for pos in snake.pos if pos in exploded_squares])
+		for pos in exploded_squares:
+			if pos in self.occupancy:
+				self.add_crash((pos, pos), self.occupancy[pos][0], utils.CrashCause.EXPLOSION)
 		self.explosions[bomb_pos] = EXPLOSION_CNTDWN * REOCC_PER_SEC
 
 	def explosion_is_over(self, pos: (int, int)) -> None:
@@ -206,11 +229,8 @@ class Game:
 
 		:param pos: The position of the explosion.
 		"""
-		row, col = pos
-		rel_squares = [(row - 1 + i, col - 1 + j) for i in range(3) for j in range(3)]
-		for i, j in rel_squares:
-			if self.level.map[i][j] not in utils.Indestructible:
-				self.level.map[i][j] = utils.Objects.NONE
+		self.level.fill_area(pos, utils.Objects.NONE)
+		self.update_free_squares(utils.get_area_squares(pos))
 		del self.explosions[pos]
 
 	def move_bomb(self, old_pos: (int, int)) -> bool:
@@ -224,26 +244,48 @@ class Game:
 		if orientation == NO_ORIENTATION:
 			# Bomb isn't moving
 			return False
-		new_pos = utils.add_two_tuples(old_pos, orientation)
-		snake_posis = [pos for snake in self.snakes for pos in snake.pos]
-		if self.level.map[new_pos[0]][new_pos[1]] in utils.MoveStopper or new_pos in snake_posis:
+		new_pos = self.level.get_neighbor(old_pos, orientation)
+		obj_at_new_pos = self.level.get_object(new_pos)
+		if obj_at_new_pos in utils.MoveStopper or new_pos in self.occupancy:
 			# Bomb hit a stopper -> stop it's movement
 			self.bombs[old_pos] = (cntdwn, NO_ORIENTATION)
 			return True
-		elif self.level.map[new_pos[0]][new_pos[1]] == utils.Objects.EXPLOSION:
+		elif obj_at_new_pos == utils.Objects.EXPLOSION:
 			# Bomb moves into an ongoing explosion
-			self.level.map[old_pos[0]][old_pos[1]] = utils.Objects.NONE
+			self.level.set_object(old_pos, utils.Objects.NONE)
+			self.update_free_squares([old_pos])
 			del self.bombs[old_pos]
 			return False
-		self.level.map[new_pos[0]][new_pos[1]] = utils.Objects.BOMB
-		self.level.map[old_pos[0]][old_pos[1]] = utils.Objects.NONE
+		self.level.set_object(new_pos, utils.Objects.BOMB)
+		self.level.set_object(old_pos, utils.Objects.NONE)
+		self.update_free_squares([old_pos, new_pos])
 		self.bombs[new_pos] = (cntdwn, orientation)
 		del self.bombs[old_pos]
 		return False
 
+	def add_crash(self, squares: ((int, int), (int, int)), snake_idx: int, cause: utils.CrashCause) -> None:
+		"""Register a crash of the given snake between the given two squares (or on a single square, given twice)."""
+		self.crashes.append(squares)
+		self.crash_causes.append((snake_idx, cause))
+
+	def update_free_squares(self, squares: [(int, int)]) -> None:
+		"""Add the given squares to the free squares if they are empty and not occupied by a snake, or remove them otherwise."""
+		for square in squares:
+			if self.level.is_on_map(square) and self.level.get_object(square) == utils.Objects.NONE and square not in self.occupancy:
+				self.free_squares.add(square)
+			else:
+				self.free_squares.discard(square)
+
 	def is_snake_on_squares(self, squares: [(int, int)]) -> [(int, int)]:
 		"""Returns all the squares of the given square list where a snake is on"""
-		return [pos for pos in squares for snake in self.snakes if pos in snake.pos]
+		return [pos for pos in squares if pos in self.occupancy]
+
+	def get_occupant(self, pos: (int, int)) -> (int, int):
+		"""Return a tuple (snake idx, segment idx) for the snake segment on the given square, or None if no snake is on it. The head has segment idx 0."""
+		if (occupant := self.occupancy.get(pos)) is None:
+			return None
+		snake_idx, seq = occupant
+		return snake_idx, self.head_seqs[snake_idx] - seq
 
 	def create_bomb_dict(self) -> {(int, int): int}:
 		"""
@@ -256,7 +298,7 @@ class Game:
 	def update_spit_fire_posis(self, snake: Snake):
 		"""Updates the spit fire posis for the given snake."""
 		if snake.spits_fire > 0:
-			snake.spit_fire_posis = utils.get_spit_fire_squares(snake.pos[0], snake.orientation, SPIT_FIRE_RANGE, self.level.map)
+			snake.spit_fire_posis = self.level.get_spit_fire_squares(snake.pos[0], snake.orientation, SPIT_FIRE_RANGE)
 		else:
 			snake.spit_fire_posis = []
 
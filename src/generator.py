@@ -0,0 +1,233 @@
+"""
+Module for generating levels: Creates maps of any size from a few parameters (wall density, symmetry, item rates, number of players) and returns them as level
+infos in the format of the level json file (which can be compiled into a level pack) or directly as Level objects. Every candidate map is validated with a
+flood fill, which takes linear time in the size of the map, so a fresh level can be created between two rounds.
+Run from the src directory, e.g. "python generator.py --cols 30 --rows 40 --density 0.15 --symmetry both --seed 7 --print". New levels need a preview
+image (see FILENAME_LVL_PREV) before they can be added to the level json file of the game with --append.
+"""
+
+# ----- Imports --------
+import argparse
+import json
+import os
+import random
+import time
+from collections import deque
+from level import Level
+from constants import *
+
+# ----- Constants ------
+# Symmetries of the generated maps: "horizontal" mirrors the left half to the right half, "vertical" the upper half to the lower half, "both" does both, and
+# "rotational" rotates the map by 180 degrees
+SYMMETRIES = ["none", "horizontal", "vertical", "both", "rotational"]
+DEFAULT_ITEM_RATES = {"a": 4, "m": 2, "c": 3, "t": 2, "b": 2, "o": 1, "h": 1}
+# Items that may lie on the map at the start (no bombs, as they need a countdown)
+START_ITEMS = ["a", "m", "c", "t", "b", "h"]
+START_LENGTH = 4
+# Number of squares in front of each snake's head that are kept free
+RUNWAY_LENGTH = 3
+WALL_MIN_LENGTH = 2
+WALL_MAX_LENGTH = 6
+MAX_ATTEMPTS = 50
+EMPTY = " "
+WALL = "w"
+
+
+# ----- Methods ------
+def get_symmetric_squares(square: (int, int), num_cols: int, num_rows: int, symmetry: str) -> {(int, int)}:
+	"""Return the given square together with its mirror images under the given symmetry."""
+	i, j = square
+	mirrored_i, mirrored_j = num_cols - 1 - i, num_rows - 1 - j
+	if symmetry == "horizontal":
+		return {(i, j), (i, mirrored_j)}
+	if symmetry == "vertical":
+		return {(i, j), (mirrored_i, j)}
+	if symmetry == "both":
+		return {(i, j), (i, mirrored_j), (mirrored_i, j), (mirrored_i, mirrored_j)}
+	if symmetry == "rotational":
+		return {(i, j), (mirrored_i, mirrored_j)}
+	return {(i, j)}
+
+
+def get_start_positions(num_cols: int, num_rows: int, num_players: int) -> [[(int, int)]]:
+	"""
+	Return the start positions of the snakes (head first). The snakes lie in the upper and lower quarter of the map, heading towards the middle, and are placed
+	symmetrically under all symmetries: player 1 top left, player 2 bottom right, player 3 top right and player 4 bottom left.
+	"""
+	top, bottom = max(2, num_cols // 4), num_cols - 1 - max(2, num_cols // 4)
+	left = max(1, num_rows // 4 - START_LENGTH // 2)
+	right = num_rows - 1 - left
+	to_the_right = range(left + START_LENGTH - 1, left - 1, -1)
+	to_the_left = range(right - START_LENGTH + 1, right + 1)
+	starts = [(top, to_the_right), (bottom, to_the_left), (top, to_the_left), (bottom, to_the_right)]
+	return [[(i, j) for j in squares] for i, squares in starts[:num_players]]
+
+
+def flood_fill(grid: [[str]], start: (int, int)) -> {(int, int)}:
+	"""Return all squares without a wall that are reachable from the given square (in linear time)."""
+	num_cols, num_rows = len(grid), len(grid[0])
+	reached = {start}
+	queue = deque([start])
+	while queue:
+		i, j = queue.popleft()
+		for neighbor in [(i - 1, j), (i + 1, j), (i, j - 1), (i, j + 1)]:
+			if 0 <= neighbor[0] < num_cols and 0 <= neighbor[1] < num_rows and neighbor not in reached and grid[neighbor[0]][neighbor[1]] != WALL:
+				reached.add(neighbor)
+				queue.append(neighbor)
+	return reached
+
+
+def create_candidate(rng: random.Random, num_cols: int, num_rows: int, wall_density: float, symmetry: str, reserved: {(int, int)}) -> [[str]]:
+	"""Return a map with a border of walls and random wall segments inside, without walls on the reserved squares."""
+	grid = [[WALL if i in (0, num_cols - 1) or j in (0, num_rows - 1) else EMPTY for j in range(num_rows)] for i in range(num_cols)]
+	num_walls = 0
+	target_walls = int(wall_density * (num_cols - 2) * (num_rows - 2))
+	for _ in range(4 * target_walls):
+		if num_walls >= target_walls:
+			break
+		i, j = rng.randrange(1, num_cols - 1), rng.randrange(1, num_rows - 1)
+		direction = rng.choice([(0, 1), (1, 0)])
+		for step in range(rng.randint(WALL_MIN_LENGTH, WALL_MAX_LENGTH)):
+			square = (i + step * direction[0], j + step * direction[1])
+			if not (0 < square[0] < num_cols - 1 and 0 < square[1] < num_rows - 1):
+				break
+			for image in get_symmetric_squares(square, num_cols, num_rows, symmetry):
+				if image not in reserved and grid[image[0]][image[1]] != WALL:
+					grid[image[0]][image[1]] = WALL
+					num_walls += 1
+	return grid
+
+
+def generate_level_info(num_cols: int = 25, num_rows: int = 25, wall_density: float = 0.12, symmetry: str = "both", item_rates: {str: int} = None, num_players: int = 4,
+						num_start_items: int = None, seed: int = None, name: str = None, level_id: int = None, goal: str = "HIGHSCORE", target: int = 100, drop_rate: float = DROP_ITEM_RATE) -> {}:
+	"""
+	Generate a level and return its level infos in the format of the level json file.
+
+	:param num_cols: The number of lines of the map (num_cols of Level)
+	:param num_rows: The number of squares per line of the map (num_rows of Level)
+	:param wall_density: The share of the inner squares that become walls (before sealed pockets are filled)
+	:param symmetry: One of SYMMETRIES
+	:param item_rates: The item rates of the level (as in the level json file)
+	:param num_players: The number of snakes that get a start position (1 to 4)
+	:param num_start_items: The number of items on the map at the start (default: one per 40 squares). With a symmetry, their mirror images are added.
+	:param seed: Seed for the random generator. The same parameters and seed give the same level.
+	:param name: The name of the level (default: derived from the seed)
+	:param level_id: The id of the level
+	:param goal: The goal of the level (name of a utils.Goals member)
+	:param target: The target score (or survival time in seconds)
+	:param drop_rate: The time (in seconds) between two dropped items
+	:return: Dict with the level infos
+	"""
+	if symmetry not in SYMMETRIES:
+		raise ValueError(f"Unknown symmetry {symmetry}, use one of {', '.join(SYMMETRIES)}")
+	if not 1 <= num_players <= 4:
+		raise ValueError("The number of players must be between 1 and 4")
+	if num_cols < 7 or num_rows < 2 * (START_LENGTH + RUNWAY_LENGTH) + 4:
+		raise ValueError(f"The map must have at least 7 lines and {2 * (START_LENGTH + RUNWAY_LENGTH) + 4} squares per line")
+	if seed is None:
+		seed = random.randrange(2 ** 32)
+	rng = random.Random(seed)
+	start_pos = get_start_positions(num_cols, num_rows, num_players)
+	reserved = set()
+	for snake_pos in start_pos:
+		head, neck = snake_pos[0], snake_pos[1]
+		heading = (head[0] - neck[0], head[1] - neck[1])
+		reserved.update(snake_pos)
+		reserved.update((head[0] + step * heading[0], head[1] + step * heading[1]) for step in range(1, RUNWAY_LENGTH + 1))
+	for _ in range(MAX_ATTEMPTS):
+		grid = create_candidate(rng, num_cols, num_rows, wall_density, symmetry, reserved)
+		# Valid if all snakes can reach each other. Free squares that can't be reached then are sealed pockets, which are filled with walls.
+		reached = flood_fill(grid, start_pos[0][0])
+		if all(snake_pos[0] in reached for snake_pos in start_pos):
+			break
+	else:
+		raise ValueError(f"No valid map found in {MAX_ATTEMPTS} attempts, try a lower wall density")
+	free_squares = []
+	for i, line in enumerate(grid):
+		for j, square in enumerate(line):
+			if square == EMPTY and (i, j) not in reached:
+				line[j] = WALL
+			elif square == EMPTY and (i, j) not in reserved:
+				free_squares.append((i, j))
+	# Start items (drawn by the item rates)
+	item_rates = dict(item_rates if item_rates is not None else DEFAULT_ITEM_RATES)
+	start_items = [item for item in START_ITEMS for _ in range(item_rates.get(item, 0))]
+	if start_items:
+		for _ in range(num_start_items if num_start_items is not None else num_cols * num_rows // 40):
+			item = rng.choice(start_items)
+			for i, j in get_symmetric_squares(rng.choice(free_squares), num_cols, num_rows, symmetry):
+				if grid[i][j] == EMPTY and (i, j) not in reserved:
+					grid[i][j] = item
+	for snake_idx, snake_pos in enumerate(start_pos):
+		for body_idx, (i, j) in enumerate(snake_pos):
+			grid[i][j] = f"s{snake_idx + 1}{body_idx + 1}"
+	return {"name": name if name else f"Generated {seed}",
+			"id": level_id,
+			"map": [",".join(line) for line in grid],
+			"item_rates": item_rates,
+			"drop_rate": drop_rate,
+			"goal": goal,
+			"target": target,
+			"bg": "DESERT",
+			"highscore": []}
+
+
+def generate_level(*args, use_array: bool = USE_ARRAY_GRID, **kwargs) -> Level:
+	"""Generate a level (see generate_level_info for the parameters) and return it as a Level."""
+	return Level(generate_level_info(*args, **kwargs), use_array)
+
+
+def write_levels_file(filename: str, levels_info: [{}]) -> None:
+	"""
+	Write the given level infos as a level json file, formatted like res/levels.json. The file is written to a temporary file in the same directory first and
+	then replaces the old file at once, so that the game never reads a half-written file.
+	"""
+	tmp_filename = f"{filename}.{os.getpid()}.tmp"
+	try:
+		with open(tmp_filename, "w") as file_level_info:
+			json.dump(levels_info, file_level_info, indent="\t")
+		os.replace(tmp_filename, filename)
+	except BaseException:
+		if os.path.exists(tmp_filename):
+			os.remove(tmp_filename)
+		raise
+
+
+# ----- Main script ----
+def main():
+	parser = argparse.ArgumentParser(description="Generate a level and print it or add it to a level json file.")
+	parser.add_argument("--cols", type=int, default=25, help="The number of lines of the map")
+	parser.add_argument("--rows", type=int, default=25, help="The number of squares per line")
+	parser.add_argument("--density", type=float, default=0.12, help="The share of inner squares that become walls")
+	parser.add_argument("--symmetry", default="both", choices=SYMMETRIES, help="The symmetry of the map")
+	parser.add_argument("--players", type=int, default=4, choices=range(1, 5), help="The number of start positions")
+	parser.add_argument("--item-rates", type=json.loads, help='The item rates as json, e.g. \'{"a": 4, "c": 2}\'')
+	parser.add_argument("--goal", default="HIGHSCORE", choices=["HIGHSCORE", "SURVIVE"], help="The goal of the level")
+	parser.add_argument("--target", type=int, default=100, help="The target score (or survival time in seconds)")
+	parser.add_argument("--seed", type=int, help="The seed of the level")
+	parser.add_argument("--name", help="The name of the level")
+	parser.add_argument("--print", action="store_true", help="Print the map")
+	parser.add_argument("--output", help="Write the level (as a level json file with this level only) to this file")
+	parser.add_argument("--append", help="Add the level to this level json file (with the next free id)")
+	args = parser.parse_args()
+	level_id = None
+	if args.append:
+		with open(args.append) as file_level_info:
+			levels_info = json.load(file_level_info)
+		level_id = max((level_info["id"] for level_info in levels_info), default=-1) + 1
+	start = time.perf_counter()
+	level_info = generate_level_info(args.cols, args.rows, args.density, args.symmetry, args.item_rates, args.players, seed=args.seed, name=args.name, level_id=level_id,
+									 goal=args.goal, target=args.target)
+	elapsed = time.perf_counter() - start
+	level = Level(level_info)
+	print(f"Generated {level.name} ({level.num_cols}x{level.num_rows}, {len(level.get_wall_squares())} walls) in {elapsed * 1000:.1f} ms")
+	if args.print:
+		print("\n".join(line.replace(",", "").replace(EMPTY, ".") for line in (",".join(square[:1] for square in line.split(",")) for line in level_info["map"])))
+	if args.output:
+		write_levels_file(args.output, [level_info])
+	if args.append:
+		write_levels_file(args.append, levels_info + [level_info])
+
+
+if __name__ == "__main__":
+	main()
@@ -1,10 +1,13 @@
 """Module for the graphics class in the friendly snakes package"""
 
 # ----- Imports --------
+import itertools
+from collections import OrderedDict
 from level import Level
 from snake import Snake
+from profiler import Profiler
 from constants import *
-import animations
+import assets
 import pygame
 
 pygame.init()
@@ -14,24 +17,89 @@ pygame.init()
 
 
 # ----- Classes --------
+class TextCache:
+	"""A cache for rendered texts with a bounded size. If the cache is full, the least recently used text is evicted."""
+
+	def __init__(self, max_size: int = TEXT_CACHE_SIZE):
+		self.max_size = max_size
+		self._surfaces: OrderedDict[tuple, pygame.Surface] = OrderedDict()
+
+	def render(self, font: pygame.font.Font, text: str, antialias: bool, color: (int, int, int)) -> pygame.Surface:
+		"""Return the rendered text, just like font.render, but render it only if it isn't in the cache yet."""
+		key = (font, text, color, antialias)
+		surf = self._surfaces.get(key)
+		if surf is None:
+			surf = self._surfaces[key] = font.render(text, antialias, color)
+			if len(self._surfaces) > self.max_size:
+				self._surfaces.popitem(last=False)
+		else:
+			self._surfaces.move_to_end(key)
+		return surf
+
+	def clear(self) -> None:
+		"""Remove all texts from the cache."""
+		self._surfaces.clear()
+
+
 class Graphics:
 	"""The class for displaying all graphics on the screen"""
 
-	def __init__(self, main_surface: pygame.Surface, num_rows: int, num_cols: int):
+	def __init__(self, main_surface: pygame.Surface, num_rows: int, num_cols: int, dirty_rects: bool = DIRTY_RECT_RENDERING, profiler: Profiler = None, loader: assets.AssetLoader = None,
+				 camera: bool = None):
+		"""
+		Initialize the graphics.
+
+		:param main_surface: The surface to draw onto (usually the display surface)
+		:param num_rows: Number of rows of the map (as in Level, i.e. the number of squares per line of the map)
+		:param num_cols: Number of columns of the map (as in Level, i.e. the number of lines of the map)
+		:param dirty_rects: If True, only the parts of the screen that changed are redrawn
+		:param profiler: The profiler for timing the drawing phases
+		:param loader: The asset loader. If given, the images are only requested here and fetched when the first frame is drawn, so that they can be loaded in the background.
+		Otherwise, they are loaded right away.
+		:param camera: If True, the squares have a fixed size and only a part of the map is shown, which follows the snakes. If None, the camera is used for maps that
+		would otherwise get squares smaller than CAMERA_MIN_EDGE_SIZE.
+		"""
 		self.main_surface = main_surface
+		# The profiler times the drawing phases. While it is enabled, its statistics are shown in an overlay in the top left corner of the screen.
+		self.profiler = profiler if profiler is not None else Profiler(csv_filename=None)
+		self._overlay_shown = False
+		self._overlay_lines: [str] = []
+		self._overlay_surface: pygame.Surface = None
+		# In dirty rect mode, only the squares, status surfaces and texts that changed since the last frame are redrawn. The states below hold what was drawn in the last frame.
+		self.dirty_rects = dirty_rects
+		self._needs_full_redraw = True
+		self._cell_states: {(int, int): tuple} = {}
+		self._status_states: [tuple] = []
+		self._score_state = None
+		self._score_drawn_rect = pygame.Rect(0, 0, 0, 0)
+		# The static layer holds the background and all walls. It is rebuilt whenever the level, the level's map version or the background changes.
+		self._static_layer: pygame.Surface = None
+		self._static_layer_key = None
 		self.scaling_factor = self.main_surface.get_height() / BENCHMARK_HEIGHT
 		self.usable_rect = pygame.Rect(utils.mult_tuple_to_int(self.main_surface.get_size(), (1 - MAP_TO_SCREEN_RATIO) / 2), utils.mult_tuple_to_int(self.main_surface.get_size(), MAP_TO_SCREEN_RATIO))
-		self._cached_bgs = {name: pygame.transform.scale(pygame.image.load(filename).convert_alpha(), self.main_surface.get_size()) for name, (filename, _) in FILENAMES_GAME_BGS_WITH_SCORE_COLORS.items()}
-		self.bg_name = list(self._cached_bgs.keys())[0]
-		self.bg = self._cached_bgs[self.bg_name]
-		self.edge_size = int(min(self.main_surface.get_width() * MAP_TO_SCREEN_RATIO / num_cols, self.main_surface.get_height() * MAP_TO_SCREEN_RATIO / num_rows))
+		self.bg_name = list(FILENAMES_GAME_BGS_WITH_SCORE_COLORS.keys())[0]
+		self.num_rows = num_rows
+		self.num_cols = num_cols
+		# The squares of line i of the map are drawn from top to bottom, the squares j of a line from left to right
+		self.edge_size = int(min(self.main_surface.get_width() * MAP_TO_SCREEN_RATIO / num_rows, self.main_surface.get_height() * MAP_TO_SCREEN_RATIO / num_cols))
+		self.camera = camera if camera is not None else self.edge_size < CAMERA_MIN_EDGE_SIZE * self.scaling_factor
+		# The view is the part of the map that is shown, given by its top left square and its size in squares. Without the camera, it covers the whole map.
+		self.view_origin = (0, 0)
+		self.view_size = (num_cols, num_rows)
+		# Index of the snake that the camera follows (None for the center of all snakes)
+		self.follow: int = None
+		if self.camera:
+			self.edge_size = int(CAMERA_EDGE_SIZE * self.scaling_factor)
+			max_view_squares = int(MAP_TO_SCREEN_RATIO * min(self.main_surface.get_size()) / self.edge_size)
+			self.view_size = (min(num_cols, max_view_squares), min(num_rows, max_view_squares))
 		self.square_size = (self.edge_size, self.edge_size)
-		map_size = (self.edge_size * num_cols, self.edge_size * num_rows)
+		map_size = (self.edge_size * self.view_size[1], self.edge_size * self.view_size[0])
 		# Field surface
 		self.map_rect = pygame.rect.Rect((0, 0), map_size)
 		self.map_rect.center = self.main_surface.get_rect().center
 		self.map_surface = self.main_surface.subsurface(self.map_rect)
-		self.square_posis = [[(j * self.edge_size, i * self.edge_size) for j in range(num_cols)] for i in range(num_rows)]
+		# Without the camera, the screen positions of all squares are looked up in a table instead of being computed
+		self.square_posis = None if self.camera else [[(j * self.edge_size, i * self.edge_size) for j in range(num_rows)] for i in range(num_cols)]
 		# Snake status surfaces
 		status_rect_size = (int((MAP_TO_SCREEN_RATIO * self.main_surface.get_width() - self.map_rect.width) / 2), int(self.map_rect.height / 4))
 		status_rect = pygame.rect.Rect((0, 0), status_rect_size)
@@ -59,118 +127,283 @@ class Graphics:
 		# Score rect
 		self.score_rect = pygame.rect.Rect((0, 0), (status_rect_size[0] * 0.5, status_rect_size[1]))
 		self.score_rect.topright = self.usable_rect.topright
-		# Prepare images
-		self.wall = pygame.transform.scale(pygame.image.load(FILENAME_WALL).convert_alpha(), self.square_size)
-		self.items_orig = {obj: pygame.image.load(filename).convert_alpha() for obj, filename in FILENAME_ITEMS.items()}
-		self.items = {obj: pygame.transform.scale(img_orig, self.square_size) for obj, img_orig in self.items_orig.items()}
-		self.fire = pygame.transform.scale(pygame.image.load(FILENAME_FIRE_SPIT).convert_alpha(), (SPIT_FIRE_RANGE * self.edge_size, self.edge_size))
-		self.bomb_anim = animations.Animation(FILENAME_BOMB, self.square_size)
-		self.explosion_anim = animations.Animation(FILENAME_EXPLOSION, (3 * self.edge_size, 3 * self.edge_size))
-		self.drunk_anim = animations.Animation(FILENAME_DRUNK, self.square_size)
-		self.piqu_rising_anim = animations.Animation(FILENAME_PIQU_RISING, self.square_size)
-		self.snake_parts_orig = {k: [pygame.image.load(filename).convert_alpha() for filename in v] for k, v in FILENAME_SNAKE_PARTS.items()}
-		self.snake_parts = {k: [pygame.transform.scale(img_orig, self.square_size) for img_orig in v] for k, v in self.snake_parts_orig.items()}
-		status_img_size = utils.mult_tuple_to_int(rect_size, 1)
-		self.snake_status_imgs = {k: [pygame.transform.scale(img_orig, status_img_size) for img_orig in v] for k, v in self.snake_parts_orig.items() if k != utils.SnakeParts.TAIL}
-		self.speedo_img = pygame.transform.scale(pygame.image.load(FILENAME_SPEEDO).convert_alpha(), utils.mult_tuple_to_int(rect_size, 0.8))
-		self.drunk_img = pygame.transform.scale(self.items_orig[utils.Objects.BEER], utils.mult_tuple_to_int(rect_size, 0.8))
+		# Request the images, so that they can be loaded in the background (if the asset loader has a background thread). They are fetched in load_assets.
+		self.status_img_size = utils.mult_tuple_to_int(rect_size, 1)
+		self.status_icon_size = utils.mult_tuple_to_int(rect_size, 0.8)
+		self.loader = loader if loader is not None else assets.AssetLoader(background=False)
+		self.loader.request("image", FILENAMES_GAME_BGS_WITH_SCORE_COLORS[self.bg_name][0], self.main_surface.get_size())
+		for filename, size in self.get_asset_files():
+			self.loader.request("animation" if filename.endswith(".gif") else "image", filename, size)
+		for filename, _ in FILENAMES_GAME_BGS_WITH_SCORE_COLORS.values():
+			self.loader.request("image", filename, self.main_surface.get_size())
+		self.assets_loaded = False
+		if loader is None:
+			self.load_assets()
 		# Prepare fonts
 		self.snake_name_font = pygame.font.Font(None, int(SNAKE_NAME_FONT_SIZE * self.scaling_factor))
 		self.snake_info_font = pygame.font.Font(None, int(SNAKE_INFO_FONT_SIZE * self.scaling_factor))
 		self.score_font = pygame.font.Font(None, int(SCORE_FONT_SIZE * self.scaling_factor))
+		self.profiler_font = pygame.font.Font(None, int(PROFILER_FONT_SIZE * self.scaling_factor))
+		# All HUD texts (status and score) are rendered through the text cache, as most of them only change a few times per second at most
+		self.text_cache = TextCache()
+
+	def get_asset_files(self) -> [(str, (int, int))]:
+		"""Return the filenames and sizes of all images and animations needed for drawing a game (except the backgrounds)."""
+		files = [(FILENAME_WALL, self.square_size), (FILENAME_FIRE_SPIT, (SPIT_FIRE_RANGE * self.edge_size, self.edge_size)), (FILENAME_BOMB, self.square_size),
+				 (FILENAME_EXPLOSION, (3 * self.edge_size, 3 * self.edge_size)), (FILENAME_DRUNK, self.square_size), (FILENAME_PIQU_RISING, self.square_size),
+				 (FILENAME_SPEEDO, self.status_icon_size), (FILENAME_ITEMS[utils.Objects.BEER], self.status_icon_size)]
+		files.extend((filename, self.square_size) for filename in FILENAME_ITEMS.values())
+		for filenames in FILENAME_SNAKE_PARTS.values():
+			files.extend((filename, size) for filename in filenames for size in [self.square_size, self.status_img_size])
+		return files
+
+	def load_assets(self) -> None:
+		"""Fetch all images and animations from the asset loader and prepare the rotation atlases."""
+		self.wall = self.loader.get_image(FILENAME_WALL, self.square_size)
+		self.items = {obj: self.loader.get_image(filename, self.square_size) for obj, filename in FILENAME_ITEMS.items()}
+		self.fire = self.loader.get_image(FILENAME_FIRE_SPIT, (SPIT_FIRE_RANGE * self.edge_size, self.edge_size))
+		self.bomb_anim = self.loader.get_animation(FILENAME_BOMB, self.square_size)
+		self.explosion_anim = self.loader.get_animation(FILENAME_EXPLOSION, (3 * self.edge_size, 3 * self.edge_size))
+		self.drunk_anim = self.loader.get_animation(FILENAME_DRUNK, self.square_size)
+		self.piqu_rising_anim = self.loader.get_animation(FILENAME_PIQU_RISING, self.square_size)
+		self.snake_parts = {k: [self.loader.get_image(filename, self.square_size) for filename in v] for k, v in FILENAME_SNAKE_PARTS.items()}
+		# Rotation atlases, so that no surfaces have to be rotated while drawing. Keys are (color, part index, rotation) for the snake parts and (animation name, frame id, rotation) for the animations.
+		# For the spit fire, the frame id is the number of squares the fire covers.
+		rotations = sorted(ROTATIONS_STRAIGHT.values())
+		self.snake_part_atlas = {(color, part_idx, rotation): pygame.transform.rotate(img, rotation) for color, imgs in self.snake_parts.items() for part_idx, img in enumerate(imgs) for rotation in rotations}
+		self.anim_atlas = {("piqu_rising", frame_id, rotation): pygame.transform.rotate(frame, rotation) for frame_id, frame in enumerate(self.piqu_rising_anim.pygame_frames) for rotation in rotations}
+		self.anim_atlas.update({("drunk", frame_id, rotation % 180): pygame.transform.rotate(frame, rotation % 180) for frame_id, frame in enumerate(self.drunk_anim.pygame_frames) for rotation in rotations})
+		for length in range(1, SPIT_FIRE_RANGE + 1):
+			# The spit fire range might be cut because of obstacles, so we need images that show the fire only partially
+			fire_img = self.fire.subsurface((0, 0, length / SPIT_FIRE_RANGE * self.fire.get_width(), self.fire.get_height()))
+			self.anim_atlas.update({("fire", length, rotation): pygame.transform.rotate(fire_img, rotation) for rotation in rotations})
+		self.snake_status_imgs = {k: [self.loader.get_image(filename, self.status_img_size) for filename in v] for k, v in FILENAME_SNAKE_PARTS.items()}
+		self.speedo_img = self.loader.get_image(FILENAME_SPEEDO, self.status_icon_size)
+		self.drunk_img = self.loader.get_image(FILENAME_ITEMS[utils.Objects.BEER], self.status_icon_size)
+		self.assets_loaded = True
+
+	def get_bg(self, bg_name: str) -> pygame.Surface:
+		"""Return the given background, scaled to the screen size."""
+		return self.loader.get_image(FILENAMES_GAME_BGS_WITH_SCORE_COLORS[bg_name][0], self.main_surface.get_size())
 
 	def update_display(self, level: Level, snakes: [Snake], crashes: [((int, int), (int, int))], bombs: {(int, int): int}, explosions: {(int, int): int}, paused_time: int) -> None:
-		"""Draw everything onto the screen"""
-		# Draw background
-		self.main_surface.blit(self.bg, (0, 0))
-		# Draw level
-		for row, obj_row in enumerate(level.map):
-			for col, obj in enumerate(obj_row):
-				grid_pos = (row, col)
-				screen_pos = self.grid_to_screen_pos(grid_pos)
-				if obj == utils.Objects.WALL:
-					self.map_surface.blit(self.wall, screen_pos)
-				elif obj == utils.Objects.BOMB:
-					cur_frame_id = self.bomb_anim.num_frames - bombs[grid_pos]
-					cur_frame = self.bomb_anim.pygame_frames[cur_frame_id]
-					self.map_surface.blit(cur_frame, screen_pos)
-				elif obj == utils.Objects.EXPLOSION:
-					# Do nothing here, explosions are handled separately later (so that for explosions at the edge, the explosions are only drawn after the wall has been drawn)
-					pass
-				elif obj != utils.Objects.NONE:
-					self.map_surface.blit(self.items[obj], screen_pos)
-		# Draw explosions
-		for grid_pos in explosions:
-			screen_pos = self.grid_to_screen_pos(grid_pos)
-			cur_frame_id = self.explosion_anim.num_frames - explosions[grid_pos]
-			cur_frame = self.explosion_anim.pygame_frames[cur_frame_id]
-			self.map_surface.blit(cur_frame, utils.subtract_tuples(screen_pos, self.square_size))
-		# Draw snakes
+		"""Draw everything onto the screen. In dirty rect mode, only the parts of the screen that changed since the last frame are redrawn and updated."""
+		if not self.assets_loaded:
+			self.load_assets()
+		if self._overlay_shown and not self.profiler.enabled:
+			# The overlay was switched off, so the screen underneath has to be restored
+			self._overlay_shown = False
+			self._overlay_surface = None
+			self.invalidate()
+		with self.profiler.measure("map"):
+			self.update_camera(snakes)
+			static_layer = self.get_static_layer(level)
+			map_draw_ops = self.get_map_draw_ops(level, bombs, explosions)
+		with self.profiler.measure("snakes"):
+			snake_draw_ops = self.get_snake_draw_ops(snakes) + self.get_crash_draw_ops(crashes)
+		draw_ops = map_draw_ops + snake_draw_ops
+		cell_states = self.get_cell_states(draw_ops)
+		status_states = [self.get_status_state(snake) for snake in snakes] + [None] * (len(self.status_surfaces) - len(snakes))
+		score_state = self.get_score_state(level, snakes, paused_time)
+		if self.dirty_rects and not self._needs_full_redraw:
+			# The redraw of the changed squares (incl. the snakes on them) is counted in the map phase
+			with self.profiler.measure("map"):
+				dirty_rects = self.draw_dirty_cells(cell_states)
+			with self.profiler.measure("status"):
+				dirty_rects.extend(self.draw_dirty_status(snakes, status_states))
+			with self.profiler.measure("score"):
+				dirty_rects.extend(self.draw_dirty_score(score_state))
+			dirty_rects.extend(self.draw_profiler_overlay())
+			with self.profiler.measure("display_update"):
+				pygame.display.update(dirty_rects)
+		else:
+			# Draw background and walls, level, explosions, snakes and crashes
+			with self.profiler.measure("map"):
+				self.main_surface.blit(static_layer, (0, 0))
+				for op, _ in map_draw_ops:
+					self.draw_op(op)
+			with self.profiler.measure("snakes"):
+				for op, _ in snake_draw_ops:
+					self.draw_op(op)
+			# Draw snake status
+			with self.profiler.measure("status"):
+				for surf, snake in zip(self.status_surfaces, snakes):
+					self.draw_status(surf, snake)
+			# Draw score, time and target
+			with self.profiler.measure("score"):
+				self.draw_score(score_state)
+			self.draw_profiler_overlay()
+			with self.profiler.measure("display_update"):
+				pygame.display.update()
+			self._needs_full_redraw = False
+		self._cell_states = cell_states
+		self._status_states = status_states
+		self._score_state = score_state
+
+	def get_map_draw_ops(self, level: Level, bombs: {(int, int): int}, explosions: {(int, int): int}) -> [(tuple, [(int, int)])]:
+		"""
+		Return the draw operations for the level objects and explosions in the view, each together with the grid squares of the view it covers. Walls are part of the static
+		layer and therefore skipped.
+		"""
+		draw_ops = []
+		for grid_pos, obj in level.get_item_squares(self.get_view_area() if self.camera else None):
+			if obj == utils.Objects.BOMB:
+				draw_ops.append((("bomb", self.bomb_anim.num_frames - bombs[grid_pos], grid_pos), [grid_pos]))
+			elif obj == utils.Objects.EXPLOSION:
+				# Do nothing here, explosions are handled separately later (so that for explosions at the edge, the explosions are only drawn after the wall has been drawn)
+				pass
+			else:
+				draw_ops.append((("item", obj, grid_pos), [grid_pos]))
+		for grid_pos, cntdwn in explosions.items():
+			if squares := [square for square in utils.get_area_squares(grid_pos) if self.is_visible(square)]:
+				draw_ops.append((("explosion", self.explosion_anim.num_frames - cntdwn, grid_pos), squares))
+		return draw_ops
+
+	def get_snake_draw_ops(self, snakes: [Snake]) -> [(tuple, [(int, int)])]:
+		"""Return the draw operations for the snake parts in the view (incl. animations and spit fire), each together with the grid squares of the view it covers."""
+		draw_ops = []
 		for snake in snakes:
-			head_orientation = utils.subtract_tuples(snake.pos[0], snake.pos[1])
-			for idx, pos in enumerate(snake.pos):
-				screen_pos = self.grid_to_screen_pos(pos)
-				if idx == 0 and snake.color in self.snake_parts:
+			if snake.color not in self.snake_parts:
+				continue
+			head_orientation = snake.heading
+			for prev_pos, pos, next_pos in self.get_visible_segments(snake):
+				if prev_pos is None:
 					# Snake head (incl. piquancy and drunk animation)
-					self.map_surface.blit(pygame.transform.rotate(self.snake_parts[snake.color][utils.SnakeParts.HEAD.value], ROTATIONS_STRAIGHT[head_orientation]), screen_pos)
+					rotation = ROTATIONS_STRAIGHT[head_orientation]
+					draw_ops.append((("snake_part", (snake.color, utils.SnakeParts.HEAD.value, rotation), pos), [pos]))
 					if snake.piquancy_growing > 0:
-						cur_frame_id = self.piqu_rising_anim.num_frames - snake.piquancy_growing
-						cur_frame = self.piqu_rising_anim.pygame_frames[cur_frame_id]
-						self.map_surface.blit(pygame.transform.rotate(cur_frame, ROTATIONS_STRAIGHT[head_orientation]), screen_pos)
+						draw_ops.append((("anim", ("piqu_rising", self.piqu_rising_anim.num_frames - snake.piquancy_growing, rotation), pos), [pos]))
 					if snake.is_drunk > 0:
-						cur_frame_id = self.drunk_anim.num_frames - snake.is_drunk
-						cur_frame = self.drunk_anim.pygame_frames[cur_frame_id]
-						self.map_surface.blit(pygame.transform.rotate(cur_frame, ROTATIONS_STRAIGHT[head_orientation] % 180), screen_pos)
-				elif idx == len(snake.pos) - 1 and snake.color in self.snake_parts:
+						draw_ops.append((("anim", ("drunk", self.drunk_anim.num_frames - snake.is_drunk, rotation % 180), pos), [pos]))
+				elif next_pos is None:
 					# Snake tail
-					tail_orientation = utils.subtract_tuples_int(snake.pos[idx - 1], pos)
-					self.map_surface.blit(pygame.transform.rotate(self.snake_parts[snake.color][utils.SnakeParts.TAIL.value], ROTATIONS_STRAIGHT[tail_orientation]), screen_pos)
-				elif idx != len(snake.pos) - 1 and snake.color in self.snake_parts:
+					tail_orientation = utils.subtract_positions(prev_pos, pos)
+					draw_ops.append((("snake_part", (snake.color, utils.SnakeParts.TAIL.value, ROTATIONS_STRAIGHT[tail_orientation]), pos), [pos]))
+				else:
 					# Snake body
-					orientation_front = utils.subtract_tuples_int(snake.pos[idx - 1], pos)
-					orientation_back = utils.subtract_tuples_int(pos, snake.pos[idx + 1])
-					if orientation_front == orientation_back:
-						snake_part_idx = utils.SnakeParts.BODY_STRAIGHT.value if orientation_front == orientation_back else utils.SnakeParts.BODY_CORNER.value
-						rotation = ROTATIONS_STRAIGHT[orientation_front] if orientation_front == orientation_back else ROTATIONS_CORNER[(orientation_front, orientation_back)]
-					else:
-						snake_part_idx = utils.SnakeParts.BODY_CORNER.value
-						rotation = ROTATIONS_CORNER[(orientation_front, orientation_back)]
-					self.map_surface.blit(pygame.transform.rotate(self.snake_parts[snake.color][snake_part_idx], rotation), screen_pos)
-			# Draw spit fire
-			if snake.spit_fire_posis:
-				screen_pos = self.grid_to_screen_pos(snake.spit_fire_posis[0 if head_orientation in [ORIENT_RIGHT, ORIENT_DOWN] else -1])
-				# The spit fire range might be cut because of obstacles, so we have to check for that and only show the image partially in that case
-				factor = len(snake.spit_fire_posis) / SPIT_FIRE_RANGE
-				trg_area = (0, 0, factor * self.fire.get_width(), self.fire.get_height())
-				trg_image = self.fire.subsurface(trg_area)
-				self.map_surface.blit(pygame.transform.rotate(trg_image, ROTATIONS_STRAIGHT[head_orientation]), screen_pos)
-		# Draw crashes
-		radius1 = self.edge_size / 2.0 * 0.7
-		radius2 = self.edge_size / 2.0 * 0.8
-		crashes_centers = tuple([utils.multiply_tuple(utils.add_tuples([self.grid_to_screen_pos(crash[0]), self.grid_to_screen_pos(crash[1]), self.square_size]), 0.5) for crash in crashes])
-		for center in crashes_centers:
-			pygame.draw.circle(self.map_surface, ORANGE, center, radius2)
-			pygame.draw.circle(self.map_surface, RED, center, radius1)
-		# Draw snake status
-		for surf, snake in zip(self.status_surfaces, snakes):
-			to_be_added_rects = [self.snake_chili_rect]
-			to_be_added_rects.extend(self.snake_burger_rects)
-			# Draw status images
-			surf.blit(self.snake_status_imgs[snake.color][utils.SnakeParts.HEAD.value], self.snake_status_imgs[snake.color][utils.SnakeParts.HEAD.value].get_rect(center=self.snake_head_img_rect.center))
-			surf.blit(self.snake_status_imgs[snake.color][utils.SnakeParts.BODY_STRAIGHT.value], self.snake_status_imgs[snake.color][utils.SnakeParts.HEAD.value].get_rect(center=self.snake_body_img_rect.center))
-			surf.blit(self.speedo_img, self.speedo_img.get_rect(center=self.snake_speed_img_rect.center))
-			# Display status texts
-			name_font = self.snake_name_font.render(snake.name, True, snake.color)
-			surf.blit(name_font, name_font.get_rect(center=self.snake_name_rect.center))
-			len_font = self.snake_info_font.render(str(len(snake.pos)), True, BLACK)
-			surf.blit(len_font, len_font.get_rect(center=self.snake_size_rect.center))
-			speed_font = self.snake_info_font.render(str(snake.speed), True, BLACK)
-			surf.blit(speed_font, speed_font.get_rect(center=self.snake_speed_rect.center))
-			if snake.is_drunk:
-				surf.blit(self.drunk_img, self.drunk_img.get_rect(center=self.snake_drunk_rect.center))
-				drunk_font = self.snake_info_font.render(str(int(snake.is_drunk / REOCC_PER_SEC)), True, BLACK if snake.is_drunk > 3 else RED)
-				surf.blit(drunk_font, drunk_font.get_rect(center=self.snake_drunk_rect.center))
-		# Draw score, time and target
+					snake_part_idx, rotation = BODY_PART_ROTATIONS[(utils.subtract_positions(prev_pos, pos), utils.subtract_positions(pos, next_pos))]
+					draw_ops.append((("snake_part", (snake.color, snake_part_idx, rotation), pos), [pos]))
+			# Spit fire
+			if snake.spit_fire_posis and (squares := [square for square in snake.spit_fire_posis if self.is_visible(square)]):
+				grid_pos = snake.spit_fire_posis[0 if head_orientation in [ORIENT_RIGHT, ORIENT_DOWN] else -1]
+				draw_ops.append((("anim", ("fire", len(snake.spit_fire_posis), ROTATIONS_STRAIGHT[head_orientation]), grid_pos), squares))
+		return draw_ops
+
+	def get_visible_segments(self, snake: Snake) -> [((int, int), (int, int), (int, int))]:
+		"""
+		Return the parts of the snake in the view, each as a tuple of the square of its neighbor towards the head, its own square and the square of its neighbor
+		towards the tail (the neighbors are None for the head and the tail). A snake longer than the view has squares is looked up square by square in the view
+		instead of walking along its whole body.
+		"""
+		view_start, view_end = self.get_view_area()
+		if len(snake.pos) <= self.view_size[0] * self.view_size[1]:
+			# Walk along the body with a sliding window, because indexing into the middle of the body deque isn't O(1). Parts outside the view aren't returned,
+			# but they are still needed for the orientation of their neighbors.
+			prev_squares = itertools.chain([None], snake.pos)
+			next_squares = itertools.chain(itertools.islice(snake.pos, 1, None), [None])
+			return [segment for segment in zip(prev_squares, snake.pos, next_squares) if self.is_visible(segment[1])]
+		segments = []
+		cells = snake.cells
+		for i in range(view_start[0], view_end[0]):
+			for j in range(view_start[1], view_end[1]):
+				if (seq := cells.get((i, j))) is not None:
+					# The neighbors along the body are the adjacent squares with the next higher and the next lower sequence number
+					prev_pos = next_pos = None
+					for square in [(i - 1, j), (i + 1, j), (i, j - 1), (i, j + 1)]:
+						if (adjacent_seq := cells.get(square)) == seq + 1:
+							prev_pos = square
+						elif adjacent_seq == seq - 1:
+							next_pos = square
+					segments.append((prev_pos, (i, j), next_pos))
+		return segments
+
+	def get_crash_draw_ops(self, crashes: [((int, int), (int, int))]) -> [(tuple, [(int, int)])]:
+		"""Return the draw operations for the crashes in the view, each together with the grid squares of the view it covers."""
+		return [(("crash", crash), squares) for crash in crashes if (squares := [square for square in set(crash) if self.is_visible(square)])]
+
+	def draw_op(self, op: tuple) -> None:
+		"""Draw a single draw operation onto the map surface."""
+		match op:
+			case ("item", obj, grid_pos):
+				self.map_surface.blit(self.items[obj], self.grid_to_screen_pos(grid_pos))
+			case ("bomb", frame_id, grid_pos):
+				self.map_surface.blit(self.bomb_anim.pygame_frames[frame_id], self.grid_to_screen_pos(grid_pos))
+			case ("explosion", frame_id, grid_pos):
+				self.map_surface.blit(self.explosion_anim.pygame_frames[frame_id], utils.subtract_positions(self.grid_to_screen_pos(grid_pos), self.square_size))
+			case ("snake_part", atlas_key, grid_pos):
+				self.map_surface.blit(self.snake_part_atlas[atlas_key], self.grid_to_screen_pos(grid_pos))
+			case ("anim", atlas_key, grid_pos):
+				self.map_surface.blit(self.anim_atlas[atlas_key], self.grid_to_screen_pos(grid_pos))
+			case ("crash", (pos1, pos2)):
+				center = utils.multiply_tuple(utils.add_tuples([self.grid_to_screen_pos(pos1), self.grid_to_screen_pos(pos2), self.square_size]), 0.5)
+				pygame.draw.circle(self.map_surface, ORANGE, center, self.edge_size / 2.0 * 0.8)
+				pygame.draw.circle(self.map_surface, RED, center, self.edge_size / 2.0 * 0.7)
+			case _:
+				raise ValueError(f"Unknown draw operation {op}")
+
+	@staticmethod
+	def get_cell_states(draw_ops: [(tuple, [(int, int)])]) -> {(int, int): tuple}:
+		"""Return a dict with the ordered draw operations for each covered grid square, used to detect changed squares between frames."""
+		cell_states = {}
+		for op, squares in draw_ops:
+			for square in squares:
+				cell_states.setdefault(square, []).append(op)
+		return {square: tuple(ops) for square, ops in cell_states.items()}
+
+	def draw_dirty_cells(self, cell_states: {(int, int): tuple}) -> [pygame.Rect]:
+		"""Redraw all grid squares whose state changed since the last frame and return their rects w.r.t. the main surface."""
+		dirty_rects = []
+		for square in self._cell_states.keys() | cell_states.keys():
+			if (ops := cell_states.get(square)) == self._cell_states.get(square):
+				continue
+			rect = pygame.Rect(self.grid_to_screen_pos(square), self.square_size)
+			abs_rect = rect.move(self.map_rect.topleft)
+			self.map_surface.set_clip(rect)
+			self.map_surface.blit(self._static_layer, rect, abs_rect)
+			for op in ops or ():
+				self.draw_op(op)
+			dirty_rects.append(abs_rect)
+		self.map_surface.set_clip(None)
+		return dirty_rects
+
+	@staticmethod
+	def get_status_state(snake: Snake) -> tuple:
+		"""Return everything that is displayed in the status surface of the given snake."""
+		drunk_secs = int(snake.is_drunk / REOCC_PER_SEC) if snake.is_drunk else None
+		return snake.name, snake.color, len(snake.pos), snake.speed, drunk_secs, snake.is_drunk > 3
+
+	def draw_status(self, surf: pygame.Surface, snake: Snake) -> None:
+		"""Draw the status of the given snake onto the given status surface."""
+		# Draw status images
+		surf.blit(self.snake_status_imgs[snake.color][utils.SnakeParts.HEAD.value], self.snake_status_imgs[snake.color][utils.SnakeParts.HEAD.value].get_rect(center=self.snake_head_img_rect.center))
+		surf.blit(self.snake_status_imgs[snake.color][utils.SnakeParts.BODY_STRAIGHT.value], self.snake_status_imgs[snake.color][utils.SnakeParts.HEAD.value].get_rect(center=self.snake_body_img_rect.center))
+		surf.blit(self.speedo_img, self.speedo_img.get_rect(center=self.snake_speed_img_rect.center))
+		# Display status texts
+		name_font = self.text_cache.render(self.snake_name_font, snake.name, True, snake.color)
+		surf.blit(name_font, name_font.get_rect(center=self.snake_name_rect.center))
+		len_font = self.text_cache.render(self.snake_info_font, str(len(snake.pos)), True, BLACK)
+		surf.blit(len_font, len_font.get_rect(center=self.snake_size_rect.center))
+		speed_font = self.text_cache.render(self.snake_info_font, str(snake.speed), True, BLACK)
+		surf.blit(speed_font, speed_font.get_rect(center=self.snake_speed_rect.center))
+		if snake.is_drunk:
+			surf.blit(self.drunk_img, self.drunk_img.get_rect(center=self.snake_drunk_rect.center))
+			drunk_font = self.text_cache.render(self.snake_info_font, str(int(snake.is_drunk / REOCC_PER_SEC)), True, BLACK if snake.is_drunk > 3 else RED)
+			surf.blit(drunk_font, drunk_font.get_rect(center=self.snake_drunk_rect.center))
+
+	def draw_dirty_status(self, snakes: [Snake], status_states: [tuple]) -> [pygame.Rect]:
+		"""Redraw all snake status surfaces whose content changed since the last frame and return their rects."""
+		dirty_rects = []
+		for idx, (surf, rect, state) in enumerate(zip(self.status_surfaces, self.snake_status_rects, status_states)):
+			if state == self._status_states[idx]:
+				continue
+			self.main_surface.blit(self._static_layer, rect, rect)
+			if state is not None:
+				self.draw_status(surf, snakes[idx])
+			dirty_rects.append(rect)
+		return dirty_rects
+
+	def get_score_state(self, level: Level, snakes: [Snake], paused_time: int) -> (str, str, str, (int, int, int)):
+		"""Return the goal, score and time strings as well as their color."""
 		goal_str = f"GOAL: "
 		score_str = f"SCORE: {sum(snake.score for snake in snakes):3d}"
 		time_str = f"TIME: {utils.get_time_string_for_ms(pygame.time.get_ticks() - paused_time)}"
@@ -180,27 +413,118 @@ class Graphics:
 		elif level.goal == utils.Goals.SURVIVE:
 			goal_str += "Survive"
 			time_str += " / {}".format(utils.get_time_string_for_ms(level.target * 1000))
-		goal_font = self.score_font.render(goal_str, True, score_color := FILENAMES_GAME_BGS_WITH_SCORE_COLORS[self.bg_name][1])
-		score_font = self.score_font.render(score_str, True, score_color)
-		time_font = self.score_font.render(time_str, True, score_color)
-		self.main_surface.blit(goal_font, score_font.get_rect(topleft=utils.add_two_tuples(self.score_rect.topleft, (0, goal_font.get_height()))))
-		self.main_surface.blit(score_font, score_font.get_rect(topleft=utils.add_two_tuples(self.score_rect.topleft, (0, 4 * score_font.get_height()))))
-		self.main_surface.blit(time_font, time_font.get_rect(topleft=utils.add_two_tuples(self.score_rect.topleft, (0, 6 * score_font.get_height()))))
-		pygame.display.update()
+		return goal_str, score_str, time_str, FILENAMES_GAME_BGS_WITH_SCORE_COLORS[self.bg_name][1]
+
+	def draw_score(self, score_state: (str, str, str, (int, int, int))) -> pygame.Rect:
+		"""Draw score, time and target onto the main surface and return the rect containing all three texts."""
+		goal_str, score_str, time_str, score_color = score_state
+		goal_font = self.text_cache.render(self.score_font, goal_str, True, score_color)
+		score_font = self.text_cache.render(self.score_font, score_str, True, score_color)
+		time_font = self.text_cache.render(self.score_font, time_str, True, score_color)
+		rects = [self.main_surface.blit(goal_font, score_font.get_rect(topleft=utils.add_two_tuples(self.score_rect.topleft, (0, goal_font.get_height())))),
+				 self.main_surface.blit(score_font, score_font.get_rect(topleft=utils.add_two_tuples(self.score_rect.topleft, (0, 4 * score_font.get_height())))),
+				 self.main_surface.blit(time_font, time_font.get_rect(topleft=utils.add_two_tuples(self.score_rect.topleft, (0, 6 * score_font.get_height()))))]
+		self._score_drawn_rect = rects[0].unionall(rects[1:])
+		return self._score_drawn_rect
+
+	def draw_dirty_score(self, score_state: (str, str, str, (int, int, int))) -> [pygame.Rect]:
+		"""Redraw score, time and target if they changed since the last frame and return the affected rects."""
+		if score_state == self._score_state:
+			return []
+		old_rect = self._score_drawn_rect
+		self.main_surface.blit(self._static_layer, old_rect, old_rect)
+		return [old_rect, self.draw_score(score_state)]
+
+	def draw_profiler_overlay(self) -> [pygame.Rect]:
+		"""Draw the profiler statistics in the top left corner of the screen (if the profiler is enabled) and return the affected rects."""
+		if not self.profiler.enabled:
+			return []
+		if self._overlay_surface is None or self.profiler.overlay_lines != self._overlay_lines:
+			# Only render the texts again when the statistics changed
+			self._overlay_lines = list(self.profiler.overlay_lines)
+			line_surfs = [self.profiler_font.render(line, True, WHITE) for line in self._overlay_lines or ["profiling..."]]
+			# The overlay never shrinks while it is shown, so that it always covers the previous one
+			size = (max(surf.get_width() for surf in line_surfs), sum(surf.get_height() for surf in line_surfs))
+			if self._overlay_surface is not None:
+				size = (max(size[0], self._overlay_surface.get_width()), max(size[1], self._overlay_surface.get_height()))
+			self._overlay_surface = pygame.Surface(size)
+			top = 0
+			for surf in line_surfs:
+				self._overlay_surface.blit(surf, (0, top))
+				top += surf.get_height()
+		self._overlay_shown = True
+		return [self.main_surface.blit(self._overlay_surface, (0, 0))]
+
+	def get_static_layer(self, level: Level) -> pygame.Surface:
+		"""
+		Return the static layer (background and walls) for the given level. It only holds the walls in the view, so with the camera, it is rebuilt whenever the view
+		moves. If the layer has to be rebuilt, a full redraw is forced.
+		"""
+		key = (id(level), level.map_version, self.bg_name, self.view_origin)
+		if self._static_layer is None or key != self._static_layer_key:
+			self._static_layer = self.get_bg(self.bg_name).copy()
+			map_surface = self._static_layer.subsurface(self.map_rect)
+			for grid_pos in level.get_wall_squares(self.get_view_area() if self.camera else None):
+				map_surface.blit(self.wall, self.grid_to_screen_pos(grid_pos))
+			self._static_layer_key = key
+			self.invalidate()
+		return self._static_layer
+
+	def update_camera(self, snakes: [Snake]) -> None:
+		"""
+		Let the view follow the snakes (if the camera is used). The view only moves when the followed point (the head of the followed snake or the center of all heads)
+		comes closer than CAMERA_MARGIN squares to the edge of the view, and is then centered on it, so that the static layer is rarely rebuilt.
+		"""
+		if not self.camera:
+			return
+		if self.follow is not None and self.follow < len(snakes) and snakes[self.follow].pos:
+			heads = [snakes[self.follow].pos[0]]
+		else:
+			heads = [snake.pos[0] for snake in snakes if snake.pos]
+		if heads:
+			focus = (sum(head[0] for head in heads) // len(heads), sum(head[1] for head in heads) // len(heads))
+		else:
+			focus = (self.num_cols // 2, self.num_rows // 2)
+		origin = list(self.view_origin)
+		for axis, map_len in enumerate((self.num_cols, self.num_rows)):
+			margin = min(CAMERA_MARGIN, (self.view_size[axis] - 1) // 2)
+			if not origin[axis] + margin <= focus[axis] < origin[axis] + self.view_size[axis] - margin:
+				origin[axis] = focus[axis] - self.view_size[axis] // 2
+			origin[axis] = max(0, min(origin[axis], map_len - self.view_size[axis]))
+		self.view_origin = tuple(origin)
+
+	def get_view_area(self) -> ((int, int), (int, int)):
+		"""Return the top left square of the view and the square after its bottom right one."""
+		return self.view_origin, (self.view_origin[0] + self.view_size[0], self.view_origin[1] + self.view_size[1])
 
 	def grid_to_screen_pos(self, grid_pos: (int, int)) -> (int, int):
-		"""Translates coordinates in the grid to the screen position of the topleft corner of the corresponding rect"""
+		"""Translates coordinates in the grid to the screen position of the topleft corner of the corresponding rect (w.r.t. the map surface)"""
+		if self.camera:
+			return (grid_pos[1] - self.view_origin[1]) * self.edge_size, (grid_pos[0] - self.view_origin[0]) * self.edge_size
 		return self.square_posis[grid_pos[0]][grid_pos[1]]
 
+	def is_on_map(self, grid_pos: (int, int)) -> bool:
+		"""Return True if the given grid position lies inside the map."""
+		return 0 <= grid_pos[0] < self.num_cols and 0 <= grid_pos[1] < self.num_rows
+
+	def is_visible(self, grid_pos: (int, int)) -> bool:
+		"""Return True if the given grid position lies inside the view (without the camera, inside the map)."""
+		return 0 <= grid_pos[0] - self.view_origin[0] < self.view_size[0] and 0 <= grid_pos[1] - self.view_origin[1] < self.view_size[1]
+
 	def change_background(self, bg_name: str) -> None:
 		"""
 		Change the background.
 
 		:param bg_name: Must match one of the background names in constants.BG_ITEMS
 		"""
-		if bg_name in self._cached_bgs:
+		if bg_name in FILENAMES_GAME_BGS_WITH_SCORE_COLORS:
 			self.bg_name = bg_name
-			self.bg = self._cached_bgs[bg_name]
+			self._static_layer = None
+			self.invalidate()
+
+	def invalidate(self) -> None:
+		"""Force a full redraw in the next frame, e.g. after something else (like a menu) has been drawn onto the main surface."""
+		self._needs_full_redraw = True
 
 	def display_map(self, level: Level):
 		"""Display the map without any snakes."""
@@ -1,51 +1,102 @@
 """Module for the level class in the friendly snakes package"""
-import copy
 
 # ----- Imports --------
+from typing import Callable
 import utils
-import pygame
-from constants import DROP_ITEM_RATE
+from constants import DROP_ITEM_RATE, USE_ARRAY_GRID, ORIENTATIONS
 
-pygame.init()
+try:
+	import numpy
+except ImportError:
+	numpy = None
 
 # ----- Constants ------
+# Attributes that are only set once the map is loaded
+MAP_ATTRIBUTES = {"orig_map", "map", "occupancy", "neighbors"}
 
 
 # ----- Classes --------
 class Level:
 	"""The class for the levels"""
 
-	def __init__(self, level_info: {}):
+	def __init__(self, level_info: {}, use_array: bool = USE_ARRAY_GRID, load_map: Callable[[], list] = None):
+		"""
+		Initialize the level.
+
+		:param level_info: Dict with the level infos as stored in the level json file
+		:param use_array: If True, the map is stored as a numpy uint16 array of object values instead of a list of lists of objects. Intended for large maps.
+		:param load_map: Optional function that returns the original map (see init_map), e.g. from a level pack. In that case, level_info holds num_cols, num_rows and
+		start_pos instead of the map, and the map is only loaded when it is used for the first time (see __getattr__).
+		"""
 		self.name = ""
 		self.id = None
-		self.orig_map = []
-		self.map = []
 		self.start_pos = []
+		self.num_cols = 0
+		self.num_rows = 0
 		self.item_rates = {}
 		self.drop_rate = DROP_ITEM_RATE
 		self.goal = utils.Goals.NONE
 		self.target = None
 		self.bg = None
 		self.highscore = []
+		# map_version is incremented on every reset, so that everything derived from the map (like the static map layer in the graphics) can be invalidated
+		self.map_version = 0
+		# Squares changed by set_object or fill_area since the last call of pop_changed_squares, or None if the changes aren't tracked (see track_changes)
+		self.changed_squares: {(int, int)} = None
 		# Read infos from level_info dict
+		map_str = None
 		for k, v in level_info.items():
 			if k == "map":
-				self.orig_map = utils.strings_to_objects(v)
-				self.map = copy.deepcopy(self.orig_map)
-				self.start_pos = self.get_start_pos(v, ",")
+				map_str = v
 			elif k == "bg":
 				self.bg = utils.Backgrounds[v]
 			elif k == "goal":
 				self.goal = utils.Goals[v]
 			elif hasattr(self, k):
 				setattr(self, k, v)
-		self.num_cols = len(self.map)
-		self.num_rows = len(self.map[0])
+		self.use_array = use_array
+		if self.use_array and numpy is None:
+			raise ImportError("The array-backed map requires numpy")
+		if load_map is None:
+			self.start_pos = self.get_start_pos(map_str, ",")
+			self.init_map(utils.strings_to_objects(map_str))
+		else:
+			self.start_pos = [[tuple(pos) for pos in snake_pos] for snake_pos in self.start_pos]
+			self._load_map = load_map
 		# Init item list according to their rates
 		self.items = []
 		for k, v in self.item_rates.items():
 			self.items.extend([utils.string_to_object(k)] * v)
 
+	def __getattr__(self, name: str):
+		"""Load the map of a level whose map isn't loaded yet, when the map or something derived from it is accessed for the first time."""
+		# Only called for attributes that don't exist (yet)
+		if name in MAP_ATTRIBUTES and (load_map := self.__dict__.pop("_load_map", None)) is not None:
+			self.init_map(load_map())
+			return getattr(self, name)
+		raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+
+	def init_map(self, orig_map) -> None:
+		"""
+		Set the original map and build everything derived from it (the current map and the neighbor table).
+
+		:param orig_map: The map as a list of lists of objects, or (for levels using an array) as a numpy uint16 array of object values
+		"""
+		if self.use_array:
+			if not isinstance(orig_map, numpy.ndarray):
+				orig_map = numpy.array([[obj.value for obj in row] for row in orig_map], dtype=numpy.uint16)
+			self.orig_map = orig_map
+			self.map = self.orig_map.copy()
+			# Scratch layer for marking the squares occupied by snakes
+			self.occupancy = numpy.zeros(self.map.shape, dtype=bool)
+		else:
+			self.orig_map = orig_map
+			self.map = [row[:] for row in self.orig_map]
+		self.num_cols = len(self.map)
+		self.num_rows = len(self.map[0])
+		# Lookup table for the neighbors of each square, used through get_neighbor and get_neighbors
+		self.neighbors = utils.get_neighbor_table(self.num_cols, self.num_rows, ORIENTATIONS)
+
 	def get_start_pos(self, map_str: [str], sep: str) -> [[(int, int)]]:
 		"""
 		Determine the start position of the snakes in the given map.
@@ -69,4 +120,111 @@ class Level:
 
 	def reset(self):
 		"""Reset all variables to their start state."""
-		self.map = copy.deepcopy(self.orig_map)
+		if self.use_array:
+			numpy.copyto(self.map, self.orig_map)
+		else:
+			self.map = [row[:] for row in self.orig_map]
+		self.map_version += 1
+		if self.changed_squares is not None:
+			# Everything may have changed, which is told by the new map_version
+			self.changed_squares.clear()
+
+	def track_changes(self) -> None:
+		"""Start tracking the squares that are changed by set_object and fill_area, e.g. for sending only the changed squares over the network."""
+		self.changed_squares = set()
+
+	def pop_changed_squares(self) -> {(int, int)}:
+		"""Return the squares changed since the last call (or since track_changes) and start collecting anew."""
+		changed_squares, self.changed_squares = self.changed_squares, set()
+		return changed_squares
+
+	def is_on_map(self, pos: (int, int)) -> bool:
+		"""Return True if the given position lies inside the map."""
+		return 0 <= pos[0] < self.num_cols and 0 <= pos[1] < self.num_rows
+
+	def get_neighbor(self, pos: (int, int), orientation: (int, int)) -> (int, int):
+		"""Return the neighbor of the given position in the given orientation (which lies outside the map for positions on the border)."""
+		return self.neighbors[orientation][pos[0] * self.num_rows + pos[1]]
+
+	def get_neighbors(self, pos: (int, int)) -> [(int, int)]:
+		"""Return the neighbors of the given position in all orientations."""
+		idx = pos[0] * self.num_rows + pos[1]
+		return [neighbors[idx] for neighbors in self.neighbors.values()]
+
+	def get_object(self, pos: (int, int)) -> utils.Objects:
+		"""Return the object at the given position."""
+		if self.use_array:
+			return utils.OBJECTS_BY_VALUE[int(self.map[pos])]
+		return self.map[pos[0]][pos[1]]
+
+	def set_object(self, pos: (int, int), obj: utils.Objects) -> None:
+		"""Put the given object at the given position."""
+		if self.use_array:
+			self.map[pos] = obj.value
+		else:
+			self.map[pos[0]][pos[1]] = obj
+		if self.changed_squares is not None:
+			self.changed_squares.add(pos)
+
+	def fill_area(self, center: (int, int), obj: utils.Objects) -> None:
+		"""Put the given object on all squares of the 3x3 area around the given center, except for the indestructible ones."""
+		row, col = center
+		if self.use_array:
+			top, left = max(row - 1, 0), max(col - 1, 0)
+			area = self.map[top:row + 2, left:col + 2]
+			destructible = (area & utils.Indestructible.value) == 0
+			area[destructible] = obj.value
+			if self.changed_squares is not None:
+				rows, cols = numpy.nonzero(destructible)
+				self.changed_squares.update((top + i, left + j) for i, j in zip(rows.tolist(), cols.tolist()))
+			return
+		for i, j in utils.get_area_squares(center):
+			if self.is_on_map((i, j)) and self.map[i][j] not in utils.Indestructible:
+				self.map[i][j] = obj
+				if self.changed_squares is not None:
+					self.changed_squares.add((i, j))
+
+	def get_free_squares(self, occupied: [(int, int)]) -> [(int, int)]:
+		"""Return all empty squares of the map (in row-major order) that are not in the given list of occupied squares."""
+		if self.use_array:
+			self.occupancy[:] = False
+			if occupied:
+				rows, cols = zip(*occupied)
+				self.occupancy[list(rows), list(cols)] = True
+			rows, cols = numpy.nonzero((self.map == utils.Objects.NONE.value) & ~self.occupancy)
+			return list(zip(rows.tolist(), cols.tolist()))
+		occupied = set(occupied)
+		return [(i, j) for i, row in enumerate(self.map) for j, obj in enumerate(row) if obj == utils.Objects.NONE and (i, j) not in occupied]
+
+	def get_item_squares(self, area: ((int, int), (int, int)) = None) -> [((int, int), utils.Objects)]:
+		"""
+		Return the position and the object of all squares that are neither empty nor a wall.
+
+		:param area: Optional top left square and the square after the bottom right one of the part of the map to search (default: the whole map)
+		"""
+		(top, left), (bottom, right) = area if area else ((0, 0), (self.num_cols, self.num_rows))
+		if self.use_array:
+			window = self.map[top:bottom, left:right]
+			rows, cols = numpy.nonzero((window != utils.Objects.NONE.value) & (window != utils.Objects.WALL.value))
+			return [((top + row, left + col), utils.OBJECTS_BY_VALUE[value]) for row, col, value in zip(rows.tolist(), cols.tolist(), window[rows, cols].tolist())]
+		return [((i, j), obj) for i in range(top, bottom) for j, obj in enumerate(self.map[i][left:right], left) if obj != utils.Objects.NONE and obj != utils.Objects.WALL]
+
+	def get_wall_squares(self, area: ((int, int), (int, int)) = None) -> [(int, int)]:
+		"""
+		Return the positions of all walls in the original map.
+
+		:param area: Optional top left square and the square after the bottom right one of the part of the map to search (default: the whole map)
+		"""
+		(top, left), (bottom, right) = area if area else ((0, 0), (self.num_cols, self.num_rows))
+		if self.use_array:
+			rows, cols = numpy.nonzero(self.orig_map[top:bottom, left:right] == utils.Objects.WALL.value)
+			return [(top + row, left + col) for row, col in zip(rows.tolist(), cols.tolist())]
+		return [(i, j) for i in range(top, bottom) for j, obj in enumerate(self.orig_map[i][left:right], left) if obj == utils.Objects.WALL]
+
+	def get_spit_fire_squares(self, pos: (int, int), direction: (int, int), num_squares: int) -> [(int, int)]:
+		"""Return the next squares, starting from the given pos in the given direction, but stop if an indestructible Object is in the way"""
+		next_squares = utils.get_next_squares(pos, direction, num_squares)
+		for idx, square in enumerate(next_squares):
+			if not self.is_on_map(square) or self.get_object(square) in utils.Indestructible:
+				return next_squares[0:idx]
+		return next_squares
@@ -0,0 +1,197 @@
+"""
+Module for level packs: the levels of a level json file compiled into a binary file that is read through mmap. At startup, only the index and the small infos of
+the levels (name, goal, item rates, start positions, ...) are decoded, and the map of a level is decoded when it is used for the first time. So the startup
+time and the memory hardly depend on the number of levels. The pack is compiled again whenever the level json file changes. Each map has a checksum, and a
+damaged map is read from the level json file instead.
+Run from the src directory to compile a pack explicitly, e.g. "python levelpack.py ../res/levels.json ../cache/levels.pack".
+"""
+
+# ----- Imports --------
+import argparse
+import array
+import json
+import mmap
+import os
+import struct
+import sys
+import zlib
+import utils
+from level import Level
+from constants import *
+
+try:
+	import numpy
+except ImportError:
+	numpy = None
+
+# ----- Constants ------
+# File format (little endian):
+#   Header: magic, version, number of levels, modification time (in ns) and size of the level json file the pack was compiled from
+#   Index: one entry per level with id, goal (index in utils.Goals), number of columns and rows, offset and length of the infos, offset and crc32 of the map
+#   Infos: the level infos of each level as json, without the map but with num_cols, num_rows and start_pos
+#   Maps: the object value of each square as uint16, num_cols * num_rows values per level (in the order of Level.map)
+PACK_HEADER = struct.Struct("<4sHIqq")
+PACK_INDEX_ENTRY = struct.Struct("<iBHHQIQI")
+PACK_MAGIC = b"FSLP"
+PACK_VERSION = 2
+
+
+# ----- Methods ------
+def get_source_key(json_filename: str) -> (int, int):
+	"""Return the modification time (in ns) and the size of the level json file, which tell whether a pack is up to date."""
+	stat = os.stat(json_filename)
+	return stat.st_mtime_ns, stat.st_size
+
+
+def compile_level_pack(json_filename: str = FILENAME_LEVEL_INFO, pack_filename: str = FILENAME_LEVEL_PACK) -> None:
+	"""Compile the levels of the given level json file into a level pack. The pack is written to a temporary file first and then replaces the old pack at once."""
+	with open(json_filename) as file_level_info:
+		levels_info = json.load(file_level_info)
+	infos, maps = [], []
+	for level_info in levels_info:
+		level = Level(level_info)
+		info = {k: v for k, v in level_info.items() if k != "map"}
+		info.update({"num_cols": level.num_cols, "num_rows": level.num_rows, "start_pos": level.start_pos})
+		infos.append(json.dumps(info).encode())
+		values = array.array("H", (obj.value for row in level.orig_map for obj in row))
+		if sys.byteorder == "big":
+			values.byteswap()
+		maps.append((level, values.tobytes()))
+	index_offset = PACK_HEADER.size
+	info_offset = index_offset + PACK_INDEX_ENTRY.size * len(levels_info)
+	map_offset = info_offset + sum(len(info) for info in infos)
+	index = []
+	for info, (level, map_bytes) in zip(infos, maps):
+		index.append(PACK_INDEX_ENTRY.pack(level.id if level.id is not None else -1, list(utils.Goals).index(level.goal), level.num_cols, level.num_rows, info_offset, len(info), map_offset,
+										   zlib.crc32(map_bytes)))
+		info_offset += len(info)
+		map_offset += len(map_bytes)
+	os.makedirs(os.path.dirname(os.path.abspath(pack_filename)), exist_ok=True)
+	tmp_filename = f"{pack_filename}.{os.getpid()}.tmp"
+	with open(tmp_filename, "wb") as pack_file:
+		pack_file.write(PACK_HEADER.pack(PACK_MAGIC, PACK_VERSION, len(levels_info), *get_source_key(json_filename)))
+		pack_file.write(b"".join(index))
+		pack_file.write(b"".join(infos))
+		pack_file.write(b"".join(map_bytes for _, map_bytes in maps))
+	os.replace(tmp_filename, pack_filename)
+
+
+def is_pack_current(pack_filename: str, json_filename: str) -> bool:
+	"""Return True if the level pack exists and was compiled from the current level json file."""
+	try:
+		with open(pack_filename, "rb") as pack_file:
+			magic, version, _, mtime_ns, size = PACK_HEADER.unpack(pack_file.read(PACK_HEADER.size))
+	except (OSError, struct.error):
+		return False
+	return magic == PACK_MAGIC and version == PACK_VERSION and (mtime_ns, size) == get_source_key(json_filename)
+
+
+def load_levels(json_filename: str = FILENAME_LEVEL_INFO, pack_filename: str = FILENAME_LEVEL_PACK, use_array: bool = USE_ARRAY_GRID) -> [Level]:
+	"""
+	Return all levels of the given level json file, with their maps loaded lazily from the level pack. The pack is compiled first if it is missing or out of date,
+	and compiled again if it is damaged (e.g. truncated) although its header is current. If the pack can't be written or read (or pack_filename is None), the
+	levels are read from the json file directly.
+	"""
+	if pack_filename:
+		for recompile in [False, True]:
+			try:
+				if recompile or not is_pack_current(pack_filename, json_filename):
+					compile_level_pack(json_filename, pack_filename)
+				return LevelPack(pack_filename, json_filename).get_levels(use_array)
+			except OSError:
+				break
+			except (ValueError, struct.error):
+				pass
+	with open(json_filename) as file_level_info:
+		return [Level(level_info, use_array) for level_info in json.load(file_level_info)]
+
+
+# ----- Classes --------
+class LevelPack:
+	"""Class for reading a level pack. The file stays mapped into memory as long as any level of the pack may still load its map."""
+
+	def __init__(self, filename: str, json_filename: str = None):
+		"""
+		Map the given pack file into memory and read its index.
+
+		:param json_filename: The level json file the pack was compiled from. If given, a damaged map is read from it instead (see read_map).
+		"""
+		with open(filename, "rb") as pack_file:
+			self._mm = mmap.mmap(pack_file.fileno(), 0, access=mmap.ACCESS_READ)
+		try:
+			magic, version, num_levels, _, _ = PACK_HEADER.unpack_from(self._mm)
+			if magic != PACK_MAGIC or version != PACK_VERSION:
+				raise ValueError(f"{filename} is not a level pack of version {PACK_VERSION}")
+			self.filename = filename
+			self.json_filename = json_filename
+			self.index = list(PACK_INDEX_ENTRY.iter_unpack(self._mm[PACK_HEADER.size:PACK_HEADER.size + num_levels * PACK_INDEX_ENTRY.size]))
+			# The maps are only read when they are used, so a truncated file has to be detected here
+			end = max([PACK_HEADER.size + num_levels * PACK_INDEX_ENTRY.size] + [max(info_offset + info_len, map_offset + 2 * num_cols * num_rows)
+																			  for _, _, num_cols, num_rows, info_offset, info_len, map_offset, _ in self.index])
+			if len(self.index) != num_levels or len(self._mm) != end:
+				raise ValueError(f"{filename} is truncated or damaged")
+		except (ValueError, struct.error):
+			self._mm.close()
+			raise
+
+	def __len__(self) -> int:
+		return len(self.index)
+
+	def get_info(self, idx: int) -> {}:
+		"""Return the level infos of the level with the given index."""
+		_, _, _, _, info_offset, info_len, _, _ = self.index[idx]
+		return json.loads(self._mm[info_offset:info_offset + info_len])
+
+	def get_levels(self, use_array: bool = USE_ARRAY_GRID) -> [Level]:
+		"""Return all levels of the pack. Their maps are only decoded when they are used for the first time."""
+		return [Level(self.get_info(idx), use_array, lambda idx=idx: self.read_map(idx, use_array)) for idx in range(len(self.index))]
+
+	def read_map(self, idx: int, use_array: bool = USE_ARRAY_GRID):
+		"""
+		Return the original map of the level with the given index, as a list of lists of objects or (if use_array) as a numpy uint16 array of object values.
+		If the map doesn't match its checksum, it is read from the level json file instead (see read_json_map).
+		"""
+		_, _, num_cols, num_rows, _, _, map_offset, map_crc = self.index[idx]
+		map_bytes = self._mm[map_offset:map_offset + 2 * num_cols * num_rows]
+		if zlib.crc32(map_bytes) != map_crc:
+			return self.read_json_map(idx, use_array)
+		if use_array:
+			return numpy.frombuffer(map_bytes, dtype="<u2").reshape(num_cols, num_rows).astype(numpy.uint16)
+		values = array.array("H", map_bytes)
+		if sys.byteorder == "big":
+			values.byteswap()
+		objects = [utils.OBJECTS_BY_VALUE[value] for value in values]
+		return [objects[col * num_rows:(col + 1) * num_rows] for col in range(num_cols)]
+
+	def read_json_map(self, idx: int, use_array: bool = USE_ARRAY_GRID):
+		"""
+		Return the original map of the level with the given index from the level json file, for a map that is damaged in the pack. The pack is compiled again,
+		so that the next start reads an intact pack (the levels already loaded keep using this one).
+		"""
+		level_id = self.index[idx][0]
+		if self.json_filename is None:
+			raise ValueError(f"The map of level {level_id} in {self.filename} is damaged")
+		with open(self.json_filename) as file_level_info:
+			levels_info = json.load(file_level_info)
+		level = Level(levels_info[idx], use_array) if idx < len(levels_info) else None
+		if level is None or (level.id if level.id is not None else -1) != level_id:
+			raise ValueError(f"The map of level {level_id} in {self.filename} is damaged and {self.json_filename} doesn't hold this level anymore")
+		try:
+			compile_level_pack(self.json_filename, self.filename)
+		except OSError:
+			pass
+		return level.orig_map
+
+
+# ----- Main script ----
+def main():
+	parser = argparse.ArgumentParser(description="Compile a level json file into a level pack.")
+	parser.add_argument("json_filename", nargs="?", default=FILENAME_LEVEL_INFO, help="The level json file")
+	parser.add_argument("pack_filename", nargs="?", default=FILENAME_LEVEL_PACK, help="The level pack to write")
+	args = parser.parse_args()
+	compile_level_pack(args.json_filename, args.pack_filename)
+	print(f"Compiled {len(LevelPack(args.pack_filename))} levels into {args.pack_filename}")
+
+
+if __name__ == "__main__":
+	main()
@@ -6,6 +6,7 @@ from enum import Enum
 from dataclasses import dataclass
 from typing import Callable, Union
 from constants import *
+import assets
 import pygame
 import pygame_menu
 
@@ -198,13 +199,15 @@ class Menu:
 			[pygame.K_KP8, pygame.K_KP4, pygame.K_KP5, pygame.K_KP6],
 			[pygame.K_i, pygame.K_j, pygame.K_k, pygame.K_l]]
 		self.scaling_factor = scaling_factor if scaling_factor else main_surface.get_height() / BENCHMARK_HEIGHT
+		# Images are shared with the other menus via the asset registry. The keys of the acquired images are kept for releasing them.
+		self.acquired_assets = []
 		# Background
 		self.bg_img = bg_img
 		# Initialize the menu - 1st, define all the areas, rects, images, etc.
 		#   Menu area
 		self.menu_rect = rect
 		self.menu_surf = self.main_surface.subsurface(self.menu_rect)
-		self.menu_frame_img = pygame.transform.scale(pygame.image.load(FILENAME_MENU_FRAME).convert_alpha(), self.menu_rect.size)
+		self.menu_frame_img = self.acquire_asset("image", FILENAME_MENU_FRAME, self.menu_rect.size)
 		#   Button area inside the menu area
 		buttons_area_start = utils.mult_tuple_to_int(BUTTON_AREA_START, self.scaling_factor)
 		buttons_area_size = utils.mult_tuple_to_int(BUTTON_AREA_SIZE, self.scaling_factor)
@@ -215,9 +218,8 @@ class Menu:
 		self.button_size = (self.buttons_area_rect.w, int(self.scaling_factor * BUTTON_HEIGHT))
 		free_space = int((self.buttons_area_rect.h - num_buttons * self.button_size[1]) / (num_buttons - 1))
 		self.button_rects = [pygame.Rect((0, i * (self.button_size[1] + free_space)), self.button_size) for i in range(num_buttons)]
-		self.button_imgs_orig = {state: pygame.image.load(FILENAMES_BUTTON[state]).convert_alpha() for state in WidgetState}
-		self.button_imgs = {state: pygame.transform.scale(img_orig, self.button_size) for state, img_orig in self.button_imgs_orig.items()}
-		self.button_base_imgs = {state: pygame_menu.BaseImage(image_path=FILENAMES_BUTTON[state], drawing_mode=pygame_menu.baseimage.IMAGE_MODE_FILL) for state in WidgetState}
+		self.button_imgs = {state: self.acquire_asset("image", FILENAMES_BUTTON[state], self.button_size) for state in WidgetState}
+		self.button_base_imgs = {state: self.acquire_asset("base_image", FILENAMES_BUTTON[state]) for state in WidgetState}
 		#   Texts for the buttons
 		self.font_size = int(BUTTON_FONT_SIZE * self.scaling_factor)
 		self.button_font_name = FONT_SNAKE_CHAN
@@ -235,10 +237,10 @@ class Menu:
 		self.sel_bg_name = GAME_BG_ITEMS[0][0]
 		self.submenu_options = self.init_submenu_options()
 		# Variables for submenu controls
-		self.controls_bg_img = pygame_menu.BaseImage(image_path=FILENAME_CONTROLS_BG, drawing_mode=pygame_menu.baseimage.IMAGE_MODE_FILL).resize(*(utils.mult_tuple_to_int(CONTROL_BG_IMG_SIZE, self.scaling_factor)))
+		self.controls_bg_img = self.acquire_asset("base_image", FILENAME_CONTROLS_BG, utils.mult_tuple_to_int(CONTROL_BG_IMG_SIZE, self.scaling_factor))
 		self.sel_player_id_in_submenu_controls = 0
-		trg_w, trg_h = utils.mult_tuple_to_int(SNAKE_COLOR_IMG_SIZE, self.scaling_factor)
-		self.snake_color_imgs = {color: pygame_menu.BaseImage(image_path=FILENAMES_SNAKE_COLORS[color], drawing_mode=pygame_menu.baseimage.IMAGE_MODE_FILL).resize(trg_w, trg_h) for color in self.snake_colors}
+		trg_size = utils.mult_tuple_to_int(SNAKE_COLOR_IMG_SIZE, self.scaling_factor)
+		self.snake_color_imgs = {color: self.acquire_asset("base_image", FILENAMES_SNAKE_COLORS[color], trg_size) for color in self.snake_colors}
 		self.submenu_controls = self.init_submenu_controls(enable_controls_change)
 		self.mini_menu_change_controls = self.init_mini_menu_change_controls()
 		# Variables for submenu levels
@@ -246,8 +248,8 @@ class Menu:
 		self.submenu_levels = None
 		self.level_names = level_names
 		if has_submenu_levels:
-			trg_w, trg_h = utils.mult_tuple_to_int(LEVEL_PREV_IMG_SIZE, self.scaling_factor)
-			self.level_prev_imgs = [pygame_menu.BaseImage(image_path=FILENAME_LVL_PREV.format(i), drawing_mode=pygame_menu.baseimage.IMAGE_MODE_FILL).resize(trg_w, trg_h) for i in range(len(level_names))]
+			trg_size = utils.mult_tuple_to_int(LEVEL_PREV_IMG_SIZE, self.scaling_factor)
+			self.level_prev_imgs = [self.acquire_asset("base_image", FILENAME_LVL_PREV.format(i), trg_size) for i in range(len(level_names))]
 			self.submenu_levels = self.init_submenu_level_selection()
 		# Variables for submenu highscore
 		self.highscores = highscores
@@ -258,6 +260,17 @@ class Menu:
 		self.has_entered_team_name = False
 		self.mini_menu_new_highscore = self.init_mini_menu_new_highscore()
 
+	def acquire_asset(self, kind: str, filename: str, size: (int, int) = None):
+		"""Return the given (shared) asset from the asset registry. Must not be modified."""
+		self.acquired_assets.append((kind, filename, size))
+		return assets.REGISTRY.acquire(kind, filename, size)
+
+	def release_assets(self) -> None:
+		"""Release all assets this menu acquired from the asset registry. The menu can't be used afterwards."""
+		for asset in self.acquired_assets:
+			assets.REGISTRY.release(*asset)
+		self.acquired_assets = []
+
 	def init_submenu_options(self) -> pygame_menu.Menu:
 		"""Initialize and return the submenu for the options."""
 		my_widgets = [MyRangeSlider("Music volume", self.music_volume, self.change_music_volume),
@@ -527,7 +540,8 @@ class Menu:
 		button_pushed = False
 		submenus = [self.submenu_options, self.submenu_controls, self.submenu_highscore, self.mini_menu_new_highscore] + ([self.submenu_levels] if self.submenu_levels else [])
 		while not self.start_game and not self.exit and not self.has_entered_team_name:
-			events = pygame.event.get()
+			# Sleep until there is input instead of redrawing the unchanged menu at full frame rate
+			events = utils.wait_for_events(MENU_IDLE_REDRAW_INTERVAL)
 			active_submenu = [menu for menu in submenus if menu.is_enabled()]
 			if active_submenu:
 				active_submenu[0].update(events)
@@ -569,7 +583,7 @@ class Menu:
 			self.update_display()
 			pressed_key = False
 			while not pressed_key:
-				for event in pygame.event.get():
+				for event in utils.wait_for_events():
 					if event.type == pygame.KEYDOWN and (is_allowed := utils.check_allowed_keys(event.key)):
 						keys.append(event.key)
 						pressed_key = True
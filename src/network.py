@@ -0,0 +1,544 @@
+"""
+Module for networked games: An authoritative server runs the game (like the simulation, but in real time) and the players connect to it over TCP. The clients
+only send the control slot (up, left, down or right) of each pressed key, and the server sends the changes of the game state after every update as compact
+binary ops (head pushed, tail popped, map square changed, bomb or explosion updated, ...), not as full snapshots. Clients display the game with Graphics.
+Run from the src directory, e.g. "python network.py server 3 --players 2" and "python network.py client --render" (twice). For testing over localhost without
+display, run the clients with "--controller random" instead of "--render". Server and clients print a digest of the final state, which must be the same.
+"""
+
+# ----- Imports --------
+import argparse
+import asyncio
+import hashlib
+import socket
+import struct
+import time
+import pygame
+import utils
+from game import Game
+from level import Level
+from snake import Snake
+from bot import BotController
+from replay import ReplayRecorder
+from simulation import Simulation, load_levels, create_random_controller
+from constants import *
+
+# ----- Constants ------
+# Messages (little endian): header with the message type and the length of the payload, followed by the payload
+#   WELCOME (server): magic, version, seed, level id, number of snakes, index of the client's snake (255 for spectators)
+#   TICK (server): game time (in ms), followed by the ops that changed the state since the last tick. The first tick a client gets holds the whole state.
+#   START, END (server): no payload
+#   INPUT (client): the control slot of the pressed key, i.e. its index in the snake's controls
+MESSAGE_HEADER = struct.Struct("<BI")
+WELCOME = struct.Struct("<4sBqiBB")
+TICK = struct.Struct("<I")
+INPUT = struct.Struct("<B")
+NETWORK_MAGIC = b"FSNW"
+NETWORK_VERSION = 1
+MSG_WELCOME = 0
+MSG_TICK = 1
+MSG_START = 2
+MSG_END = 3
+MSG_INPUT = 4
+NO_SNAKE = 255
+# Op: op type, snake index, row, column, value. Which of the fields are used depends on the op type.
+OP = struct.Struct("<BBhhi")
+OP_HEAD = 0  # Push a new head (row, column) to the snake
+OP_TAIL = 1  # Pop the tail of the snake
+OP_SNAKE_CLEAR = 2  # Remove all squares of the snake
+OP_HEADING = 3  # Set the heading of the snake (value: index in ORIENTATIONS)
+OP_SPEED = 4
+OP_SCORE = 5
+OP_DRUNK = 6  # Set the drunk countdown of the snake
+OP_PIQUANCY = 7  # Set the piquancy countdown of the snake
+OP_FIRE_CLEAR = 8  # Remove the spit fire of the snake
+OP_FIRE = 9  # Add a square (row, column) to the spit fire of the snake
+OP_CELL = 10  # Put an object (value: object value) on the map square (row, column)
+OP_BOMB = 11  # Set the countdown of the bomb on the square (row, column), -1 for removing the bomb
+OP_EXPLOSION = 12  # Set the countdown of the explosion on the square (row, column), -1 for removing the explosion
+OP_CRASH = 13  # First square (row, column) of a new crash
+OP_CRASH_END = 14  # Second square (row, column) of the new crash
+REMOVED = -1
+
+
+# ----- Methods ------
+def pack_message(msg_type: int, payload: bytes = b"") -> bytes:
+	"""Return the message with the given type and payload, ready for sending."""
+	return MESSAGE_HEADER.pack(msg_type, len(payload)) + payload
+
+
+async def read_message(reader: asyncio.StreamReader) -> (int, bytes):
+	"""Read the next message. Raises asyncio.IncompleteReadError if the connection was closed."""
+	msg_type, length = MESSAGE_HEADER.unpack(await reader.readexactly(MESSAGE_HEADER.size))
+	return msg_type, await reader.readexactly(length)
+
+
+def set_no_delay(writer: asyncio.StreamWriter) -> None:
+	"""Switch off Nagle's algorithm, so that the small messages are sent right away instead of being collected."""
+	if (sock := writer.get_extra_info("socket")) is not None:
+		sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+
+def get_state_digest(level: Level, snakes: [Snake], crashes: [((int, int), (int, int))], bombs: {(int, int): int}, explosions: {(int, int): int}) -> str:
+	"""Return a digest of everything that is displayed, for checking that a client shows the same state as the server."""
+	state = (sorted((pos, obj.value) for pos, obj in level.get_item_squares()), [(list(snake.pos), snake.score, snake.speed) for snake in snakes], crashes,
+			 sorted(bombs.items()), sorted(explosions.items()))
+	return hashlib.md5(repr(state).encode()).hexdigest()
+
+
+# ----- Classes --------
+class StateEncoder:
+	"""Class for encoding the changes of a game's state as ops. It keeps the state of the last call, so the first call encodes the whole state."""
+
+	def __init__(self):
+		self.snake_pos: [[(int, int)]] = []
+		self.snake_status: [tuple] = []
+		self.spit_fire_posis: [[(int, int)]] = []
+		# The items on the map as last encoded, and the map version they belong to. Afterwards, only the squares changed on the map are compared.
+		self.cells: {(int, int): utils.Objects} = {}
+		self.map_version = None
+		self.bombs: {(int, int): int} = {}
+		self.explosions: {(int, int): int} = {}
+		self.num_crashes = 0
+
+	def encode(self, game: Game) -> bytes:
+		"""Return the ops that changed the state since the last call."""
+		ops = []
+		for snake in game.snakes:
+			if snake.idx == len(self.snake_pos):
+				self.snake_pos.append([])
+				self.snake_status.append(None)
+				self.spit_fire_posis.append([])
+			ops.extend(self.encode_snake_pos(snake))
+			status = (ORIENTATIONS.index(snake.heading), snake.speed, snake.score, snake.is_drunk, snake.piquancy_growing)
+			if status != self.snake_status[snake.idx]:
+				old_status = self.snake_status[snake.idx] or (None,) * len(status)
+				ops.extend(OP.pack(op, snake.idx, 0, 0, value) for op, value, old_value in zip([OP_HEADING, OP_SPEED, OP_SCORE, OP_DRUNK, OP_PIQUANCY], status, old_status) if value != old_value)
+				self.snake_status[snake.idx] = status
+			if snake.spit_fire_posis != self.spit_fire_posis[snake.idx]:
+				ops.append(OP.pack(OP_FIRE_CLEAR, snake.idx, 0, 0, 0))
+				ops.extend(OP.pack(OP_FIRE, snake.idx, *pos, 0) for pos in snake.spit_fire_posis)
+				self.spit_fire_posis[snake.idx] = list(snake.spit_fire_posis)
+		ops.extend(self.encode_cells(game.level))
+		bombs = game.create_bomb_dict()
+		ops.extend(self.encode_countdowns(OP_BOMB, self.bombs, bombs))
+		self.bombs = bombs
+		ops.extend(self.encode_countdowns(OP_EXPLOSION, self.explosions, game.explosions))
+		self.explosions = dict(game.explosions)
+		for pos1, pos2 in game.crashes[self.num_crashes:]:
+			ops.extend([OP.pack(OP_CRASH, 0, *pos1, 0), OP.pack(OP_CRASH_END, 0, *pos2, 0)])
+		self.num_crashes = len(game.crashes)
+		return b"".join(ops)
+
+	def encode_cells(self, level: Level) -> [bytes]:
+		"""
+		Return the ops for the changed items on the map. Only the squares that were changed on the map since the last call are compared, and all squares only in
+		the first call and after the level was reset.
+		"""
+		if level.map_version != self.map_version or level.changed_squares is None:
+			changed_squares = self.cells.keys() | {pos for pos, _ in level.get_item_squares()}
+			level.track_changes()
+			self.map_version = level.map_version
+		else:
+			changed_squares = level.pop_changed_squares()
+		ops = []
+		for pos in changed_squares:
+			if (obj := level.get_object(pos)) != self.cells.get(pos, utils.Objects.NONE):
+				ops.append(OP.pack(OP_CELL, 0, *pos, obj.value))
+				if obj == utils.Objects.NONE:
+					del self.cells[pos]
+				else:
+					self.cells[pos] = obj
+		return ops
+
+	def encode_snake_pos(self, snake: Snake) -> [bytes]:
+		"""Return the ops that turn the last body of the snake into its current one: usually a pushed head and a popped tail, and a new body if it changed otherwise."""
+		old_pos, new_pos = self.snake_pos[snake.idx], list(snake.pos)
+		self.snake_pos[snake.idx] = new_pos
+		# A snake moves at most one square between two calls
+		for num_heads in [0, 1]:
+			num_kept = len(new_pos) - num_heads
+			if old_pos and 0 < num_kept <= len(old_pos) and new_pos[num_heads:] == old_pos[:num_kept]:
+				return ([OP.pack(OP_HEAD, snake.idx, *new_pos[0], 0)] if num_heads else []) + [OP.pack(OP_TAIL, snake.idx, 0, 0, 0)] * (len(old_pos) - num_kept)
+		return [OP.pack(OP_SNAKE_CLEAR, snake.idx, 0, 0, 0)] + [OP.pack(OP_HEAD, snake.idx, *pos, 0) for pos in reversed(new_pos)]
+
+	@staticmethod
+	def encode_countdowns(op_type: int, old: {(int, int): int}, new: {(int, int): int}) -> [bytes]:
+		"""Return the ops for the changed countdowns (of bombs or explosions)."""
+		return [OP.pack(op_type, 0, *pos, new.get(pos, REMOVED)) for pos in old.keys() | new.keys() if new.get(pos, REMOVED) != old.get(pos, REMOVED)]
+
+
+class GameMirror:
+	"""The copy of the server's game state on a client, built from the received ops. It provides what Graphics and the simulation controllers need from a game."""
+
+	def __init__(self, level: Level, num_snakes: int):
+		"""
+		Initialize the mirror with an empty map (without items) and snakes without squares. The first tick fills in the state.
+
+		:param level: The level of the game
+		:param num_snakes: The number of snakes
+		"""
+		self.level = level
+		self.level.reset()
+		for pos, _ in self.level.get_item_squares():
+			self.level.set_object(pos, utils.Objects.NONE)
+		self.snakes = [Snake(DEFAULT_SNAKE_NAMES[idx], idx, DEFAULT_SNAKE_COLORS[idx], {}) for idx in range(num_snakes)]
+		# For each snake, how often each of its squares is in its body. Within a tick, a new head can be pushed onto the square of the tail before the tail is popped.
+		self.cell_counts: [{(int, int): int}] = [{} for _ in range(num_snakes)]
+		# occupancy maps every square occupied by a snake to the snake's index
+		self.occupancy: {(int, int): int} = {}
+		self.crashes: [((int, int), (int, int))] = []
+		self.bombs: {(int, int): int} = {}
+		self.explosions: {(int, int): int} = {}
+		self.time = 0
+		self._crash_start = None
+
+	def apply(self, ops: bytes) -> [int]:
+		"""Apply the given ops to the state. Return the indices of the snakes that moved."""
+		moved = []
+		for op_type, idx, row, col, value in OP.iter_unpack(ops):
+			pos = (row, col)
+			if op_type == OP_HEAD:
+				snake = self.snakes[idx]
+				snake.pos.appendleft(pos)
+				snake.head_seq += 1
+				snake.cells[pos] = snake.head_seq
+				self.cell_counts[idx][pos] = self.cell_counts[idx].get(pos, 0) + 1
+				snake.head = pos
+				self.occupancy[pos] = idx
+				moved.append(idx)
+			elif op_type == OP_TAIL:
+				snake = self.snakes[idx]
+				tail = snake.pos.pop()
+				if self.cell_counts[idx][tail] > 1:
+					self.cell_counts[idx][tail] -= 1
+				else:
+					del self.cell_counts[idx][tail]
+					del snake.cells[tail]
+					if self.occupancy.get(tail) == idx:
+						del self.occupancy[tail]
+			elif op_type == OP_SNAKE_CLEAR:
+				snake = self.snakes[idx]
+				for square in snake.cells:
+					if self.occupancy.get(square) == idx:
+						del self.occupancy[square]
+				snake.pos.clear()
+				snake.cells.clear()
+				self.cell_counts[idx].clear()
+			elif op_type == OP_HEADING:
+				self.snakes[idx].heading = self.snakes[idx].orientation = ORIENTATIONS[value]
+			elif op_type == OP_SPEED:
+				self.snakes[idx].speed = value
+			elif op_type == OP_SCORE:
+				self.snakes[idx].score = value
+			elif op_type == OP_DRUNK:
+				self.snakes[idx].is_drunk = value
+			elif op_type == OP_PIQUANCY:
+				self.snakes[idx].piquancy_growing = value
+			elif op_type == OP_FIRE_CLEAR:
+				self.snakes[idx].spit_fire_posis = []
+			elif op_type == OP_FIRE:
+				self.snakes[idx].spit_fire_posis.append(pos)
+			elif op_type == OP_CELL:
+				self.level.set_object(pos, utils.OBJECTS_BY_VALUE[value])
+			elif op_type in [OP_BOMB, OP_EXPLOSION]:
+				countdowns = self.bombs if op_type == OP_BOMB else self.explosions
+				if value == REMOVED:
+					countdowns.pop(pos, None)
+				else:
+					countdowns[pos] = value
+			elif op_type == OP_CRASH:
+				self._crash_start = pos
+			elif op_type == OP_CRASH_END:
+				self.crashes.append((self._crash_start, pos))
+			else:
+				raise ValueError(f"Unknown op type {op_type}")
+		return moved
+
+	def get_infos_for_updating_display(self) -> (Level, [Snake], [((int, int), (int, int))], {(int, int): int}, {(int, int): int}):
+		"""Return the infos that are needed to display the current state (see Game.get_infos_for_updating_display)."""
+		return self.level, self.snakes, self.crashes, self.bombs, self.explosions
+
+
+class GameServer:
+	"""
+	Class for running an authoritative game server. The game runs on the server only, driven by the game clock of the simulation in real time. The clients
+	get the changes after every update, and their inputs are fed into the game as key presses of their snakes (so drunk snakes stay drunk).
+	"""
+
+	def __init__(self, level: Level, num_players: int = 2, num_bots: int = 0, seed: int = None, host: str = NETWORK_HOST, port: int = NETWORK_PORT, recorder: ReplayRecorder = None):
+		"""
+		Initialize the server.
+
+		:param level: The level to play
+		:param num_players: The number of snakes controlled by clients. The game starts when all of them joined.
+		:param num_bots: The number of additional snakes controlled by bots
+		:param seed: Seed for the game's random generator. If None, a random seed is used.
+		:param host: The address to listen on
+		:param port: The port to listen on
+		:param recorder: Optional replay.ReplayRecorder to record the game with
+		"""
+		num_snakes = num_players + num_bots
+		self.sim = Simulation(level, num_snakes, seed, {idx: BotController() for idx in range(num_players, num_snakes)}, recorder)
+		self.num_players = num_players
+		self.host = host
+		self.port = port
+		# The connected clients with the index of their snake
+		self.clients: {asyncio.StreamWriter: int} = {}
+		self._handlers: {asyncio.Task} = set()
+		self.encoder = StateEncoder()
+		self.running = False
+		self.all_joined: asyncio.Event = None
+		self.num_ticks = 0
+		self.bytes_sent = 0
+
+	async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+		"""Let a client join the game (if there is a free snake) and feed its inputs into the game until it disconnects."""
+		free_snakes = [idx for idx in range(self.num_players) if idx not in self.clients.values()]
+		if not free_snakes or self.running:
+			writer.close()
+			return
+		set_no_delay(writer)
+		self._handlers.add(asyncio.current_task())
+		snake_idx = free_snakes[0]
+		self.clients[writer] = snake_idx
+		game = self.sim.game
+		writer.write(pack_message(MSG_WELCOME, WELCOME.pack(NETWORK_MAGIC, NETWORK_VERSION, game.seed, game.level.id, len(game.snakes), snake_idx)))
+		writer.write(pack_message(MSG_TICK, TICK.pack(0) + StateEncoder().encode(game)))
+		if len(self.clients) == self.num_players:
+			self.all_joined.set()
+		try:
+			while True:
+				msg_type, payload = await read_message(reader)
+				if msg_type == MSG_INPUT:
+					self.apply_input(snake_idx, INPUT.unpack(payload)[0])
+		except (asyncio.IncompleteReadError, ConnectionError):
+			pass
+		finally:
+			self.clients.pop(writer, None)
+			writer.close()
+
+	def apply_input(self, snake_idx: int, slot: int) -> None:
+		"""Feed the input of a client into the game, as a press of the key in the given control slot of its snake."""
+		snake = self.sim.game.snakes[snake_idx]
+		if slot < len(snake.controls) and not self.sim.game.crashes:
+			key = list(snake.controls)[slot]
+			if self.sim.recorder:
+				self.sim.recorder.record_key(self.sim.clock.time, key)
+			self.sim.game.update_snake_orientation(key)
+
+	def broadcast(self, message: bytes) -> None:
+		"""Send the message to all clients. Clients that don't keep up with reading are dropped."""
+		for writer in list(self.clients):
+			if writer.transport.get_write_buffer_size() > NETWORK_MAX_BUFFER:
+				self.clients.pop(writer)
+				writer.close()
+				continue
+			writer.write(message)
+			self.bytes_sent += len(message)
+
+	async def run(self, max_time: float = None) -> Game:
+		"""
+		Wait for the players, run the game in real time until it's over and return it.
+
+		:param max_time: Optional time limit (in ms of game time)
+		"""
+		self.all_joined = asyncio.Event()
+		if not self.num_players:
+			self.all_joined.set()
+		server = await asyncio.start_server(self.handle_client, self.host, self.port)
+		async with server:
+			await self.all_joined.wait()
+			self.running = True
+			# All clients got the current state when they joined
+			self.encoder.encode(self.sim.game)
+			self.broadcast(pack_message(MSG_START))
+			loop = asyncio.get_running_loop()
+			start = loop.time()
+			while not self.sim.game.crashes and (max_time is None or self.sim.clock.get_next_event_time() <= max_time):
+				if (delay := start + self.sim.clock.get_next_event_time() / 1000 - loop.time()) > 0:
+					# Inputs of the clients are handled while waiting
+					await asyncio.sleep(delay)
+				self.sim.step()
+				self.num_ticks += 1
+				self.broadcast(pack_message(MSG_TICK, TICK.pack(int(self.sim.clock.time)) + self.encoder.encode(self.sim.game)))
+			self.broadcast(pack_message(MSG_END))
+			for writer in list(self.clients):
+				await writer.drain()
+				writer.close()
+			# The handlers end as soon as their connections are closed
+			await asyncio.gather(*self._handlers, return_exceptions=True)
+		if self.sim.recorder:
+			self.sim.recorder.stop()
+		return self.sim.game
+
+
+class GameClient:
+	"""Class for taking part in a game on a server. It keeps a mirror of the game state and sends the inputs of the player."""
+
+	def __init__(self, host: str = NETWORK_HOST, port: int = NETWORK_PORT, controls: {} = None, levels: [Level] = None):
+		"""
+		Initialize the client.
+
+		:param host: The address of the server
+		:param port: The port of the server
+		:param controls: The keys of the player (default: the keys of player 1). Their order gives the control slots.
+		:param levels: The levels to look up the level of the game in (default: all levels from the level json file)
+		"""
+		self.host = host
+		self.port = port
+		self.controls = controls if controls else dict(DEFAULT_SNAKE_CONTROLS[0])
+		self.levels = levels
+		self.mirror: GameMirror = None
+		self.snake_idx = NO_SNAKE
+		self.started = False
+		self.connected = False
+		# changed is set whenever the state changed, for redrawing only then
+		self.changed = False
+		self.num_ticks = 0
+		self.bytes_received = 0
+		self._reader: asyncio.StreamReader = None
+		self._writer: asyncio.StreamWriter = None
+
+	async def connect(self) -> None:
+		"""Connect to the server and join the game."""
+		self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+		set_no_delay(self._writer)
+		try:
+			msg_type, payload = await read_message(self._reader)
+		except asyncio.IncompleteReadError:
+			raise ConnectionError("The server didn't let the client join (game full or already running)")
+		magic, version, _, level_id, num_snakes, self.snake_idx = WELCOME.unpack(payload)
+		if msg_type != MSG_WELCOME or magic != NETWORK_MAGIC or version != NETWORK_VERSION:
+			raise ConnectionError(f"The server doesn't speak version {NETWORK_VERSION} of the protocol")
+		level = next((level for level in self.levels or load_levels() if level.id == level_id), None)
+		if level is None:
+			raise ValueError(f"Level {level_id} of the game doesn't exist")
+		self.mirror = GameMirror(level, num_snakes)
+		self.connected = True
+
+	async def receive(self) -> [int]:
+		"""Receive and apply the next message. Return the indices of the snakes that moved, or None if the game is over or the connection is closed."""
+		try:
+			msg_type, payload = await read_message(self._reader)
+		except (asyncio.IncompleteReadError, ConnectionError):
+			msg_type, payload = MSG_END, b""
+		self.bytes_received += MESSAGE_HEADER.size + len(payload)
+		if msg_type == MSG_END:
+			self.close()
+			return None
+		if msg_type == MSG_START:
+			self.started = True
+		elif msg_type == MSG_TICK:
+			self.num_ticks += 1
+			self.mirror.time = TICK.unpack_from(payload)[0]
+			self.changed = True
+			return self.mirror.apply(payload[TICK.size:])
+		return []
+
+	def send_key(self, key: int) -> None:
+		"""Send the given key to the server if it is one of the player's keys."""
+		if key in self.controls:
+			self.send_input(list(self.controls).index(key))
+
+	def send_orientation(self, orientation: (int, int)) -> None:
+		"""Send the control slot of the given orientation (as long as the snake isn't drunk) to the server."""
+		self.send_input(list(self.controls.values()).index(orientation))
+
+	def send_input(self, slot: int) -> None:
+		"""Send the given control slot to the server."""
+		if self.connected and self.snake_idx != NO_SNAKE:
+			self._writer.write(pack_message(MSG_INPUT, INPUT.pack(slot)))
+
+	def close(self) -> None:
+		"""Close the connection."""
+		if self.connected:
+			self.connected = False
+			self._writer.close()
+
+
+# ----- Main script ----
+async def render(client: GameClient, graphics) -> None:
+	"""Display the game and send the pressed keys, until the connection is closed."""
+	while client.connected:
+		for event in pygame.event.get():
+			if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+				client.close()
+			elif event.type == pygame.KEYDOWN:
+				client.send_key(event.key)
+		if client.changed:
+			graphics.update_display(*client.mirror.get_infos_for_updating_display(), paused_time=pygame.time.get_ticks() - client.mirror.time)
+			client.changed = False
+		await asyncio.sleep(1 / FPS)
+
+
+async def run_client(args) -> None:
+	client = GameClient(args.host, args.port)
+	await client.connect()
+	print(f"Joined level {client.mirror.level.name} as snake {client.snake_idx + 1} of {len(client.mirror.snakes)}")
+	render_task = None
+	if args.render:
+		from graphics import Graphics
+		pygame.init()
+		main_surface = pygame.display.set_mode((0, 0))
+		graphics = Graphics(main_surface, client.mirror.level.num_rows, client.mirror.level.num_cols)
+		# On maps larger than the screen, the view follows the own snake
+		graphics.follow = client.snake_idx if client.snake_idx != NO_SNAKE else None
+		render_task = asyncio.create_task(render(client, graphics))
+	controller = create_random_controller(args.seed) if args.controller == "random" else None
+	start = time.perf_counter()
+	while (moved := await client.receive()) is not None:
+		if controller and client.started and client.snake_idx in moved:
+			snake = client.mirror.snakes[client.snake_idx]
+			if (orientation := controller(client.mirror, snake)) is not None and orientation != snake.heading:
+				client.send_orientation(orientation)
+	if render_task:
+		await render_task
+	elapsed = time.perf_counter() - start
+	print(f"{client.num_ticks} ticks, {client.bytes_received} bytes received ({client.bytes_received / max(client.num_ticks, 1):.1f} bytes per tick, "
+		  f"{client.bytes_received / max(elapsed, 1e-9) / 1024:.2f} KiB/s), game time {utils.get_time_string_for_ms(client.mirror.time)}")
+	print(f"State digest: {get_state_digest(*client.mirror.get_infos_for_updating_display())}")
+
+
+async def run_server(args, level: Level) -> None:
+	server = GameServer(level, args.players, args.bots, args.seed, args.host, args.port, ReplayRecorder() if args.record else None)
+	print(f"Waiting for {args.players} players on {args.host}:{args.port} (level {level.name})")
+	game = await server.run(args.max_time * 1000 if args.max_time else None)
+	print(f"{server.num_ticks} ticks, {server.bytes_sent} bytes sent, game time {utils.get_time_string_for_ms(server.sim.clock.time)}")
+	for snake in game.snakes:
+		print(f"{snake.name}: score {snake.score}, length {len(snake.pos)}")
+	print(f"State digest: {get_state_digest(game.level, game.snakes, game.crashes, game.create_bomb_dict(), game.explosions)}")
+
+
+def main():
+	parser = argparse.ArgumentParser(description="Run a game server or join a game on a server.")
+	subparsers = parser.add_subparsers(dest="mode", required=True)
+	server_parser = subparsers.add_parser("server", help="Run a game server")
+	server_parser.add_argument("level", type=int, help="The id of the level to play")
+	server_parser.add_argument("--players", type=int, default=2, choices=range(0, 5), help="The number of players (the game starts when all of them joined)")
+	server_parser.add_argument("--bots", type=int, default=0, choices=range(0, 5), help="The number of additional snakes controlled by bots")
+	server_parser.add_argument("--seed", type=int, help="The seed of the game")
+	server_parser.add_argument("--max-time", type=float, help="Time limit for the game (in seconds of game time)")
+	server_parser.add_argument("--record", action="store_true", help="Record a replay of the game")
+	client_parser = subparsers.add_parser("client", help="Join a game")
+	client_parser.add_argument("--render", action="store_true", help="Display the game and play with the arrow keys")
+	client_parser.add_argument("--controller", choices=["random"], help="Let a bot play (e.g. for testing without display)")
+	client_parser.add_argument("--seed", type=int, help="The seed of the bot")
+	for sub_parser in [server_parser, client_parser]:
+		sub_parser.add_argument("--host", default=NETWORK_HOST, help="The address of the server")
+		sub_parser.add_argument("--port", type=int, default=NETWORK_PORT, help="The port of the server")
+	args = parser.parse_args()
+	if args.mode == "server":
+		level = next((level for level in load_levels() if level.id == args.level), None)
+		if level is None:
+			parser.error(f"unknown level {args.level}")
+		max_snakes = min(4, len(level.start_pos))
+		if args.players + args.bots > max_snakes:
+			parser.error(f"level {level.id} ({level.name}) has room for at most {max_snakes} snakes, but {args.players} players and {args.bots} bots were requested")
+		asyncio.run(run_server(args, level))
+	else:
+		asyncio.run(run_client(args))
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,143 @@
+"""Module for measuring where the time goes in the game loop of the friendly snakes package"""
+
+# ----- Imports --------
+import contextlib
+import csv
+import math
+import os
+import time
+from collections import deque
+from constants import *
+
+# ----- Constants ------
+PHASES = ["events", "bots", "update_snakes", "update_counting", "map", "snakes", "status", "score", "display_update"]
+
+
+# ----- Methods ------
+def get_percentile(sorted_values: [float], percentile: float) -> float:
+	"""Return the given percentile (0 - 100) of the sorted values, using the nearest rank method."""
+	if not sorted_values:
+		return 0.0
+	rank = math.ceil(percentile / 100 * len(sorted_values))
+	return sorted_values[min(max(rank - 1, 0), len(sorted_values) - 1)]
+
+
+# ----- Classes --------
+class Profiler:
+	"""Class for timing the phases of each frame. While disabled, measuring costs next to nothing."""
+
+	def __init__(self, fps: int = FPS, window: int = PROFILER_WINDOW, csv_filename: str = FILENAME_PROFILER_CSV):
+		"""
+		Initialize the profiler (disabled).
+
+		:param fps: The targeted frames per second. Frames taking longer than 1000 / fps ms are counted as dropped.
+		:param window: The number of recent frames the statistics are computed for
+		:param csv_filename: The file the samples are appended to while the profiler is enabled (or None for no file)
+		"""
+		self.enabled = False
+		self.frame_budget = 1000 / fps
+		self.window = window
+		self.csv_filename = csv_filename
+		self._csv_file = None
+		self._csv_writer = None
+		# Per frame samples (in ms) of the last frames. Each sample is a tuple (frame time, {phase: time}).
+		self.samples: deque[(float, {str: float})] = deque(maxlen=window)
+		self.num_frames = 0
+		self.overlay_lines: [str] = []
+		self._frame_start = None
+		self._phase_times: {str: float} = {}
+		# Time spent in nested measurements, one entry per currently running measurement. It's subtracted from the outer phase, so that each phase only counts its own time.
+		self._nested_times: [float] = []
+
+	def toggle(self) -> None:
+		"""Switch the profiler on or off."""
+		if self.enabled:
+			self.disable()
+		else:
+			self.enable()
+
+	def enable(self) -> None:
+		"""Start profiling (with fresh statistics) and open the csv file."""
+		self.enabled = True
+		self.samples.clear()
+		self.num_frames = 0
+		self.overlay_lines = []
+		self._frame_start = None
+		self._phase_times = {}
+		if self.csv_filename:
+			write_header = not os.path.isfile(self.csv_filename) or os.path.getsize(self.csv_filename) == 0
+			self._csv_file = open(self.csv_filename, "a", newline="")
+			self._csv_writer = csv.writer(self._csv_file)
+			if write_header:
+				self._csv_writer.writerow(["timestamp", "frame", "frame_ms", "dropped"] + [f"{phase}_ms" for phase in PHASES])
+
+	def disable(self) -> None:
+		"""Stop profiling and close the csv file."""
+		self.enabled = False
+		if self._csv_file:
+			self._csv_file.close()
+			self._csv_file = None
+			self._csv_writer = None
+
+	def begin_frame(self) -> None:
+		"""Mark the start of a frame."""
+		if self.enabled:
+			self._phase_times = {}
+			self._frame_start = time.perf_counter()
+
+	def end_frame(self) -> None:
+		"""Mark the end of a frame (before waiting for the next one) and record its sample."""
+		if not self.enabled or self._frame_start is None:
+			return
+		frame_time = (time.perf_counter() - self._frame_start) * 1000
+		dropped = frame_time > self.frame_budget
+		self.samples.append((frame_time, self._phase_times))
+		self.num_frames += 1
+		if self._csv_writer:
+			self._csv_writer.writerow([f"{time.time():.3f}", self.num_frames, f"{frame_time:.3f}", int(dropped)] + [f"{self._phase_times.get(phase, 0.0):.3f}" for phase in PHASES])
+		if self.num_frames % PROFILER_OVERLAY_INTERVAL == 1:
+			self.overlay_lines = self.get_overlay_lines()
+			if self._csv_file:
+				self._csv_file.flush()
+		self._frame_start = None
+		self._phase_times = {}
+
+	@contextlib.contextmanager
+	def measure(self, phase: str):
+		"""Context manager that adds the time spent in its body to the given phase of the current frame."""
+		if not self.enabled:
+			yield
+			return
+		start = time.perf_counter()
+		self._nested_times.append(0.0)
+		try:
+			yield
+		finally:
+			elapsed = time.perf_counter() - start
+			nested = self._nested_times.pop()
+			self._phase_times[phase] = self._phase_times.get(phase, 0.0) + (elapsed - nested) * 1000
+			if self._nested_times:
+				self._nested_times[-1] += elapsed
+
+	def get_stats(self) -> {}:
+		"""
+		Return the statistics (times in ms) over the last frames (at most window frames): p50 and p99 of the frame time, the dropped frames and the mean time of
+		each phase. "total_frames" is the number of all frames since the profiler was enabled.
+		"""
+		frame_times = sorted(frame_time for frame_time, _ in self.samples)
+		return {"frames": len(self.samples),
+				"total_frames": self.num_frames,
+				"dropped_frames": sum(frame_time > self.frame_budget for frame_time in frame_times),
+				"p50": get_percentile(frame_times, 50),
+				"p99": get_percentile(frame_times, 99),
+				"phases": {phase: sum(phase_times.get(phase, 0.0) for _, phase_times in self.samples) / max(len(self.samples), 1) for phase in PHASES}}
+
+	def get_overlay_lines(self) -> [str]:
+		"""Return the statistics as text lines for the in-game overlay."""
+		stats = self.get_stats()
+		dropped_pct = 100 * stats["dropped_frames"] / max(stats["frames"], 1)
+		lines = [f"frame p50 {stats['p50']:6.2f} ms",
+				 f"frame p99 {stats['p99']:6.2f} ms",
+				 f"dropped {stats['dropped_frames']} / {stats['frames']} ({dropped_pct:.1f} %) @ {1000 / self.frame_budget:.0f} FPS"]
+		lines.extend(f"{phase:<16}{time_ms:6.2f} ms" for phase, time_ms in stats["phases"].items())
+		return lines
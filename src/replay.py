@@ -0,0 +1,222 @@
+"""
+Module for recording and playing back replays of games. A replay holds the seed, the level and the controls of a game, followed by all the calls of
+Game.update_snake_orientation, Game.update_snakes and Game.update_counting in the order they happened, each with its game time. As the game takes all random
+decisions with its own seeded random generator, feeding the same calls into a new game reproduces the game exactly.
+Run from the src directory to play back a replay, e.g. "python replay.py ../replays/<file>.fsr --render".
+"""
+
+# ----- Imports --------
+import argparse
+import os
+import struct
+import time
+import pygame
+import utils
+from game import Game
+from level import Level
+from simulation import load_levels
+from constants import *
+
+# ----- Constants ------
+# File format (little endian, append-only): header, controls of each snake, then one record per call. A file cut off in the middle of a record (e.g. because
+# the game was killed) stays readable up to the last complete record.
+#   Header: magic, version, seed, level id, number of snakes
+#   Controls: four times (key, orientation index in ORIENTATIONS) per snake
+#   Record: game time (in ms), record type, value
+REPLAY_HEADER = struct.Struct("<4sBqiB")
+REPLAY_CONTROL = struct.Struct("<iB")
+REPLAY_RECORD = struct.Struct("<IBI")
+REPLAY_MAGIC = b"FSRP"
+REPLAY_VERSION = 1
+REPLAY_FILE_EXT = ".fsr"
+# Record types. The value of a KEY record is the pressed key, the value of a MOVE record the ids of the moved snakes (see encode_snake_ids), and COUNT records have no value.
+RECORD_KEY = 0
+RECORD_MOVE = 1
+RECORD_COUNT = 2
+
+
+# ----- Methods ------
+def encode_snake_ids(snake_ids: [int]) -> int:
+	"""Pack the snake ids (in their order) into an int, four bits per id."""
+	value = 0
+	for idx, snake_id in enumerate(snake_ids):
+		value |= (snake_id + 1) << (4 * idx)
+	return value
+
+
+def decode_snake_ids(value: int) -> [int]:
+	"""Unpack the snake ids packed by encode_snake_ids."""
+	snake_ids = []
+	while value:
+		snake_ids.append((value & 15) - 1)
+		value >>= 4
+	return snake_ids
+
+
+def read_replay(filename: str) -> ({}, [(int, int, int)]):
+	"""
+	Read the given replay file.
+
+	:return: Tuple containing [0] a dict with the seed, the level id and the controls of the snakes and [1] the records as tuples (time, type, value)
+	"""
+	with open(filename, "rb") as replay_file:
+		data = replay_file.read()
+	magic, version, seed, level_id, num_snakes = REPLAY_HEADER.unpack_from(data)
+	if magic != REPLAY_MAGIC or version != REPLAY_VERSION:
+		raise ValueError(f"{filename} is not a replay file of version {REPLAY_VERSION}")
+	offset = REPLAY_HEADER.size
+	controls = []
+	for _ in range(num_snakes):
+		snake_controls = {}
+		for _ in range(4):
+			key, orientation_idx = REPLAY_CONTROL.unpack_from(data, offset)
+			snake_controls[key] = ORIENTATIONS[orientation_idx]
+			offset += REPLAY_CONTROL.size
+		controls.append(snake_controls)
+	num_records = (len(data) - offset) // REPLAY_RECORD.size
+	records = list(REPLAY_RECORD.iter_unpack(data[offset:offset + num_records * REPLAY_RECORD.size]))
+	return {"seed": seed, "level_id": level_id, "controls": controls}, records
+
+
+# ----- Classes --------
+class ReplayRecorder:
+	"""Class for recording the games into replay files. Each record is written right away, so that the replay is complete even if the game crashes."""
+
+	def __init__(self, directory: str = REPLAY_DIR):
+		"""
+		Initialize the recorder.
+
+		:param directory: The directory for the replay files (or None for not recording at all)
+		"""
+		self.directory = directory
+		self.filename = None
+		self._file = None
+
+	def start(self, game: Game, filename: str = None) -> None:
+		"""Start recording the given game (which must not have been updated yet). The replay of the previous game is closed."""
+		self.stop()
+		if not self.directory and not filename:
+			return
+		if filename is None:
+			os.makedirs(self.directory, exist_ok=True)
+			filename = os.path.join(self.directory, f"{time.strftime('%Y%m%d_%H%M%S')}_{game.level.id}_{game.seed}{REPLAY_FILE_EXT}")
+		self.filename = filename
+		self._file = open(filename, "wb")
+		self._file.write(REPLAY_HEADER.pack(REPLAY_MAGIC, REPLAY_VERSION, game.seed, game.level.id, len(game.snakes)))
+		for snake in game.snakes:
+			for key, orientation in snake.controls.items():
+				self._file.write(REPLAY_CONTROL.pack(key, ORIENTATIONS.index(orientation)))
+		self._file.flush()
+
+	def stop(self) -> None:
+		"""Stop recording and close the replay file."""
+		if self._file:
+			self._file.close()
+			self._file = None
+
+	def record(self, game_time: float, record_type: int, value: int = 0) -> None:
+		"""Append a record to the replay (if recording)."""
+		if self._file:
+			self._file.write(REPLAY_RECORD.pack(max(int(game_time), 0), record_type, value))
+			self._file.flush()
+
+	def record_key(self, game_time: float, key: int) -> None:
+		"""Record a call of Game.update_snake_orientation with the given key."""
+		self.record(game_time, RECORD_KEY, key)
+
+	def record_move(self, game_time: float, snake_ids: [int]) -> None:
+		"""Record a call of Game.update_snakes with the given snake ids."""
+		self.record(game_time, RECORD_MOVE, encode_snake_ids(snake_ids))
+
+	def record_count(self, game_time: float) -> None:
+		"""Record a call of Game.update_counting."""
+		self.record(game_time, RECORD_COUNT)
+
+
+class ReplayPlayer:
+	"""Class for playing back a replay file, as fast as possible or in real time, and with or without displaying it"""
+
+	def __init__(self, filename: str, levels: [Level] = None):
+		"""
+		Initialize the player with a new game, set up like the recorded one.
+
+		:param filename: The replay file
+		:param levels: The levels to look up the recorded level in (default: all levels from the level json file)
+		"""
+		self.filename = filename
+		self.info, self.records = read_replay(filename)
+		level = next((level for level in levels or load_levels() if level.id == self.info["level_id"]), None)
+		if level is None:
+			raise ValueError(f"Level {self.info['level_id']} of the replay doesn't exist")
+		level.reset()
+		num_snakes = len(self.info["controls"])
+		self.game = Game(DEFAULT_SNAKE_NAMES[:num_snakes], DEFAULT_SNAKE_COLORS[:num_snakes], self.info["controls"], level, self.info["seed"])
+		self.next_record = 0
+		self.time = 0
+
+	def step(self) -> bool:
+		"""Feed the next record into the game. Return False if there are no records left."""
+		if self.next_record >= len(self.records):
+			return False
+		self.time, record_type, value = self.records[self.next_record]
+		self.next_record += 1
+		if record_type == RECORD_KEY:
+			self.game.update_snake_orientation(value)
+		elif record_type == RECORD_MOVE:
+			self.game.update_snakes(decode_snake_ids(value))
+		elif record_type == RECORD_COUNT:
+			self.game.update_counting()
+		return True
+
+	def run(self, real_time: bool = False, graphics=None, until: float = None) -> Game:
+		"""
+		Play back the replay.
+
+		:param real_time: If True, the records are fed in at the pace they were recorded. Otherwise, the replay runs as fast as possible.
+		:param graphics: Optional Graphics object to display the game on (after all records of the same game time were fed in)
+		:param until: Optional game time (in ms) to stop at
+		:return: The game in the state after the last played record
+		"""
+		start = time.perf_counter()
+		while self.next_record < len(self.records):
+			record_time = self.records[self.next_record][0]
+			if until is not None and record_time > until:
+				break
+			if real_time and (delay := record_time / 1000 - (time.perf_counter() - start)) > 0:
+				time.sleep(delay)
+			while self.next_record < len(self.records) and self.records[self.next_record][0] == record_time:
+				self.step()
+			if graphics:
+				graphics.update_display(*self.game.get_infos_for_updating_display(), paused_time=pygame.time.get_ticks() - self.time)
+				pygame.event.pump()
+		return self.game
+
+
+# ----- Main script ----
+def main():
+	parser = argparse.ArgumentParser(description="Play back a replay file and print the outcome of the game.")
+	parser.add_argument("filename", help="The replay file")
+	parser.add_argument("--real-time", action="store_true", help="Play back at the recorded pace instead of as fast as possible")
+	parser.add_argument("--render", action="store_true", help="Display the game while playing it back")
+	parser.add_argument("--until", type=float, help="Stop at this game time (in ms)")
+	args = parser.parse_args()
+	player = ReplayPlayer(args.filename)
+	graphics = None
+	if args.render:
+		from graphics import Graphics
+		pygame.init()
+		main_surface = pygame.display.set_mode((0, 0))
+		graphics = Graphics(main_surface, player.game.level.num_rows, player.game.level.num_cols)
+	start = time.perf_counter()
+	game = player.run(args.real_time, graphics, args.until)
+	elapsed = time.perf_counter() - start
+	print(f"Level {game.level.name} (id {game.level.id}), seed {game.seed}: {player.next_record} of {len(player.records)} records played in {elapsed * 1000:.1f} ms")
+	print(f"Game time: {utils.get_time_string_for_ms(player.time)}")
+	for snake in game.snakes:
+		print(f"{snake.name}: score {snake.score}, length {len(snake.pos)}")
+	for crash in game.crashes:
+		print(f"Crash between {crash[0]} and {crash[1]}")
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,158 @@
+"""Module for storing the scores of all played games in the friendly snakes package"""
+
+# ----- Imports --------
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from level import Level
+from constants import *
+
+# ----- Constants ------
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scores (
+	id INTEGER PRIMARY KEY,
+	level_id INTEGER NOT NULL,
+	score INTEGER NOT NULL,
+	team_name TEXT,
+	num_players INTEGER NOT NULL,
+	played_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS scores_by_level ON scores (level_id, score DESC, id);
+"""
+# Marks the end of the write queue
+_STOP = object()
+# A score that can't be written is tried again a few times (e.g. while the disk is full or the database is locked by another process)
+WRITE_ATTEMPTS = 3
+WRITE_RETRY_DELAY = 0.5
+logger = logging.getLogger(__name__)
+
+
+# ----- Classes --------
+class ScoreStore:
+	"""
+	Class for storing the scores of all played games in an SQLite database, separate from the (read-only) level definitions. Scores are appended by a background
+	thread, each in its own transaction, so adding a score never waits for the disk, and a crash loses at most the scores that weren't written yet.
+	"""
+
+	def __init__(self, filename: str = FILENAME_SCORES_DB):
+		"""
+		Open the database (and create it if needed) and start the writer thread.
+
+		:param filename: The database file
+		"""
+		self.filename = filename
+		self._connection = self.connect()
+		with self._connection:
+			self._connection.executescript(SCHEMA)
+		self._queue = queue.Queue()
+		self._closed = False
+		# Scores that couldn't be written, as (level id, score, team name, number of players, time)
+		self.failed_scores: [tuple] = []
+		self.start_writer()
+
+	def connect(self) -> sqlite3.Connection:
+		"""Return a new connection to the database. The write-ahead log lets the main thread read while the writer thread writes."""
+		connection = sqlite3.connect(self.filename, timeout=10)
+		connection.execute("PRAGMA journal_mode=WAL")
+		connection.execute("PRAGMA synchronous=FULL")
+		return connection
+
+	def start_writer(self) -> None:
+		"""Start the writer thread, or start it again if it died, so that the queued scores are still written."""
+		self._writer = threading.Thread(target=self.write_scores, name="ScoreStoreWriter", daemon=True)
+		self._writer.start()
+
+	def write_scores(self) -> None:
+		"""Write the queued scores to the database until the store is closed (runs in the writer thread)."""
+		connection = None
+		while (entry := self._queue.get()) is not _STOP:
+			try:
+				connection = self.write_score(connection, entry)
+			except Exception:
+				# The thread must keep running, or all later scores would be lost
+				logger.exception("Unexpected error while writing the score %s", entry)
+				self.failed_scores.append(entry)
+			finally:
+				self._queue.task_done()
+		if connection is not None:
+			connection.close()
+		self._queue.task_done()
+
+	def write_score(self, connection: sqlite3.Connection, entry: tuple) -> sqlite3.Connection:
+		"""Write a single score (in its own transaction), trying again up to WRITE_ATTEMPTS times on database errors. Return the connection to use for the next score."""
+		for attempt in range(1, WRITE_ATTEMPTS + 1):
+			try:
+				if connection is None:
+					connection = self.connect()
+				with connection:
+					connection.execute("INSERT INTO scores (level_id, score, team_name, num_players, played_at) VALUES (?, ?, ?, ?, ?)", entry)
+				return connection
+			except sqlite3.Error as error:
+				logger.warning("Writing the score %s failed (attempt %d of %d): %s", entry, attempt, WRITE_ATTEMPTS, error)
+				if connection is not None:
+					connection.close()
+					connection = None
+				if attempt < WRITE_ATTEMPTS:
+					time.sleep(WRITE_RETRY_DELAY)
+		logger.error("The score %s is lost, it couldn't be written to %s", entry, self.filename)
+		self.failed_scores.append(entry)
+		return connection
+
+	def ensure_writer(self) -> None:
+		"""Start the writer thread again if it died (as long as the store isn't closed)."""
+		if not self._closed and not self._writer.is_alive():
+			logger.warning("The score writer thread died and is restarted")
+			self.start_writer()
+
+	def add_score(self, level_id: int, score: int, team_name: str = None, num_players: int = 1) -> None:
+		"""
+		Queue the score of a finished game for writing and return right away.
+
+		:param level_id: The id of the level
+		:param score: The score (the time in seconds for survival levels)
+		:param team_name: The name the players entered, or None if the score wasn't a highscore
+		:param num_players: The number of players
+		"""
+		entry = (level_id, score, team_name, num_players, time.time())
+		if self._closed:
+			logger.error("The score %s is lost, the score store is already closed", entry)
+			self.failed_scores.append(entry)
+			return
+		self.ensure_writer()
+		self._queue.put(entry)
+
+	def get_top_scores(self, level_id: int, num: int = 3) -> [(str, int)]:
+		"""Return the best named scores of the given level as (team name, score), best first (and the earlier one first for equal scores)."""
+		rows = self._connection.execute("SELECT team_name, score FROM scores WHERE level_id = ? AND team_name IS NOT NULL ORDER BY score DESC, id LIMIT ?", (level_id, num))
+		return [(name, score) for name, score in rows]
+
+	def get_num_games(self, level_id: int = None) -> int:
+		"""Return the number of stored games (of the given level or of all levels)."""
+		if level_id is None:
+			return self._connection.execute("SELECT COUNT(*) FROM scores").fetchone()[0]
+		return self._connection.execute("SELECT COUNT(*) FROM scores WHERE level_id = ?", (level_id,)).fetchone()[0]
+
+	def import_highscores(self, levels: [Level]) -> None:
+		"""Take over the highscores of the given levels (as read from the level json file) if the store is still empty, i.e. on its first use."""
+		if self.get_num_games():
+			return
+		with self._connection:
+			self._connection.executemany("INSERT INTO scores (level_id, score, team_name, num_players, played_at) VALUES (?, ?, ?, 0, 0)",
+										 [(level.id, score, name) for level in levels for name, score in level.highscore])
+
+	def flush(self) -> None:
+		"""Wait until all queued scores are written (or failed, see failed_scores)."""
+		self.ensure_writer()
+		self._queue.join()
+
+	def close(self) -> None:
+		"""Write the remaining scores and close the database."""
+		if self._closed:
+			return
+		self.ensure_writer()
+		self._closed = True
+		self._queue.put(_STOP)
+		self._writer.join()
+		self._connection.close()
@@ -0,0 +1,151 @@
+"""Module for running games headless, i.e. without display, sound and pygame timers"""
+
+# ----- Imports --------
+import json
+import random
+from typing import Callable
+from game import Game
+from level import Level
+from snake import Snake
+from constants import *
+
+# ----- Constants ------
+# Tolerance (in ms) for treating two scheduled events as simultaneous
+SIMULTANEITY_TOLERANCE = 1e-6
+
+
+# ----- Methods ------
+def load_levels(filename: str = FILENAME_LEVEL_INFO, use_array: bool = USE_ARRAY_GRID) -> [Level]:
+	"""Return all levels from the given json file."""
+	with open(filename) as file_level_info:
+		return [Level(level_info, use_array) for level_info in json.load(file_level_info)]
+
+
+def get_safe_orientations(game: Game, snake: Snake) -> [(int, int)]:
+	"""Return the orientations that lead the snake to a square that neither hurts nor is occupied, starting with its current orientation."""
+	safe_orientations = []
+	for orientation in [snake.orientation] + [orientation for orientation in ORIENTATIONS if orientation != snake.orientation]:
+		new_square = game.level.get_neighbor(snake.head, orientation)
+		if game.level.is_on_map(new_square) and game.level.get_object(new_square) not in utils.Hurting | utils.MoveStopper and new_square not in game.occupancy:
+			safe_orientations.append(orientation)
+	return safe_orientations
+
+
+def safe_controller(game: Game, snake: Snake) -> (int, int):
+	"""Controller that keeps the orientation as long as possible and otherwise turns to the first square that neither hurts nor is occupied."""
+	safe_orientations = get_safe_orientations(game, snake)
+	return safe_orientations[0] if safe_orientations else None
+
+
+def create_random_controller(seed: int = None, turn_rate: float = 0.2) -> Callable[[Game, Snake], tuple]:
+	"""Return a controller that turns to a random safe square with the given rate (and whenever going straight on isn't safe), with its own random generator."""
+	rng = random.Random(seed)
+
+	def random_controller(game: Game, snake: Snake) -> (int, int):
+		safe_orientations = get_safe_orientations(game, snake)
+		if not safe_orientations:
+			return None
+		if safe_orientations[0] == snake.orientation and rng.random() >= turn_rate:
+			return snake.orientation
+		return rng.choice(safe_orientations)
+
+	return random_controller
+
+
+# ----- Classes --------
+class GameClock:
+	"""A virtual clock that schedules the snake moves and the reoccurring updates of a game"""
+
+	def __init__(self, speeds: [int]):
+		"""
+		Initialize the clock at time 0.
+
+		:param speeds: The start speeds of the snakes
+		"""
+		self.time = 0.0
+		self.next_reocc = float(REOCC_DUR)
+		self.next_moves = [1000 / speed for speed in speeds]
+
+	def schedule_move(self, snake_idx: int, speed: int) -> None:
+		"""Schedule the next move of the given snake, based on its (possibly changed) speed."""
+		self.next_moves[snake_idx] = self.time + 1000 / speed
+
+	def get_next_event_time(self) -> float:
+		"""Return the time (in ms) of the next scheduled event."""
+		return min([self.next_reocc] + self.next_moves)
+
+	def pop_next_events(self) -> (bool, [int]):
+		"""
+		Advance the clock to the next scheduled event(s).
+
+		:return: Tuple containing [0] True if the reoccurring update is due and [1] the indices of the snakes that are due to move
+		"""
+		self.time = self.get_next_event_time()
+		reocc_due = self.next_reocc <= self.time + SIMULTANEITY_TOLERANCE
+		if reocc_due:
+			self.next_reocc += REOCC_DUR
+		snake_ids = [idx for idx, next_move in enumerate(self.next_moves) if next_move <= self.time + SIMULTANEITY_TOLERANCE]
+		return reocc_due, snake_ids
+
+
+class Simulation:
+	"""Class for simulating a game as fast as possible, driven by a virtual clock instead of pygame timers"""
+
+	def __init__(self, level: Level, num_players: int = 4, seed: int = None, controllers: {int: Callable[[Game, Snake], tuple]} = None, recorder=None):
+		"""
+		Initialize the simulation.
+
+		:param level: The level to play. It is reset before the game starts.
+		:param num_players: The number of snakes
+		:param seed: Seed for the game's random generator. If None, a random seed is used.
+		:param controllers: Dict with snake indices as keys and functions as values. Before each move of the respective snake, the function is called with the game and the snake and returns
+		the orientation the snake should take (or None to keep the current one).
+		:param recorder: Optional replay.ReplayRecorder to record the game with (it's started here)
+		"""
+		level.reset()
+		self.game = Game(DEFAULT_SNAKE_NAMES[:num_players], DEFAULT_SNAKE_COLORS[:num_players], [dict(controls) for controls in DEFAULT_SNAKE_CONTROLS[:num_players]], level, seed)
+		self.controllers = controllers if controllers else {}
+		self.clock = GameClock([snake.speed for snake in self.game.snakes])
+		self.eaten_objects: [utils.Objects] = []
+		self.recorder = recorder
+		if self.recorder:
+			self.recorder.start(self.game)
+
+	def step(self) -> bool:
+		"""Process the next scheduled event(s). Return False if the game is over."""
+		reocc_due, snake_ids = self.clock.pop_next_events()
+		if reocc_due:
+			if self.recorder:
+				self.recorder.record_count(self.clock.time)
+			self.game.update_counting()
+		if snake_ids:
+			for idx in snake_ids:
+				if idx in self.controllers:
+					self.steer(self.game.snakes[idx], self.controllers[idx](self.game, self.game.snakes[idx]))
+			if self.recorder:
+				self.recorder.record_move(self.clock.time, snake_ids)
+			eaten_objects = [obj for obj in self.game.update_snakes(snake_ids) if obj in utils.Eatable]
+			# Items on a move that ended in a crash don't count as picked up
+			if not self.game.crashes:
+				self.eaten_objects.extend(eaten_objects)
+			for idx in snake_ids:
+				self.clock.schedule_move(idx, self.game.snakes[idx].speed)
+		return not self.game.crashes
+
+	def steer(self, snake: Snake, orientation: (int, int)) -> None:
+		"""Let the snake take the given orientation by feeding the corresponding key into the game, just like a keyboard input."""
+		if orientation is not None and (key := snake.get_key_for_orientation(orientation)) is not None:
+			if self.recorder:
+				self.recorder.record_key(self.clock.time, key)
+			self.game.update_snake_orientation(key)
+
+	def run(self, max_time: float = None) -> float:
+		"""
+		Run the simulation until the game is over.
+
+		:param max_time: Optional time limit (in ms of game time)
+		:return: The elapsed game time in ms
+		"""
+		while (max_time is None or self.clock.get_next_event_time() <= max_time) and self.step():
+			pass
+		return self.clock.time
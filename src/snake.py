@@ -1,10 +1,8 @@
 """Module for the snake class in the friendly snakes package"""
 
 # ----- Imports --------
+from collections import deque
 from constants import *
-import pygame
-
-pygame.init()
 
 # ----- Constants ------
 
@@ -20,9 +18,15 @@ class Snake:
 		self.score = 0
 		# controls is a dict for the inputs that control the snake. Keys are the keyboard keys as pygame constants, values are the orientations (as (int, int) tuples)
 		self.controls = controls
-		self._pos = None
+		# The body is a deque from head to tail, so that moving only pushes a new head and pops the tail. cells maps the same squares to their sequence numbers for
+		# fast lookups. The head gets the next sequence number (head_seq) with every move, so the numbers decrease by one from the head to the tail.
+		self._pos: deque = deque()
+		self.cells: {(int, int): int} = {}
+		self.head_seq = 0
 		self.head = None
+		# orientation is the direction the snake will move next, heading the direction it moved last (i.e. from its neck to its head)
 		self.orientation = None
+		self.heading = None
 		self.speed = 4
 		self.is_growing = 0
 		self.is_drunk = 0
@@ -31,16 +35,32 @@ class Snake:
 		self.spit_fire_posis = []
 
 	@property
-	def pos(self) -> [(int, int)]:
+	def pos(self) -> deque:
 		return self._pos
 
 	@pos.setter
 	def pos(self, new_pos: [(int, int)]) -> None:
 		"""Update head, tail and orientation together with pos"""
-		self._pos = new_pos
-		self.head = new_pos[0]
-		self.orientation = utils.subtract_tuples(self.head, self.pos[1])
+		self._pos = deque(new_pos)
+		self.cells = {pos: -segment_idx for segment_idx, pos in enumerate(self._pos)}
+		self.head_seq = 0
+		self.head = self._pos[0]
+		self.orientation = self.heading = utils.subtract_positions(self.head, self._pos[1])
+		self.is_growing = max(self.is_growing - 1, 0)
+
+	def move(self, new_head: (int, int)) -> (int, int):
+		"""Move the snake one square in its current orientation, onto the given new head. Return the square of the dropped tail, or None if the snake is growing."""
+		tail = None
+		if self.is_growing == 0:
+			tail = self._pos.pop()
+			del self.cells[tail]
+		self._pos.appendleft(new_head)
+		self.head_seq += 1
+		self.cells[new_head] = self.head_seq
+		self.head = new_head
+		self.heading = self.orientation
 		self.is_growing = max(self.is_growing - 1, 0)
+		return tail
 
 	def reset(self) -> None:
 		"""Reset the snakes parameter"""
@@ -54,12 +74,18 @@ class Snake:
 	def update_orientation(self, key) -> bool:
 		"""Update the orientation based on the pressed key. Return True if the pressed key belonged to a snake"""
 		if key in self.controls:
-			cur_orient = utils.subtract_tuples(self.head, self._pos[1])
-			if utils.add_tuples([self.controls[key], cur_orient]) != (0, 0):
+			if utils.add_positions(self.controls[key], self.heading) != NO_ORIENTATION:
 				self.orientation = self.controls[key]
 			return True
 		return False
 
+	def get_key_for_orientation(self, orientation: (int, int)):
+		"""Return the key that currently leads to the given orientation (taking transposed controls into account), or None if there is none."""
+		for key, key_orientation in self.controls.items():
+			if key_orientation == orientation:
+				return key
+		return None
+
 	def grow(self, size: int):
 		"""Let the snake grow by the given size"""
 		self.is_growing += size
@@ -4,8 +4,6 @@ import itertools
 import pygame
 from enum import Enum, Flag, auto
 
-pygame.init()
-
 
 class Language(Enum):
 	GERMAN = 0
@@ -30,6 +28,15 @@ class SnakeParts(Enum):
 	TAIL = 3
 
 
+class CrashCause(Enum):
+	WALL = 0
+	SELF = 1
+	OTHER = 2
+	FIRE = 3
+	EXPLOSION = 4
+	BOMB = 5
+
+
 class Cntble(Enum):
 	DROP_ITEM = 0
 	BOMB = 1
@@ -56,6 +63,47 @@ Complex = Objects.BEER | Objects.BOMB | Objects.CHILI
 Hurting = Objects.WALL | Objects.EXPLOSION
 Indestructible = Objects.WALL
 MoveStopper = Objects.WALL | Objects.BOMB
+OBJECTS_BY_VALUE = {obj.value: obj for obj in Objects}
+
+
+class SquarePool:
+	"""A set of squares that supports adding, removing and drawing a uniformly random square in O(1)"""
+
+	def __init__(self, squares: [(int, int)] = ()):
+		# The squares are stored in a list (for sampling) together with a dict mapping each square to its index in the list (for O(1) removal)
+		self.squares: [(int, int)] = []
+		self.indices: {(int, int): int} = {}
+		for square in squares:
+			self.add(square)
+
+	def __len__(self) -> int:
+		return len(self.squares)
+
+	def __contains__(self, square: (int, int)) -> bool:
+		return square in self.indices
+
+	def __iter__(self):
+		return iter(self.squares)
+
+	def add(self, square: (int, int)) -> None:
+		"""Add the square to the pool, if it isn't in there yet."""
+		if square not in self.indices:
+			self.indices[square] = len(self.squares)
+			self.squares.append(square)
+
+	def discard(self, square: (int, int)) -> None:
+		"""Remove the square from the pool, if it is in there. The last square of the list takes its place."""
+		idx = self.indices.pop(square, None)
+		if idx is None:
+			return
+		last_square = self.squares.pop()
+		if idx < len(self.squares):
+			self.squares[idx] = last_square
+			self.indices[last_square] = idx
+
+	def sample(self, rng) -> (int, int):
+		"""Return a uniformly drawn square of the pool (without removing it), or None if the pool is empty."""
+		return rng.choice(self.squares) if self.squares else None
 
 
 def string_to_object(string: str) -> Objects:
@@ -86,6 +134,35 @@ def strings_to_objects(strings: [str], sep: str = ",") -> [[Objects]]:
 	return [[string_to_object(string) for string in line.split(sep)] for line in strings]
 
 
+def add_positions(pos1: (int, int), pos2: (int, int)) -> (int, int):
+	"""Add two grid positions (or a position and a direction). Use this instead of the generic tuple helpers in the hot paths."""
+	return pos1[0] + pos2[0], pos1[1] + pos2[1]
+
+
+def subtract_positions(pos1: (int, int), pos2: (int, int)) -> (int, int):
+	"""Subtract two grid positions, e.g. to get the direction between two neighboring squares"""
+	return pos1[0] - pos2[0], pos1[1] - pos2[1]
+
+
+def get_neighbor_table(size_1: int, size_2: int, directions: [(int, int)]) -> {(int, int): [(int, int)]}:
+	"""
+	Precompute the neighbors of all squares of a grid. The neighbors are stored in one flat list per direction (instead of a container per square), and neighbors
+	inside the grid share the tuple of the square they refer to, so that even large grids need little memory.
+
+	:param size_1: Size of the grid in the first coordinate
+	:param size_2: Size of the grid in the second coordinate
+	:param directions: The directions to look up
+	:return: Dict to be used as table[direction][i * size_2 + j] -> neighbor of square (i, j). Neighbors of squares on the border may lie outside the grid.
+	"""
+	squares = [(i, j) for i in range(size_1) for j in range(size_2)]
+	table = {}
+	for direction in directions:
+		offset = direction[0] * size_2 + direction[1]
+		table[direction] = [squares[idx + offset] if 0 <= i + direction[0] < size_1 and 0 <= j + direction[1] < size_2 else (i + direction[0], j + direction[1])
+							for idx, (i, j) in enumerate(squares)]
+	return table
+
+
 def add_tuples(tuple_list: list[tuple[float, ...]]) -> tuple[float, ...]:
 	"""Add all tuples in the list itemwise"""
 	return tuple([sum(items) for items in zip(*tuple_list)])
@@ -128,18 +205,13 @@ def get_tuple_signs(tuple1: tuple[float, ...]) -> tuple[int, ...]:
 
 def get_next_squares(pos: (int, int), direction: (int, int), num_squares: int) -> [(int, int)]:
 	"""Return the next squares, starting from the given pos in the given direction"""
-	return [add_two_tuples(pos, mult_tuple_to_int(direction, i)) for i in range(1, num_squares + 1)]
+	return [(pos[0] + direction[0] * i, pos[1] + direction[1] * i) for i in range(1, num_squares + 1)]
 
 
-def get_spit_fire_squares(pos: (int, int), direction: (int, int), num_squares: int, map: [[Objects]]) -> [(int, int)]:
-	"""Return the next squares, starting from the given pos in the given direction,
-	but stop if an indestructible Object is in the way"""
-	next_squares = get_next_squares(pos, direction, num_squares)
-	for idx, square in enumerate(next_squares):
-		row, col = square
-		if row >= len(map) or col >= len(map[row]) or map[row][col] in Indestructible:
-			return next_squares[0:idx]
-	return next_squares
+def get_area_squares(center: (int, int)) -> [(int, int)]:
+	"""Return the squares of the 3x3 area around the given center"""
+	row, col = center
+	return [(row - 1 + i, col - 1 + j) for i in range(3) for j in range(3)]
 
 
 def play_music_track(filename: str, volume: float = 1.0) -> None:
@@ -243,3 +315,16 @@ def get_time_string_for_ms(ms: int) -> str:
 	"""Return a time string in format mm:ss for the given number of milliseconds"""
 	seconds = int(ms / 1000)
 	return "{}:{}".format(int(seconds / 60), str(seconds % 60).zfill(2))
+
+
+def wait_for_events(timeout: int = 0) -> [pygame.event.Event]:
+	"""
+	Wait for events and return all events in the queue. Unlike polling the queue in a loop, the process sleeps until an event arrives and doesn't use the CPU.
+
+	:param timeout: The maximum time to wait (in ms), or 0 for waiting until there is an event
+	:return: The events (an empty list if the time passed without an event)
+	"""
+	event = pygame.event.wait(timeout)
+	if event.type == pygame.NOEVENT:
+		return []
+	return [event] + pygame.event.get()
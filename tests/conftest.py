@@ -0,0 +1,10 @@
+"""Test setup: the modules of the game are imported from the src directory and, like the game, resolve their files relative to it."""
+
+import os
+import sys
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+sys.path.insert(0, SRC_DIR)
+os.chdir(SRC_DIR)
@@ -0,0 +1,93 @@
+"""Tests for compiling level packs and recovering from damaged ones"""
+
+import json
+import os
+import shutil
+import pytest
+import levelpack
+from level import Level
+from constants import FILENAME_LEVEL_INFO
+
+
+@pytest.fixture
+def level_files(tmp_path):
+	"""Return a copy of the level json file and the path of its (not yet compiled) pack."""
+	json_filename = str(tmp_path / "levels.json")
+	shutil.copy(FILENAME_LEVEL_INFO, json_filename)
+	return json_filename, str(tmp_path / "levels.pack")
+
+
+def get_json_levels(json_filename: str, use_array: bool = False) -> [Level]:
+	with open(json_filename) as file_level_info:
+		return [Level(level_info, use_array) for level_info in json.load(file_level_info)]
+
+
+def assert_same_maps(levels: [Level], ref_levels: [Level]) -> None:
+	assert len(levels) == len(ref_levels)
+	for level, ref_level in zip(levels, ref_levels):
+		assert (level.id, level.name, level.start_pos) == (ref_level.id, ref_level.name, ref_level.start_pos)
+		if level.use_array:
+			assert (level.orig_map == ref_level.orig_map).all()
+		else:
+			assert level.orig_map == ref_level.orig_map
+
+
+@pytest.mark.parametrize("use_array", [False, True])
+def test_pack_holds_the_json_levels(level_files, use_array):
+	json_filename, pack_filename = level_files
+	levels = levelpack.load_levels(json_filename, pack_filename, use_array)
+	assert levelpack.is_pack_current(pack_filename, json_filename)
+	assert_same_maps(levels, get_json_levels(json_filename, use_array))
+
+
+@pytest.mark.parametrize("num_bytes", [1, 100, 5000])
+def test_truncated_pack_is_compiled_again(level_files, num_bytes):
+	json_filename, pack_filename = level_files
+	levelpack.compile_level_pack(json_filename, pack_filename)
+	size = os.path.getsize(pack_filename)
+	with open(pack_filename, "r+b") as pack_file:
+		pack_file.truncate(size - num_bytes)
+	# The header still claims that the pack is current
+	assert levelpack.is_pack_current(pack_filename, json_filename)
+	assert_same_maps(levelpack.load_levels(json_filename, pack_filename), get_json_levels(json_filename))
+	assert os.path.getsize(pack_filename) == size
+
+
+@pytest.mark.parametrize("use_array", [False, True])
+def test_damaged_map_is_read_from_json_and_pack_compiled_again(level_files, use_array):
+	json_filename, pack_filename = level_files
+	levelpack.compile_level_pack(json_filename, pack_filename)
+	map_offset = levelpack.LevelPack(pack_filename).index[3][6]
+	with open(pack_filename, "r+b") as pack_file:
+		# An object value that doesn't exist
+		pack_file.seek(map_offset + 10)
+		pack_file.write(b"\xff\xff")
+	levels = levelpack.load_levels(json_filename, pack_filename, use_array)
+	assert_same_maps(levels, get_json_levels(json_filename, use_array))
+	# The pack was compiled again, so all maps are intact without the json file
+	pack = levelpack.LevelPack(pack_filename)
+	for idx in range(len(pack)):
+		pack.read_map(idx)
+
+
+def test_damaged_map_without_json_file_raises_value_error(level_files):
+	json_filename, pack_filename = level_files
+	levelpack.compile_level_pack(json_filename, pack_filename)
+	map_offset = levelpack.LevelPack(pack_filename).index[0][6]
+	with open(pack_filename, "r+b") as pack_file:
+		pack_file.seek(map_offset)
+		pack_file.write(b"\xff\xff")
+	with pytest.raises(ValueError):
+		levelpack.LevelPack(pack_filename).read_map(0)
+
+
+def test_pack_is_compiled_again_when_json_changes(level_files):
+	json_filename, pack_filename = level_files
+	levelpack.load_levels(json_filename, pack_filename)
+	with open(json_filename) as file_level_info:
+		levels_info = json.load(file_level_info)
+	levels_info[0]["name"] = "Renamed"
+	with open(json_filename, "w") as file_level_info:
+		json.dump(levels_info, file_level_info)
+	assert not levelpack.is_pack_current(pack_filename, json_filename)
+	assert levelpack.load_levels(json_filename, pack_filename)[0].name == "Renamed"
@@ -0,0 +1,46 @@
+"""Tests for encoding the game state as ops (server) and applying them to a mirror (client)"""
+
+import pytest
+import generator
+from network import StateEncoder, GameMirror, get_state_digest
+from simulation import Simulation, load_levels, safe_controller
+from bot import BotController
+
+
+def get_level_pair(level_idx: int):
+	"""Return two independent copies of a level, one for the server and one for the client."""
+	if level_idx is None:
+		return [generator.generate_level(40, 60, 0.1, "both", seed=4, level_id=1, use_array=True) for _ in range(2)]
+	return load_levels()[level_idx], load_levels()[level_idx]
+
+
+@pytest.mark.parametrize("level_idx", [0, 2, 5, None])
+@pytest.mark.parametrize("steps_per_tick", [1, 7])
+def test_mirror_reproduces_server_state(level_idx, steps_per_tick):
+	server_level, client_level = get_level_pair(level_idx)
+	sim = Simulation(server_level, 4, 11, {0: safe_controller, 1: safe_controller, 2: BotController(), 3: BotController()})
+	encoder = StateEncoder()
+	mirror = GameMirror(client_level, 4)
+	num_ticks = 0
+	running = True
+	while running and sim.clock.time < 60000:
+		for _ in range(steps_per_tick):
+			if not (running := sim.step()):
+				break
+		mirror.apply(encoder.encode(sim.game))
+		num_ticks += 1
+		game = sim.game
+		assert get_state_digest(*mirror.get_infos_for_updating_display()) == get_state_digest(game.level, game.snakes, game.crashes, game.create_bomb_dict(), game.explosions)
+		for snake, mirrored_snake in zip(game.snakes, mirror.snakes):
+			assert mirrored_snake.cells.keys() == set(snake.pos)
+			assert mirror.cell_counts[snake.idx] == {pos: 1 for pos in snake.pos}
+		assert mirror.occupancy == {pos: idx for pos, (idx, _) in game.occupancy.items()}
+	assert num_ticks > 10
+
+
+def test_unchanged_state_encodes_no_ops():
+	level, _ = get_level_pair(1)
+	sim = Simulation(level, 2, 3, {0: safe_controller, 1: safe_controller})
+	encoder = StateEncoder()
+	assert encoder.encode(sim.game)
+	assert encoder.encode(sim.game) == b""
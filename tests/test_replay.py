@@ -0,0 +1,50 @@
+"""Tests for recording and playing back replays"""
+
+import random
+import pytest
+from constants import ORIENTATIONS
+from replay import ReplayRecorder, ReplayPlayer, read_replay
+from simulation import Simulation, load_levels, safe_controller
+
+LEVELS = load_levels()
+
+
+def get_state(game) -> tuple:
+	level_map = game.level.map.tolist() if hasattr(game.level.map, "tolist") else game.level.map
+	return ([list(snake.pos) for snake in game.snakes], [snake.score for snake in game.snakes], [snake.speed for snake in game.snakes], game.crashes,
+			sorted(game.bombs.items()), sorted(game.explosions.items()), level_map)
+
+
+@pytest.mark.parametrize("level_idx", [0, 4, 8])
+def test_replay_reproduces_recorded_game(tmp_path, level_idx):
+	level = LEVELS[level_idx]
+	rng = random.Random(level_idx)
+
+	def wobbly_controller(game, snake):
+		# Random turns, so that the replay holds key records as well
+		return rng.choice(ORIENTATIONS) if rng.random() < 0.2 else safe_controller(game, snake)
+
+	recorder = ReplayRecorder(str(tmp_path))
+	sim = Simulation(level, 4, level.id + 7, {idx: wobbly_controller for idx in range(4)}, recorder)
+	sim.run(60000)
+	recorder.stop()
+	recorded_state = get_state(sim.game)
+	info, records = read_replay(recorder.filename)
+	assert info["seed"] == level.id + 7 and info["level_id"] == level.id and len(info["controls"]) == 4
+	assert records
+	game = ReplayPlayer(recorder.filename, LEVELS).run()
+	assert get_state(game) == recorded_state
+
+
+def test_truncated_replay_plays_back_up_to_the_last_complete_record(tmp_path):
+	level = LEVELS[0]
+	recorder = ReplayRecorder(str(tmp_path))
+	sim = Simulation(level, 2, 3, {idx: safe_controller for idx in range(2)}, recorder)
+	sim.run(20000)
+	recorder.stop()
+	_, records = read_replay(recorder.filename)
+	with open(recorder.filename, "r+b") as replay_file:
+		replay_file.truncate(replay_file.seek(0, 2) - 3)
+	_, truncated_records = read_replay(recorder.filename)
+	assert truncated_records == records[:-1]
+	ReplayPlayer(recorder.filename, LEVELS).run()
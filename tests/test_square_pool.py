@@ -0,0 +1,61 @@
+"""Tests for utils.SquarePool"""
+
+import random
+from collections import Counter
+import utils
+
+
+def check_invariants(pool: utils.SquarePool, expected: {(int, int)}) -> None:
+	assert len(pool) == len(expected)
+	assert set(pool) == expected
+	assert len(pool.squares) == len(set(pool.squares))
+	for idx, square in enumerate(pool.squares):
+		assert pool.indices[square] == idx
+	assert set(pool.indices) == expected
+
+
+def test_add_and_discard_keep_list_and_indices_in_sync():
+	rng = random.Random(1)
+	squares = [(i, j) for i in range(10) for j in range(10)]
+	pool = utils.SquarePool(squares[:50])
+	expected = set(squares[:50])
+	check_invariants(pool, expected)
+	for _ in range(2000):
+		square = rng.choice(squares)
+		if rng.random() < 0.5:
+			pool.add(square)
+			expected.add(square)
+		else:
+			pool.discard(square)
+			expected.discard(square)
+		assert (square in pool) == (square in expected)
+	check_invariants(pool, expected)
+
+
+def test_add_twice_and_discard_missing_square_are_no_ops():
+	pool = utils.SquarePool([(0, 0), (0, 1)])
+	pool.add((0, 0))
+	pool.discard((5, 5))
+	check_invariants(pool, {(0, 0), (0, 1)})
+	pool.discard((0, 1))
+	pool.discard((0, 0))
+	check_invariants(pool, set())
+
+
+def test_sample_of_empty_pool_is_none():
+	assert utils.SquarePool().sample(random.Random(0)) is None
+
+
+def test_sample_is_uniform_after_removals():
+	rng = random.Random(2)
+	pool = utils.SquarePool((i, j) for i in range(8) for j in range(8))
+	# Remove squares from the middle of the list, so that sampling runs on a list reordered by the swaps
+	for square in [(0, 0), (3, 3), (7, 7), (4, 1), (2, 6)]:
+		pool.discard(square)
+	num_samples = 59 * 1000
+	counts = Counter(pool.sample(rng) for _ in range(num_samples))
+	assert set(counts) == set(pool)
+	expected = num_samples / len(pool)
+	# Chi-square statistic with 58 degrees of freedom; the 99.9 % quantile is about 98
+	chi_square = sum((count - expected) ** 2 / expected for count in counts.values())
+	assert chi_square < 98